@@ -0,0 +1,327 @@
+"""Compile-time benchmarks of `ModuleDescriptor.from_module` and `CCTranslator`.
+
+Runs synthetic models over a scaling grid and writes the measurements to a JSON
+file, which can be compared with the results of another commit.
+
+Examples
+--------
+>>> python -m benchmarks.compile --output bench.json
+>>> python -m benchmarks.compile --quick --compare bench.json
+>>> python -m benchmarks.compile --global-cse --compare bench.json
+>>> python -m benchmarks.compile --etas --mode reverse --compare forward.json
+>>> python -m benchmarks.compile --order 1 --compare bench.json
+>>> python -m benchmarks.compile --workers 4 --compare bench.json
+>>> python -m benchmarks.compile --no-fold-constants --output unfolded.json
+>>> python -m benchmarks.compile --no-eliminate-dead-code --output dead.json
+>>> python -m benchmarks.compile --op-budget 0 --compare bench.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import gc
+import itertools
+import json
+import logging
+import platform
+import re
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Iterable, Sequence
+
+from benchmarks.synthetic import ModelSpec, load_model
+from mas.libs.masmod.modeling.__version__ import __version__
+from mas.libs.masmod.modeling.module.descriptor.cc import CCTranslator
+from mas.libs.masmod.modeling.module.descriptor.descriptor import ModuleDescriptor
+from mas.libs.masmod.modeling.syntax.transformers.autodiff import AutoDiffOptions
+from mas.libs.masmod.modeling.utils.loggings import logger
+
+__all__ = [
+    "BenchmarkResult",
+    "default_grid",
+    "eta_grid",
+    "quick_grid",
+    "run",
+    "run_grid",
+]
+
+# Version of the layout of the result file
+RESULT_SCHEMA = 2
+
+# Arithmetic operators and math function calls of the generated C++ code
+_CC_OP = re.compile(r"[-+*/](?!=)|\b(?:std::)?(?:exp|log|pow|sqrt)\(")
+
+
+@dataclass(frozen=True)
+class BenchmarkResult:
+    """Measurements of one synthetic model.
+
+    Attributes
+    ----------
+    spec : ModelSpec
+        Shape of the model.
+    from_module : float
+        Best wall time of `ModuleDescriptor.from_module` in seconds.
+    translate : float
+        Best wall time of `CCTranslator.translate` in seconds.
+    peak_memory : int
+        Peak traced memory of one compilation in bytes.
+    pred_size : int
+        Characters of the postprocessed pred source.
+    cc_size : int
+        Characters of the generated C++ code.
+    cc_lines : int
+        Lines of the generated C++ code.
+    cc_ops : int
+        Arithmetic operations and math function calls of the generated C++ code.
+    """
+
+    spec: ModelSpec
+    from_module: float
+    translate: float
+    peak_memory: int
+    pred_size: int
+    cc_size: int
+    cc_lines: int
+    cc_ops: int
+
+    def to_dict(self) -> dict[str, Any]:
+        return {"name": self.spec.name, **asdict(self)}
+
+
+def default_grid() -> list[ModelSpec]:
+    """Scaling grid varying one dimension at a time from a base model per kind."""
+    specs: list[ModelSpec] = []
+    for kind in ["module", "ode", "physio"]:
+        base = ModelSpec(kind=kind)  # type: ignore[arg-type]
+        specs.append(base)
+        axes: dict[str, Sequence[int]] = {
+            "n_etas": [6, 12],
+            "n_eps": [2, 4],
+            "n_statements": [10, 20],
+            "n_branches": [1, 2],
+            "n_inline_calls": [2, 4],
+        }
+        if kind == "ode":
+            axes["n_cmts"] = [4, 8]
+        for field, values in axes.items():
+            for value in values:
+                specs.append(_replace(base, **{field: value}))
+    return specs
+
+
+def quick_grid() -> list[ModelSpec]:
+    """A small grid for smoke runs."""
+    return [
+        ModelSpec(kind=kind, n_branches=n_branches, n_inline_calls=1)  # type: ignore[arg-type]
+        for kind, n_branches in itertools.product(["module", "ode", "physio"], [0, 1])
+    ]
+
+
+def eta_grid() -> list[ModelSpec]:
+    """Models without compartments scaling the number of etas, to compare modes."""
+    return [
+        ModelSpec(kind="module", n_etas=n_etas, n_statements=10, n_branches=1)
+        for n_etas in [5, 10, 20]
+    ]
+
+
+def _replace(spec: ModelSpec, **changes: Any) -> ModelSpec:
+    return ModelSpec(**{**asdict(spec), **changes})
+
+
+def _compile(
+    cls: type, options: AutoDiffOptions | None
+) -> tuple[ModuleDescriptor, list[str], float, float]:
+    start = time.perf_counter()
+    descriptor = ModuleDescriptor.from_module(cls(), options=options)
+    mid = time.perf_counter()
+    cc = CCTranslator(descriptor=descriptor).translate()
+    end = time.perf_counter()
+    return descriptor, cc, mid - start, end - mid
+
+
+def run(
+    spec: ModelSpec,
+    repeat: int = 3,
+    directory: str | None = None,
+    options: AutoDiffOptions | None = None,
+) -> BenchmarkResult:
+    """Benchmark one synthetic model.
+
+    Wall times are the best of `repeat` runs, peak memory is traced on a separate
+    run so that tracing does not slow down the timed runs.
+    """
+    cls = load_model(spec, directory)
+
+    from_module = translate = float("inf")
+    for _ in range(repeat):
+        gc.collect()
+        descriptor, cc, t_from_module, t_translate = _compile(cls, options)
+        from_module = min(from_module, t_from_module)
+        translate = min(translate, t_translate)
+
+    gc.collect()
+    tracemalloc.start()
+    try:
+        _compile(cls, options)
+        _, peak_memory = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    code = "\n".join(cc)
+    return BenchmarkResult(
+        spec=spec,
+        from_module=from_module,
+        translate=translate,
+        peak_memory=peak_memory,
+        pred_size=len(descriptor.postprocessed_pred.src),
+        cc_size=len(code),
+        cc_lines=code.count("\n") + 1,
+        cc_ops=len(_CC_OP.findall(code)),
+    )
+
+
+def run_grid(
+    specs: Iterable[ModelSpec],
+    repeat: int = 3,
+    options: AutoDiffOptions | None = None,
+) -> list[BenchmarkResult]:
+    with tempfile.TemporaryDirectory(prefix="masmod-bench-") as directory:
+        return [
+            run(spec, repeat=repeat, directory=directory, options=options)
+            for spec in specs
+        ]
+
+
+def _git_commit() -> str | None:
+    try:
+        out = subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            cwd=Path(__file__).parent,
+            check=True,
+            capture_output=True,
+            text=True,
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return out.stdout.strip()
+
+
+def _report(results: list[BenchmarkResult], options: AutoDiffOptions) -> dict[str, Any]:
+    return {
+        "schema": RESULT_SCHEMA,
+        "version": __version__,
+        "options": options.to_dict(),
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "results": [result.to_dict() for result in results],
+    }
+
+
+def _compare(results: list[BenchmarkResult], baseline: dict[str, Any]) -> str:
+    previous = {r["name"]: r for r in baseline["results"]}
+    metrics = ["from_module", "translate", "peak_memory", "cc_size", "cc_ops"]
+    lines = [f"{'model':<88}" + "".join(f"{m:>14}" for m in metrics)]
+    for result in results:
+        before = previous.get(result.spec.name)
+        if before is None:
+            continue
+        current = asdict(result)
+        ratios = [
+            current[m] / before[m] if before.get(m) else float("nan") for m in metrics
+        ]
+        lines.append(
+            f"{result.spec.name:<88}" + "".join(f"{r:>13.2f}x" for r in ratios)
+        )
+    return "\n".join(lines)
+
+
+def main(argv: Sequence[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--output", "-o", default="bench-compile.json")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--quick", action="store_true", help="Run a small grid")
+    parser.add_argument(
+        "--etas", action="store_true", help="Run the grid of `eta_grid`"
+    )
+    parser.add_argument("--compare", help="Result file of a baseline to compare to")
+    parser.add_argument(
+        "--global-cse",
+        action="store_true",
+        help="Compile with AutoDiffOptions.global_cse",
+    )
+    parser.add_argument(
+        "--mode",
+        choices=["forward", "reverse"],
+        default="forward",
+        help="AutoDiffOptions.mode, reverse mode only supports the `module` kind",
+    )
+    parser.add_argument(
+        "--order",
+        type=int,
+        choices=[0, 1, 2],
+        default=2,
+        help="AutoDiffOptions.order",
+    )
+    parser.add_argument(
+        "--backend",
+        choices=["sympy", "symengine"],
+        default="sympy",
+        help="AutoDiffOptions.backend, symengine must be installed",
+    )
+    parser.add_argument(
+        "--workers", type=int, default=1, help="AutoDiffOptions.workers"
+    )
+    parser.add_argument(
+        "--no-fold-constants",
+        action="store_true",
+        help="Disable AutoDiffOptions.fold_constants",
+    )
+    parser.add_argument(
+        "--no-eliminate-dead-code",
+        action="store_true",
+        help="Disable AutoDiffOptions.eliminate_dead_code",
+    )
+    parser.add_argument(
+        "--op-budget",
+        type=int,
+        default=AutoDiffOptions.op_budget,
+        help="AutoDiffOptions.op_budget, no budget if not given or 0",
+    )
+    args = parser.parse_args(argv)
+
+    logger.setLevel(logging.WARNING)
+    options = AutoDiffOptions(
+        global_cse=args.global_cse,
+        mode=args.mode,
+        order=args.order,
+        backend=args.backend,
+        workers=args.workers,
+        fold_constants=not args.no_fold_constants,
+        eliminate_dead_code=not args.no_eliminate_dead_code,
+        op_budget=args.op_budget or None,
+    )
+    if args.etas:
+        specs = eta_grid()
+    elif args.quick:
+        specs = quick_grid()
+    else:
+        specs = default_grid()
+    results = run_grid(specs, repeat=args.repeat, options=options)
+    Path(args.output).write_text(json.dumps(_report(results, options), indent=2))
+    print(f"Wrote {len(results)} results to {args.output}", file=sys.stderr)
+
+    if args.compare:
+        baseline = json.loads(Path(args.compare).read_text())
+        print(_compare(results, baseline))
+
+
+if __name__ == "__main__":
+    main()
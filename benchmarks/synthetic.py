@@ -0,0 +1,202 @@
+"""Generator of synthetic models for compile-time benchmarks."""
+
+from __future__ import annotations
+
+import hashlib
+import importlib.util
+import sys
+import tempfile
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Literal
+
+from mas.libs.masmod.modeling.module.defs.module import Module
+
+__all__ = ["ModelSpec", "generate_source", "load_model"]
+
+ModelKind = Literal["module", "ode", "physio"]
+
+_CLASS_NAME = "SyntheticModel"
+
+_BASES: dict[ModelKind, str] = {
+    "module": "Module",
+    "ode": "OdeModule",
+    "physio": "EvOneCmtLinear.Physio",
+}
+
+
+@dataclass(frozen=True)
+class ModelSpec:
+    """Shape of a synthetic model.
+
+    Attributes
+    ----------
+    kind : ModelKind
+        Base class, `Module`, `OdeModule` or `EvOneCmtLinear.Physio`.
+    n_etas : int
+        Number of etas, each with its own theta.
+    n_eps : int
+        Number of epsilons of the residual error model.
+    n_cmts : int
+        Number of compartments of a chain of first order transfers, only used by
+        `ode` models.
+    n_statements : int
+        Number of intermediate assignments in pred.
+    n_branches : int
+        Number of if-else branches in pred.
+    n_inline_calls : int
+        Number of calls to a module level function inlined by the compiler.
+    """
+
+    kind: ModelKind = "module"
+    n_etas: int = 3
+    n_eps: int = 1
+    n_cmts: int = 2
+    n_statements: int = 5
+    n_branches: int = 0
+    n_inline_calls: int = 0
+
+    def __post_init__(self):
+        if self.kind not in _BASES:
+            raise ValueError(f"Unknown model kind '{self.kind}'")
+        if self.n_etas < 1 or self.n_eps < 1:
+            raise ValueError("Synthetic models need at least one eta and one eps")
+        if self.kind == "physio" and self.n_etas < 3:
+            raise ValueError("Physio models need at least 3 etas for cl, v and ka")
+        if self.kind == "ode" and self.n_cmts < 1:
+            raise ValueError("ODE models need at least one compartment")
+
+    @property
+    def name(self) -> str:
+        return "-".join(f"{k}={v}" for k, v in asdict(self).items())
+
+
+def _init_lines(spec: ModelSpec) -> list[str]:
+    if spec.kind == "ode":
+        lines = ["super().__init__(solver=odeint.DVERK())"]
+    else:
+        lines = ["super().__init__()"]
+    for i in range(spec.n_etas):
+        lines.append(f"self.tv_{i} = theta({1.0 + 0.1 * i}, bounds=(0, None))")
+        lines.append(f"self.iiv_{i} = omega({0.1 + 0.01 * i})")
+    for i in range(spec.n_eps):
+        lines.append(f"self.eps_{i} = sigma({0.1 + 0.01 * i})")
+    if spec.kind == "ode":
+        for i in range(spec.n_cmts):
+            flags = []
+            if i == 0:
+                flags.append("default_dose=True")
+            if i == spec.n_cmts - 1:
+                flags.append("default_obs=True")
+            lines.append(f"self.cmt_{i} = compartment({', '.join(flags)})")
+    lines.append('self.time = column("TIME")')
+    return lines
+
+
+def _pred_lines(spec: ModelSpec) -> list[str]:
+    lines = [f"p_{i} = self.tv_{i} * exp(self.iiv_{i})" for i in range(spec.n_etas)]
+
+    def p(k: int) -> str:
+        return f"p_{k % spec.n_etas}"
+
+    lines.append("x = p_0")
+    for k in range(spec.n_statements):
+        lines.append(f"x_{k} = x * {p(k + 1)} + {p(k)} / (1 + x)")
+        lines.append(f"x = x_{k}")
+    for k in range(spec.n_inline_calls):
+        lines.append(f"x = scaled(x, {p(k)})")
+    for k in range(spec.n_branches):
+        lines.extend(
+            [
+                f"if self.time > {float(k)}:",
+                f"    x = x * {p(k)}",
+                "else:",
+                f"    x = x + {p(k)}",
+            ]
+        )
+
+    match spec.kind:
+        case "ode":
+            lines.append("k_0 = x / p_0")
+            lines.append("self.cmt_0.dAdt = -k_0 * self.cmt_0.A")
+            for i in range(1, spec.n_cmts):
+                lines.append(f"k_{i} = {p(i)} / (1 + x)")
+                lines.append(
+                    f"self.cmt_{i}.dAdt = k_{i - 1} * self.cmt_{i - 1}.A"
+                    f" - k_{i} * self.cmt_{i}.A"
+                )
+            lines.append(f"ipred = self.cmt_{spec.n_cmts - 1}.A / p_0")
+        case "physio":
+            lines.append("ipred = self.solve(cl=x * p_0, v=p_1, ka=p_2)")
+        case "module":
+            lines.append("ipred = x * exp(-p_0 * self.time)")
+
+    y = " + ".join(
+        ["ipred * (1 + self.eps_0)", *[f"self.eps_{i}" for i in range(1, spec.n_eps)]]
+    )
+    lines.append(f"return {y}")
+    return lines
+
+
+def generate_source(spec: ModelSpec) -> str:
+    """Generate the source of a module defining `SyntheticModel` for `spec`."""
+    init = "\n".join(f"        {line}" for line in _init_lines(spec))
+    pred = "\n".join(f"        {line}" for line in _pred_lines(spec))
+    return f"""from mas.libs.masmod.modeling.api import (
+    EvOneCmtLinear,
+    Module,
+    OdeModule,
+    column,
+    compartment,
+    exp,
+    odeint,
+    omega,
+    sigma,
+    theta,
+)
+
+
+def scaled(a, b):
+    return a * exp(-b) + b
+
+
+class {_CLASS_NAME}({_BASES[spec.kind]}):
+    def __init__(self):
+{init}
+
+    def pred(self):
+{pred}
+"""
+
+
+def load_model(spec: ModelSpec, directory: str | Path | None = None) -> type[Module]:
+    """Write the source of `spec` to a file and import its model class.
+
+    The compiler reads the class source with `inspect`, so the model must live in
+    a real file.
+
+    Parameters
+    ----------
+    spec : ModelSpec
+        Shape of the model.
+    directory : str | Path | None
+        Directory the source is written to, a temporary directory if not given.
+    """
+    src = generate_source(spec)
+    digest = hashlib.sha1(src.encode("utf-8")).hexdigest()[:12]
+    module_name = f"_synthetic_{digest}"
+    if module_name in sys.modules:
+        return getattr(sys.modules[module_name], _CLASS_NAME)
+
+    if directory is None:
+        directory = tempfile.mkdtemp(prefix="masmod-bench-")
+    path = Path(directory) / f"{module_name}.py"
+    path.write_text(src, encoding="utf-8")
+
+    module_spec = importlib.util.spec_from_file_location(module_name, path)
+    if module_spec is None or module_spec.loader is None:
+        raise ImportError(f"Can not import synthetic model from {path}")
+    module = importlib.util.module_from_spec(module_spec)
+    sys.modules[module_name] = module
+    module_spec.loader.exec_module(module)
+    return getattr(module, _CLASS_NAME)
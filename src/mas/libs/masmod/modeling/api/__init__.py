@@ -1,36 +1,40 @@
-from mas.libs.masmod.modeling.functions.math import (
-    abs,
-    acos,
-    asin,
-    atan,
-    ceiling,
-    cos,
-    cosh,
-    exp,
-    floor,
-    ln,
-    log,
-    sin,
-    sinh,
-    sqrt,
-    tan,
-    tanh,
-)
-from mas.libs.masmod.modeling.functions.stats import normal_cdf
-from mas.libs.masmod.modeling.module.closed_form_solutions import EvOneCmtLinear
-from mas.libs.masmod.modeling.module.defs.module import Module
-from mas.libs.masmod.modeling.module.defs.ode import OdeModule, odeint
-from mas.libs.masmod.modeling.symbols._cmt import compartment
-from mas.libs.masmod.modeling.symbols._column import column
-from mas.libs.masmod.modeling.symbols._omega_eta import (
-    omega,
-    omega_iov,
-    omega_iov_sd,
-    omega_sd,
-)
-from mas.libs.masmod.modeling.symbols._sigma_eps import sigma, sigma_sd
-from mas.libs.masmod.modeling.symbols._theta import theta
-from mas.libs.masmod.modeling.symbols._y import likelihood, prediction
+import importlib
+import typing
+
+if typing.TYPE_CHECKING:
+    from mas.libs.masmod.modeling.functions.math import (
+        abs,
+        acos,
+        asin,
+        atan,
+        ceiling,
+        cos,
+        cosh,
+        exp,
+        floor,
+        ln,
+        log,
+        sin,
+        sinh,
+        sqrt,
+        tan,
+        tanh,
+    )
+    from mas.libs.masmod.modeling.functions.stats import normal_cdf
+    from mas.libs.masmod.modeling.module.closed_form_solutions import EvOneCmtLinear
+    from mas.libs.masmod.modeling.module.defs.module import Module
+    from mas.libs.masmod.modeling.module.defs.ode import OdeModule, odeint
+    from mas.libs.masmod.modeling.symbols._cmt import compartment
+    from mas.libs.masmod.modeling.symbols._column import column
+    from mas.libs.masmod.modeling.symbols._omega_eta import (
+        omega,
+        omega_iov,
+        omega_iov_sd,
+        omega_sd,
+    )
+    from mas.libs.masmod.modeling.symbols._sigma_eps import sigma, sigma_sd
+    from mas.libs.masmod.modeling.symbols._theta import theta
+    from mas.libs.masmod.modeling.symbols._y import likelihood, prediction
 
 __all__ = [
     "Module",
@@ -68,3 +72,58 @@ __all__ = [
     # closed form solutions
     "EvOneCmtLinear",
 ]
+
+# Attributes are imported on first access, so importing the api does not load
+# sympy, libcst, numpy or pydantic until a symbol is actually used
+_LAZY_ATTRS: dict[str, str] = {
+    **dict.fromkeys(
+        [
+            "abs",
+            "acos",
+            "asin",
+            "atan",
+            "ceiling",
+            "cos",
+            "cosh",
+            "exp",
+            "floor",
+            "ln",
+            "log",
+            "sin",
+            "sinh",
+            "sqrt",
+            "tan",
+            "tanh",
+        ],
+        "mas.libs.masmod.modeling.functions.math",
+    ),
+    "normal_cdf": "mas.libs.masmod.modeling.functions.stats",
+    "EvOneCmtLinear": "mas.libs.masmod.modeling.module.closed_form_solutions",
+    "Module": "mas.libs.masmod.modeling.module.defs.module",
+    "OdeModule": "mas.libs.masmod.modeling.module.defs.ode",
+    "odeint": "mas.libs.masmod.modeling.module.defs.ode",
+    "compartment": "mas.libs.masmod.modeling.symbols._cmt",
+    "column": "mas.libs.masmod.modeling.symbols._column",
+    "omega": "mas.libs.masmod.modeling.symbols._omega_eta",
+    "omega_iov": "mas.libs.masmod.modeling.symbols._omega_eta",
+    "omega_iov_sd": "mas.libs.masmod.modeling.symbols._omega_eta",
+    "omega_sd": "mas.libs.masmod.modeling.symbols._omega_eta",
+    "sigma": "mas.libs.masmod.modeling.symbols._sigma_eps",
+    "sigma_sd": "mas.libs.masmod.modeling.symbols._sigma_eps",
+    "theta": "mas.libs.masmod.modeling.symbols._theta",
+    "likelihood": "mas.libs.masmod.modeling.symbols._y",
+    "prediction": "mas.libs.masmod.modeling.symbols._y",
+}
+
+
+def __getattr__(name: str) -> typing.Any:
+    if name not in _LAZY_ATTRS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(_LAZY_ATTRS[name]), name)
+    # Cache in the module namespace, `__getattr__` is only called for misses
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> list[str]:
+    return sorted({*globals(), *__all__})
@@ -0,0 +1,341 @@
+import hashlib
+import itertools
+import json
+import os
+import traceback
+import typing
+from concurrent.futures import Future
+from dataclasses import dataclass
+
+import polars as pl
+
+from mas.libs.masmod.modeling.covariate.spec import (
+    AnyCovariatesInclusion,
+    AnyCovariatesInclusionType,
+    CategoricalCovariateInclusion,
+    ContinuousCovariateInclusion,
+)
+from mas.libs.masmod.modeling.covariate.stats import (
+    CovariateStatistics,
+    collect_covariate_statistics,
+)
+from mas.libs.masmod.modeling.module.descriptor.batch import CompileResult
+from mas.libs.masmod.modeling.module.descriptor.cc import CCTranslator
+from mas.libs.masmod.modeling.module.descriptor.descriptor import ModuleDescriptor
+from mas.libs.masmod.modeling.symbols._column import AnyCategoricalColVar
+from mas.libs.masmod.modeling.syntax.rethrow import MTranError
+from mas.libs.masmod.modeling.syntax.unparse import unparse
+from mas.libs.masmod.modeling.typings import BoundsType, ValueType
+from mas.libs.masmod.modeling.utils.loggings import logger
+from mas.libs.masmod.modeling.utils.pool import process_pool
+
+__all__ = ["CovariateCandidate", "CovariateRelation", "ScmDriver"]
+
+ScmRelationType = typing.Literal["linear", "piecewise", "exp", "power"]
+
+
+@dataclass(frozen=True)
+class CovariateRelation:
+    """A covariate relation referenced by names, so it can be sent to workers.
+
+    Attributes
+    ----------
+    covariate : str
+        Name of the covariate (column) attribute of the module.
+    on : str
+        Name of the theta the covariate is included on.
+    state : AnyCovariatesInclusionType
+        Parameterization of the relation.
+    """
+
+    covariate: str
+    on: str
+    state: AnyCovariatesInclusionType
+    init: ValueType | list[ValueType] | None = None
+    bounds: BoundsType | list[BoundsType] | None = None
+    fixed: bool = False
+
+    def __str__(self) -> str:
+        s = f"{self.on} ~ {self.covariate} @ {self.state}"
+        if self.fixed:
+            s += "[FIXED]"
+        return s
+
+    def as_inclusion(self, descriptor: ModuleDescriptor) -> AnyCovariatesInclusion:
+        """Resolve the names against the symbols of a descriptor."""
+        on = next((t for t in descriptor.thetas if t.name == self.on), None)
+        if on is None:
+            raise ValueError(f"No theta named '{self.on}'")
+        covariate = next(
+            (c for c in descriptor.colvars if c.name == self.covariate), None
+        )
+        if covariate is None:
+            raise ValueError(f"No covariate named '{self.covariate}'")
+
+        if isinstance(covariate, AnyCategoricalColVar):
+            if self.state not in ("exclude", "linear"):
+                raise ValueError(
+                    "Categorical covariate can only be included with linear type."
+                )
+            return CategoricalCovariateInclusion(
+                on=on,
+                covariate=covariate,
+                state=self.state,
+                init=self.init,
+                bounds=self.bounds,
+                fixed=self.fixed,
+            )
+        return ContinuousCovariateInclusion(
+            on=on,
+            covariate=covariate,
+            state=self.state,
+            init=self.init,
+            bounds=self.bounds,
+            fixed=self.fixed,
+        )
+
+
+@dataclass(frozen=True)
+class CovariateCandidate:
+    """A candidate model of a SCM step.
+
+    Attributes
+    ----------
+    relations : tuple[CovariateRelation, ...]
+        All relations included in the candidate on top of the base model.
+    result : CompileResult
+        Compiled sources and C++ code of the candidate, or the failure.
+    """
+
+    relations: tuple[CovariateRelation, ...]
+    result: CompileResult
+
+    @property
+    def ok(self) -> bool:
+        """bool: Whether the candidate compiled successfully."""
+        return self.result.ok
+
+    @property
+    def cc(self) -> str | None:
+        """str | None: Translated C++ code of the candidate."""
+        return self.result.cc
+
+    def descriptor(self) -> ModuleDescriptor:
+        """Rebuild the ModuleDescriptor of the candidate."""
+        return self.result.descriptor()
+
+
+# Base descriptors rebuilt in worker processes, keyed by the hash of the base
+# result, so that candidates compiled by the same worker share one autodiff memo
+_WORKER_BASES: dict[str, ModuleDescriptor] = {}
+
+
+def _base_key(base: CompileResult) -> str:
+    return hashlib.sha256(
+        "\0".join(
+            [
+                base.src or "",
+                base.preprocessed_pred or "",
+                base.postprocessed_pred or "",
+                json.dumps(base.autodiff_options, sort_keys=True),
+            ]
+        ).encode("utf-8")
+    ).hexdigest()
+
+
+def _build_candidate(
+    base: ModuleDescriptor | CompileResult,
+    relations: tuple[CovariateRelation, ...],
+    statistics: dict[str, CovariateStatistics],
+) -> CompileResult:
+    name = " + ".join(str(relation) for relation in relations)
+    try:
+        if isinstance(base, CompileResult):
+            key = _base_key(base)
+            if key not in _WORKER_BASES:
+                _WORKER_BASES[key] = base.descriptor()
+            base = _WORKER_BASES[key]
+
+        descriptor = base.add_covariate(
+            *[relation.as_inclusion(base) for relation in relations],
+            data=statistics,
+        )
+        return CompileResult(
+            name=name,
+            src=unparse(descriptor._code_gen()).strip(),
+            preprocessed_pred=descriptor.preprocessed_pred.src,
+            postprocessed_pred=descriptor.postprocessed_pred.src,
+            cc="\n".join(CCTranslator(descriptor=descriptor).translate()),
+            autodiff_options=descriptor.autodiff_options.to_dict(),
+        )
+    except (Exception, MTranError):
+        return CompileResult(name=name, error=traceback.format_exc())
+
+
+class ScmDriver:
+    """Candidate generation for stepwise covariate modelling (SCM).
+
+    The statistics of every covariate column are computed once from the data, and
+    each candidate of a step, i.e. the base model plus the relations included so
+    far plus one relation from the grid, is compiled to a descriptor and C++ code
+    on a process pool.
+
+    Parameters
+    ----------
+    base : ModuleDescriptor
+        The model to include covariates in.
+    data : pl.DataFrame
+        The data set, used to compute the covariate statistics.
+    workers : int | None
+        Number of worker processes, defaults to the number of CPUs. With one
+        worker the candidates are compiled in the current process. The workers
+        are not forked from the current process, see `process_pool`, and import
+        its `__main__` module again, so a script using more than one worker must
+        compile the candidates under an `if __name__ == "__main__":` guard.
+
+    Examples
+    --------
+    >>> driver = ScmDriver(base=descriptor, data=df, workers=8)
+    >>> grid = driver.grid(covariates=["wt", "age"], thetas=["tv_cl", "tv_v"])
+    >>> candidates = driver.candidates(grid)
+    >>> [str(c.relations[-1]) for c in candidates if c.ok]
+    """
+
+    def __init__(
+        self,
+        base: ModuleDescriptor,
+        data: pl.DataFrame,
+        workers: int | None = None,
+    ) -> None:
+        if workers is None:
+            workers = os.cpu_count() or 1
+        if workers < 1:
+            raise ValueError("`workers` must be a positive integer")
+        self._base = base
+        self._workers = workers
+        self._statistics = collect_covariate_statistics(data, base.colvars)
+
+    @property
+    def base(self) -> ModuleDescriptor:
+        """ModuleDescriptor: The model to include covariates in."""
+        return self._base
+
+    @property
+    def statistics(self) -> dict[str, CovariateStatistics]:
+        """dict[str, CovariateStatistics]: Covariate statistics keyed by column name."""
+        return self._statistics
+
+    def grid(
+        self,
+        covariates: typing.Iterable[str] | None = None,
+        thetas: typing.Iterable[str] | None = None,
+        relations: typing.Iterable[ScmRelationType] = (
+            "linear",
+            "piecewise",
+            "exp",
+            "power",
+        ),
+    ) -> list[CovariateRelation]:
+        """Build the candidate grid covariate × theta × relation.
+
+        Categorical covariates are only combined with the linear relation.
+
+        Parameters
+        ----------
+        covariates : Iterable[str] | None
+            Names of covariates, defaults to all columns of the base model.
+        thetas : Iterable[str] | None
+            Names of thetas, defaults to all thetas of the base model.
+        relations : Iterable[ScmRelationType]
+            Relations to try for continuous covariates.
+        """
+        colvars = {colvar.name: colvar for colvar in self._base.colvars}
+        covariate_names = list(colvars) if covariates is None else list(covariates)
+        theta_names = self._base.theta_names() if thetas is None else list(thetas)
+        relations = list(relations)
+
+        grid: list[CovariateRelation] = []
+        for covariate_name, theta_name in itertools.product(
+            covariate_names, theta_names
+        ):
+            if covariate_name not in colvars:
+                raise ValueError(f"No covariate named '{covariate_name}'")
+            if colvars[covariate_name].is_categorical:
+                states: list[ScmRelationType] = ["linear"]
+            else:
+                states = relations
+            for state in states:
+                grid.append(
+                    CovariateRelation(
+                        covariate=covariate_name, on=theta_name, state=state
+                    )
+                )
+        return grid
+
+    def candidates(
+        self,
+        grid: typing.Iterable[CovariateRelation],
+        included: typing.Sequence[CovariateRelation] = (),
+    ) -> list[CovariateCandidate]:
+        """Compile one candidate per relation of the grid.
+
+        Parameters
+        ----------
+        grid : Iterable[CovariateRelation]
+            Relations to test in this step.
+        included : Sequence[CovariateRelation]
+            Relations already accepted in previous steps, included in every
+            candidate.
+
+        Returns
+        -------
+        list[CovariateCandidate]
+            Candidates in the same order as `grid`. Failures are reported in the
+            candidate result and do not abort the step.
+        """
+        jobs = [(*included, relation) for relation in grid]
+        if self._workers == 1 or len(jobs) <= 1:
+            results = [
+                _build_candidate(self._base, relations, self._statistics)
+                for relations in jobs
+            ]
+        else:
+            results = self._build_in_pool(jobs)
+
+        candidates: list[CovariateCandidate] = []
+        for relations, result in zip(jobs, results):
+            if not result.ok:
+                logger.warning(
+                    "[MTran::scm] Failed to build candidate: %s", result.name
+                )
+            candidates.append(CovariateCandidate(relations=relations, result=result))
+        return candidates
+
+    def _build_in_pool(
+        self, jobs: list[tuple[CovariateRelation, ...]]
+    ) -> list[CompileResult]:
+        # Descriptors do not survive pickling, ship the compiled base sources instead
+        base = CompileResult(
+            name=self._base.class_name,
+            src=unparse(self._base._code_gen()).strip(),
+            preprocessed_pred=self._base.preprocessed_pred.src,
+            postprocessed_pred=self._base.postprocessed_pred.src,
+            autodiff_options=self._base.autodiff_options.to_dict(),
+        )
+        results: list[CompileResult] = []
+        with process_pool(min(self._workers, len(jobs))) as executor:
+            futures: list[Future[CompileResult]] = [
+                executor.submit(_build_candidate, base, relations, self._statistics)
+                for relations in jobs
+            ]
+            for relations, future in zip(jobs, futures):
+                try:
+                    results.append(future.result())
+                except Exception:
+                    results.append(
+                        CompileResult(
+                            name=" + ".join(str(relation) for relation in relations),
+                            error=traceback.format_exc(),
+                        )
+                    )
+        return results
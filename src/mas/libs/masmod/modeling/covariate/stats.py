@@ -0,0 +1,96 @@
+import typing
+from dataclasses import dataclass
+
+import numpy as np
+
+from mas.libs.masmod.modeling.symbols._column import ColVar
+
+if typing.TYPE_CHECKING:
+    import polars as pl
+
+__all__ = [
+    "CovariateStatistics",
+    "CovariateStatisticsLike",
+    "collect_covariate_statistics",
+    "get_covariate_statistics",
+]
+
+
+@dataclass(frozen=True)
+class CovariateStatistics:
+    """Summary statistics of a data column used to parameterize covariate inclusions.
+
+    Attributes
+    ----------
+    median : float | None
+        Median of the column ignoring missing values, None for non-numeric columns.
+    min : float | None
+        Minimum of the column ignoring missing values, None for non-numeric columns.
+    max : float | None
+        Maximum of the column ignoring missing values, None for non-numeric columns.
+    levels : tuple[typing.Any, ...] | None
+        Unique values in order of appearance, only collected for categorical columns.
+    """
+
+    median: float | None = None
+    min: float | None = None
+    max: float | None = None
+    levels: tuple[typing.Any, ...] | None = None
+
+    @classmethod
+    def of(
+        cls, series: "pl.Series", categorical: bool = False
+    ) -> "CovariateStatistics":
+        import polars as pl
+
+        median: float | None = None
+        min_: float | None = None
+        max_: float | None = None
+        if series.dtype.is_numeric():
+            values = series.cast(pl.Float64).to_numpy()
+            median = float(np.nanmedian(values))
+            min_ = float(np.nanmin(values))
+            max_ = float(np.nanmax(values))
+
+        levels: tuple[typing.Any, ...] | None = None
+        if categorical:
+            levels = tuple(series.unique(maintain_order=True).to_list())
+
+        return cls(median=median, min=min_, max=max_, levels=levels)
+
+
+# polars is only imported once statistics are computed from data
+CovariateStatisticsLike = typing.Union[
+    "pl.DataFrame", typing.Mapping[str, CovariateStatistics]
+]
+
+
+def collect_covariate_statistics(
+    data: "pl.DataFrame", colvars: typing.Iterable[ColVar]
+) -> dict[str, CovariateStatistics]:
+    """Compute the statistics of every covariate column once.
+
+    Returns
+    -------
+    dict[str, CovariateStatistics]
+        Statistics keyed by column name.
+    """
+    return {
+        colvar.col_name: CovariateStatistics.of(
+            data[colvar.col_name], categorical=colvar.is_categorical
+        )
+        for colvar in colvars
+    }
+
+
+def get_covariate_statistics(
+    data: CovariateStatisticsLike, colvar: ColVar
+) -> CovariateStatistics:
+    """Look up precomputed statistics of a column, or compute them from data."""
+    if not isinstance(data, typing.Mapping):
+        return CovariateStatistics.of(
+            data[colvar.col_name], categorical=colvar.is_categorical
+        )
+    if colvar.col_name not in data:
+        raise KeyError(f"No statistics for column '{colvar.col_name}'")
+    return data[colvar.col_name]
@@ -1,8 +1,6 @@
 import math
 
 import libcst as cst
-import numpy as np
-import polars as pl
 
 from mas.libs.masmod.modeling.covariate.spec import (
     AnyCovariatesInclusion,
@@ -10,6 +8,10 @@ from mas.libs.masmod.modeling.covariate.spec import (
     ContinuousCovariateInclusion,
     ContinuousCovariateInclusionType,
 )
+from mas.libs.masmod.modeling.covariate.stats import (
+    CovariateStatisticsLike,
+    get_covariate_statistics,
+)
 from mas.libs.masmod.modeling.symbols._theta import Theta
 from mas.libs.masmod.modeling.typings import BoundsType, ValueType
 
@@ -135,11 +137,11 @@ def _get_continuous_default_bounds(
 def _build_categorical_init_lines(
     param_name: cst.Name,
     inclusion: CategoricalCovariateInclusion,
-    data: pl.DataFrame,
+    data: CovariateStatisticsLike,
     global_init: float,
 ):
     lines: list[cst.BaseStatement] = []
-    lvls = set(data[inclusion.covariate.col_name].unique())
+    lvls = get_covariate_statistics(data, inclusion.covariate).levels or ()
     theta_nums = len(lvls) - 1
     covariate_name = inclusion.covariate.name
     _s = inclusion.state
@@ -206,15 +208,18 @@ def _build_categorical_init_lines(
 def _build_continuous_init_lines(
     param_name: cst.Name,
     inclusion: ContinuousCovariateInclusion,
-    data: pl.DataFrame,
+    data: CovariateStatisticsLike,
     global_init: float,
 ):
     lines: list[cst.BaseStatement] = []
 
     covariate_name = inclusion.covariate.name
-    median = float(np.nanmedian(data[inclusion.covariate.col_name]))
-    max = float(np.nanmax(data[inclusion.covariate.col_name]))
-    min = float(np.nanmin(data[inclusion.covariate.col_name]))
+    stats = get_covariate_statistics(data, inclusion.covariate)
+    if stats.median is None or stats.min is None or stats.max is None:
+        raise ValueError(f"Continuous covariate {covariate_name} must be numeric")
+    median = stats.median
+    max = stats.max
+    min = stats.min
     _s = inclusion.state
     inits = inclusion.init
     bounds = inclusion.bounds
@@ -310,7 +315,7 @@ def _build_continuous_init_lines(
 def include_covariate_in_init(
     param_name: cst.Name,
     inclusion: AnyCovariatesInclusion,
-    data: pl.DataFrame,
+    data: CovariateStatisticsLike,
     global_init: float = 1.0,
 ) -> list[cst.BaseStatement]:
     if isinstance(inclusion, CategoricalCovariateInclusion):
@@ -1,18 +1,23 @@
 import libcst as cst
-import polars as pl
 
 from mas.libs.masmod.modeling.covariate.spec import (
     AnyCovariatesInclusion,
     CategoricalCovariateInclusion,
     ContinuousCovariateInclusion,
 )
+from mas.libs.masmod.modeling.covariate.stats import (
+    CovariateStatisticsLike,
+    get_covariate_statistics,
+)
 from mas.libs.masmod.modeling.syntax.with_comment import with_comment
 
 
 def _build_categorical_pred_lines(
-    param_name: cst.Name, inclusion: CategoricalCovariateInclusion, data: pl.DataFrame
+    param_name: cst.Name,
+    inclusion: CategoricalCovariateInclusion,
+    data: CovariateStatisticsLike,
 ):
-    lvls = data[inclusion.covariate.col_name].unique()
+    lvls = get_covariate_statistics(data, inclusion.covariate).levels or ()
     dtype = inclusion.covariate.dtype
     tv_name = inclusion.on.name
     cov_name = inclusion.covariate.name
@@ -93,10 +98,12 @@ def _build_categorical_pred_lines(
 
 
 def _build_continuous_pred_lines(
-    param_name: cst.Name, inclusion: ContinuousCovariateInclusion, data: pl.DataFrame
+    param_name: cst.Name,
+    inclusion: ContinuousCovariateInclusion,
+    data: CovariateStatisticsLike,
 ):
     lines: list[cst.BaseStatement] = []
-    median = data[inclusion.covariate.col_name].median()
+    median = get_covariate_statistics(data, inclusion.covariate).median
     tv_name = inclusion.on.name
     cov_name = inclusion.covariate.name
     _state = inclusion.state
@@ -225,7 +232,9 @@ def _build_continuous_pred_lines(
 
 
 def include_covariate_in_pred(
-    param_name: cst.Name, inclusion: AnyCovariatesInclusion, data: pl.DataFrame
+    param_name: cst.Name,
+    inclusion: AnyCovariatesInclusion,
+    data: CovariateStatisticsLike,
 ):
     if isinstance(inclusion, CategoricalCovariateInclusion):
         return _build_categorical_pred_lines(param_name, inclusion, data)
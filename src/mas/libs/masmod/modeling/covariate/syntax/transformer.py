@@ -1,9 +1,14 @@
+import typing
+
 import libcst as cst
-import polars as pl
 from libcst.metadata import ExpressionContext, ExpressionContextProvider
 
 from mas.libs.masmod.modeling.covariate.naming import make_parcov_varname
 from mas.libs.masmod.modeling.covariate.spec import AnyCovariatesInclusion
+from mas.libs.masmod.modeling.covariate.stats import (
+    CovariateStatisticsLike,
+    collect_covariate_statistics,
+)
 from mas.libs.masmod.modeling.covariate.syntax.init import include_covariate_in_init
 from mas.libs.masmod.modeling.covariate.syntax.pred import include_covariate_in_pred
 from mas.libs.masmod.modeling.syntax.with_comment import (
@@ -22,8 +27,13 @@ class CovariateInclusionTransformer(cst.CSTTransformer):
     def __init__(
         self,
         inclusions: list[AnyCovariatesInclusion],
-        data: pl.DataFrame,
+        data: CovariateStatisticsLike,
     ) -> None:
+        if not isinstance(data, typing.Mapping):
+            # Compute the statistics of every included column once
+            data = collect_covariate_statistics(
+                data, [inclusion.covariate for inclusion in inclusions]
+            )
         self._data = data
 
         self._init_lines: list[cst.BaseStatement] = []
@@ -2,12 +2,12 @@ from __future__ import annotations
 
 import abc
 import builtins
-import pathlib
 import typing
 
 from sympy import Symbol
 
 from mas.libs.masmod.modeling.symbols._column import AnyColVar, ColVarCollection
+from mas.libs.masmod.modeling.utils.find_global import class_globals, frame_globals
 from mas.libs.masmod.modeling.utils.inspect_hack import inspect
 
 if typing.TYPE_CHECKING:
@@ -60,20 +60,16 @@ class Module(object, metaclass=ModuleMetaclass):
 
     def __init__(self) -> None:
         _m__globals__ = {}
-        cls_source_file = inspect.getsourcefile(self.__class__)
-        if cls_source_file:
-            call_stacks = inspect.stack()
-            for frame in call_stacks:
-                if pathlib.Path(frame.filename) == pathlib.Path(cls_source_file):
-                    f_globals = frame[0].f_globals
-                    for f_global_name, f_global_val in f_globals.items():
-                        if f_global_name.startswith("__") and f_global_name.endswith(
-                            "__"
-                        ):
-                            # is magic variable
-                            continue
-                        _m__globals__[f_global_name] = f_global_val
-                    break
+        f_globals = class_globals(self.__class__)
+        if f_globals is None:
+            cls_source_file = inspect.getsourcefile(self.__class__)
+            if cls_source_file:
+                f_globals = frame_globals(cls_source_file)
+        for f_global_name, f_global_val in (f_globals or {}).items():
+            if f_global_name.startswith("__") and f_global_name.endswith("__"):
+                # is magic variable
+                continue
+            _m__globals__[f_global_name] = f_global_val
         setattr(self, "_m__globals__", _m__globals__)
 
     # Notice we intentionally use type comment instead of type hint here to avoid auto imports
@@ -0,0 +1,188 @@
+from __future__ import annotations
+
+import os
+import traceback
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from typing import Any, Iterable
+
+import libcst as cst
+
+from mas.libs.masmod.modeling.module.defs.module import Module
+from mas.libs.masmod.modeling.module.descriptor.cache import CompileCache
+from mas.libs.masmod.modeling.module.descriptor.cc import CCTranslator
+from mas.libs.masmod.modeling.module.descriptor.descriptor import ModuleDescriptor
+from mas.libs.masmod.modeling.module.descriptor.interpreter import interpret_cls_def
+from mas.libs.masmod.modeling.syntax.rethrow import MTranError
+from mas.libs.masmod.modeling.syntax.transformers.autodiff import AutoDiffOptions
+from mas.libs.masmod.modeling.syntax.unparse import unparse
+from mas.libs.masmod.modeling.utils.loggings import logger
+from mas.libs.masmod.modeling.utils.pool import process_pool
+
+__all__ = ["CompileResult", "compile_many"]
+
+
+@dataclass(frozen=True)
+class CompileResult:
+    """Outcome of compiling one module in `compile_many`.
+
+    Attributes
+    ----------
+    name : str
+        Qualified name of the module class.
+    src : str | None
+        Source code of the class generated by the descriptor.
+    preprocessed_pred : str | None
+        Source code of the pred function before autodiff.
+    postprocessed_pred : str | None
+        Source code of the pred function after autodiff.
+    cc : str | None
+        Translated C++ code.
+    error : str | None
+        Formatted traceback if the module failed to compile.
+    autodiff_options : dict[str, Any]
+        `AutoDiffOptions.to_dict` of the options pred was differentiated with.
+    """
+
+    name: str
+    src: str | None = None
+    preprocessed_pred: str | None = None
+    postprocessed_pred: str | None = None
+    cc: str | None = None
+    error: str | None = None
+    autodiff_options: dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def ok(self) -> bool:
+        """bool: Whether the module compiled successfully."""
+        return self.error is None
+
+    def descriptor(self) -> ModuleDescriptor:
+        """Rebuild the ModuleDescriptor without running the transforms again."""
+        if (
+            self.src is None
+            or self.preprocessed_pred is None
+            or self.postprocessed_pred is None
+        ):
+            raise ValueError(f"Module '{self.name}' failed to compile:\n{self.error}")
+        cls_def = cst.ensure_type(cst.parse_statement(self.src), cst.ClassDef)
+        return ModuleDescriptor.from_compiled(
+            interpret_cls_def(cls_def),
+            preprocessed_pred=self.preprocessed_pred,
+            postprocessed_pred=self.postprocessed_pred,
+            src=self.src,
+            options=AutoDiffOptions.from_dict(self.autodiff_options),
+        )
+
+
+def _qualname_of(module: type[Module] | Module) -> str:
+    cls = module if isinstance(module, type) else module.__class__
+    return f"{cls.__module__}.{cls.__qualname__}"
+
+
+def _compile_one(
+    module: type[Module] | Module, cache: CompileCache | None
+) -> CompileResult:
+    name = _qualname_of(module)
+    try:
+        mod = module() if isinstance(module, type) else module
+        descriptor = ModuleDescriptor.from_module(mod, cache=cache)
+        cc = "\n".join(CCTranslator(descriptor=descriptor).translate())
+        return CompileResult(
+            name=name,
+            src=unparse(descriptor._code_gen()).strip(),
+            preprocessed_pred=descriptor.preprocessed_pred.src,
+            postprocessed_pred=descriptor.postprocessed_pred.src,
+            cc=cc,
+            autodiff_options=descriptor.autodiff_options.to_dict(),
+        )
+    except (Exception, MTranError):
+        return CompileResult(name=name, error=traceback.format_exc())
+
+
+def compile_many(
+    modules: Iterable[type[Module] | Module],
+    workers: int | None = None,
+    *,
+    cache: CompileCache | None = None,
+) -> list[CompileResult]:
+    """Compile many modules to descriptors and C++ code over a process pool.
+
+    Each module is interpreted by `ModuleDescriptor.from_module` and translated by
+    `CCTranslator` in a worker process. A failing module is reported in its
+    `CompileResult` and does not abort the batch.
+
+    Symbols do not survive pickling, so only module classes are sent to the
+    workers, where they are instantiated without arguments, and classes must be
+    importable by their qualified name. Instances are compiled as they are in the
+    current process, the results do not depend on the number of workers.
+
+    The workers are not forked from the current process, see `process_pool`, and
+    import its `__main__` module again. A script calling `compile_many` with more
+    than one worker must do so under an `if __name__ == "__main__":` guard.
+
+    Parameters
+    ----------
+    modules : Iterable[type[Module] | Module]
+        Module classes or instances to compile.
+    workers : int | None
+        Number of worker processes, defaults to the number of CPUs. With one
+        worker the modules are compiled in the current process.
+    cache : CompileCache | None
+        Optional compile cache shared by all workers.
+
+    Returns
+    -------
+    list[CompileResult]
+        Results in the same order as `modules`.
+    """
+    modules = list(modules)
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if workers < 1:
+        raise ValueError("`workers` must be a positive integer")
+
+    if workers == 1 or len(modules) <= 1:
+        results = [_compile_one(module, cache) for module in modules]
+    else:
+        results = _compile_in_pool(modules, workers, cache)
+
+    for result in results:
+        if not result.ok:
+            logger.warning("[MTran::batch] Failed to compile module: %s", result.name)
+    return results
+
+
+def _compile_in_pool(
+    modules: list[type[Module] | Module],
+    workers: int,
+    cache: CompileCache | None,
+) -> list[CompileResult]:
+    classes = [module for module in modules if isinstance(module, type)]
+    if not classes:
+        return [_compile_one(module, cache) for module in modules]
+
+    results: list[CompileResult] = []
+    with process_pool(min(workers, len(classes))) as executor:
+        futures: dict[int, Future[CompileResult]] = {
+            i: executor.submit(_compile_one, module, cache)
+            for i, module in enumerate(modules)
+            if isinstance(module, type)
+        }
+        for i, module in enumerate(modules):
+            future = futures.get(i, None)
+            if future is None:
+                # Instances hold symbols that do not survive pickling, and may
+                # have been constructed with arguments or edited since, they are
+                # compiled here while the pool compiles the classes
+                results.append(_compile_one(module, cache))
+                continue
+            try:
+                result = future.result()
+            except Exception:
+                # e.g. the module cannot be pickled to the worker
+                result = CompileResult(
+                    name=_qualname_of(module), error=traceback.format_exc()
+                )
+            results.append(result)
+    return results
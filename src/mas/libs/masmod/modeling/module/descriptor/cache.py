@@ -0,0 +1,203 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import tempfile
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Sequence
+
+from mas.libs.masmod.modeling.__version__ import __version__
+from mas.libs.masmod.modeling.module.descriptor.stage import AutoDiffStage
+from mas.libs.masmod.modeling.utils.loggings import logger
+
+__all__ = ["CompileCache", "CompileCacheEntry"]
+
+
+@dataclass(frozen=True)
+class CompileCacheEntry:
+    """Sources of the pred function stored by `CompileCache`."""
+
+    preprocessed_pred: str
+    postprocessed_pred: str
+    stage: AutoDiffStage | None = None
+
+
+class CompileCache:
+    """Content-addressed on-disk cache of compiled pred functions.
+
+    Entries are keyed by a hash of the class source, the pred source, the
+    ordered symbol table, the solver configuration and the package version, and
+    hold the preprocessed and postprocessed pred sources produced by
+    `ModuleDescriptor.from_module`. A hit skips the inline transpile and autodiff
+    stages entirely.
+
+    Inline functions are resolved from the module globals and are not part of
+    the key, so the cache should be cleared when such helpers change.
+
+    Parameters
+    ----------
+    directory : str | os.PathLike[str]
+        Directory holding the cache entries, created if missing.
+    max_entries : int
+        Maximum number of entries kept on disk. Least recently used entries are
+        evicted first.
+
+    Examples
+    --------
+    >>> cache = CompileCache("~/.cache/masmod")
+    >>> descriptor = ModuleDescriptor.from_module(MyModel(), cache=cache)
+    >>> cache.hits, cache.misses
+    (0, 1)
+    """
+
+    suffix = ".json"
+
+    def __init__(self, directory: str | os.PathLike[str], max_entries: int = 512):
+        if max_entries < 1:
+            raise ValueError("`max_entries` must be a positive integer")
+        self._directory = Path(directory).expanduser()
+        self._directory.mkdir(parents=True, exist_ok=True)
+        self._max_entries = max_entries
+        self._hits = 0
+        self._misses = 0
+
+    @property
+    def directory(self) -> Path:
+        """Path: Directory holding the cache entries."""
+        return self._directory
+
+    @property
+    def max_entries(self) -> int:
+        """int: Maximum number of entries kept on disk."""
+        return self._max_entries
+
+    @property
+    def hits(self) -> int:
+        """int: Number of lookups served from the cache."""
+        return self._hits
+
+    @property
+    def misses(self) -> int:
+        """int: Number of lookups not found in the cache."""
+        return self._misses
+
+    @staticmethod
+    def key(
+        *,
+        class_src: str,
+        pred_src: str,
+        symbols: Sequence[tuple[str, str]],
+        configuration: dict[str, Any],
+        options: dict[str, Any] | None = None,
+    ) -> str:
+        """Compute the content address of a module.
+
+        Parameters
+        ----------
+        class_src : str
+            Source code of the module class.
+        pred_src : str
+            Source code of the pred function.
+        symbols : Sequence[tuple[str, str]]
+            Ordered `(kind, name)` pairs of the symbol table.
+        configuration : dict[str, Any]
+            Solver configuration of the module.
+        options : dict[str, Any] | None
+            Options of the generated derivative code, see `AutoDiffOptions`.
+        """
+        payload = json.dumps(
+            {
+                "version": __version__,
+                "class_src": class_src,
+                "pred_src": pred_src,
+                "symbols": [[kind, name] for kind, name in symbols],
+                "configuration": configuration,
+                "options": options or {},
+            },
+            sort_keys=True,
+            default=str,
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _path_of(self, key: str) -> Path:
+        return self._directory / f"{key}{self.suffix}"
+
+    def get(self, key: str) -> CompileCacheEntry | None:
+        """Look up an entry, marking it as recently used on hit."""
+        path = self._path_of(key)
+        try:
+            with path.open("r", encoding="utf-8") as f:
+                content = json.load(f)
+            stage = content.get("stage", None)
+            entry = CompileCacheEntry(
+                preprocessed_pred=content["preprocessed_pred"],
+                postprocessed_pred=content["postprocessed_pred"],
+                stage=None if stage is None else AutoDiffStage.from_dict(stage),
+            )
+        except (OSError, ValueError, KeyError, TypeError):
+            self._misses += 1
+            logger.debug("[MTran::cache] Miss %s", key)
+            return None
+
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        self._hits += 1
+        logger.debug("[MTran::cache] Hit %s", key)
+        return entry
+
+    def put(self, key: str, entry: CompileCacheEntry) -> None:
+        """Store an entry and evict the least recently used ones beyond the bound."""
+        content = {
+            "version": __version__,
+            "preprocessed_pred": entry.preprocessed_pred,
+            "postprocessed_pred": entry.postprocessed_pred,
+            "stage": None if entry.stage is None else entry.stage.to_dict(),
+        }
+        # Write to a temporary file first so that concurrent readers never see a
+        # partially written entry
+        fd, tmp_path = tempfile.mkstemp(dir=self._directory, prefix=".", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(content, f)
+            os.replace(tmp_path, self._path_of(key))
+        except BaseException:
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+            raise
+        self._evict()
+
+    def _evict(self) -> None:
+        entries: list[tuple[float, Path]] = []
+        for path in self._directory.glob(f"*{self.suffix}"):
+            try:
+                entries.append((path.stat().st_mtime, path))
+            except OSError:
+                continue
+        if len(entries) <= self._max_entries:
+            return
+        entries.sort(key=lambda x: x[0])
+        for _, path in entries[: len(entries) - self._max_entries]:
+            logger.debug("[MTran::cache] Evict %s", path.stem)
+            try:
+                path.unlink()
+            except OSError:
+                pass
+
+    def clear(self) -> None:
+        """Remove all entries and reset the counters."""
+        for path in self._directory.glob(f"*{self.suffix}"):
+            try:
+                path.unlink()
+            except OSError:
+                pass
+        self._hits = 0
+        self._misses = 0
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self._directory.glob(f"*{self.suffix}"))
@@ -9,7 +9,7 @@ from libcst.metadata import (
     ParentNodeProvider,
 )
 from pandas.api.types import is_float_dtype, is_integer_dtype
-from sympy import Add, Basic, Mul, Number, Pow, Symbol, exp, parse_expr
+from sympy import Add, Basic, Mul, Number, Pow, Symbol, exp, log, parse_expr
 from sympy.core.relational import (
     Equality,
     GreaterThan,
@@ -50,7 +50,6 @@ from mas.libs.masmod.modeling.symbols._cmt import (
     Compartment,
 )
 from mas.libs.masmod.modeling.symbols._omega_eta import Eta
-from mas.libs.masmod.modeling.symbols._sigma_eps import Eps
 from mas.libs.masmod.modeling.symbols._x import X, XTransRack, XWrt
 from mas.libs.masmod.modeling.symbols._y import Y, YTransRack, YType, YWrt
 from mas.libs.masmod.modeling.syntax.metadata.scope_provider import ScopeProvider
@@ -60,6 +59,7 @@ from mas.libs.masmod.modeling.syntax.transformers.autodiff import (
     SECOND_ORDER,
 )
 from mas.libs.masmod.modeling.syntax.unparse import unparse
+from mas.libs.masmod.modeling.utils.profiling import profile_stage
 
 MSYMTAB_VARNAME = "__msymtab"
 LOCALS_VARNAME = "__locals"
@@ -228,6 +228,7 @@ class CCTransPredVisitor(cst.CSTVisitor):
         self._translated: list[str] = []
         self._source_code = source_code
         self._descriptor = descriptor
+        self._layout = descriptor.derivative_layout
         self._advan_type, self._trans_type = advan_trans
         self._namer = ArbitraryVariableNamer()
 
@@ -274,12 +275,15 @@ class CCTransPredVisitor(cst.CSTVisitor):
                 "{",
             ]
         )
+        export_locals = self._descriptor.autodiff_options.export_locals
         for assignment in scope.assignments:
             name = assignment.name
             if name == "self":
                 continue
             if name.startswith("__"):
                 continue  # skip private variables
+            if export_locals is not None and name not in export_locals:
+                continue
             _returns.append(f'(*{LOCALS_VARNAME}->dlocals)["{name}"] = {name};')
 
         # 导出共享变量
@@ -638,6 +642,8 @@ class CCTransPredVisitor(cst.CSTVisitor):
         if isinstance(expr, exp):
             to = self._translate_sympy(expr.exp)
             return f"std::exp({to})"
+        if isinstance(expr, log):
+            return f"mas::log({self._translate_sympy(expr.args[0])})"
         if isinstance(expr, Pow):
             base = self._translate_sympy(expr.base)
             to = self._translate_sympy(expr.exp)
@@ -646,36 +652,10 @@ class CCTransPredVisitor(cst.CSTVisitor):
         raise NotImplementedError(f"Unsupported expression type: {type(expr)}")
 
     def _compute_y_index(self, wrt: Symbol, wrt2nd: Symbol | None = None) -> int | None:
-        n_eta = len(self._descriptor.etas)
-        n_eps = len(self._descriptor.epsilons)
-        if wrt2nd is not None:
-            if isinstance(wrt, Eta) and isinstance(wrt2nd, Eps):
-                return (
-                    1
-                    + n_eta
-                    + n_eps
-                    + self._descriptor.etas.index(wrt) * n_eps
-                    + self._descriptor.epsilons.index(wrt2nd)
-                )
-            if isinstance(wrt, Eta) and isinstance(wrt2nd, Eta):
-                return (
-                    1
-                    + n_eta
-                    + n_eps
-                    + n_eta * n_eps
-                    + self._compute_eta_2nd_partial_index(wrt, wrt2nd)
-                )
-
-            raise IndexError(
-                f"wrt {wrt.name}, wrt2nd {wrt2nd.name} is invalid second order partial derivative"
-            )
-
-        if isinstance(wrt, Eta):
-            return 1 + self._descriptor.etas.index(wrt)
-        if isinstance(wrt, Eps):
-            return 1 + n_eta + self._descriptor.epsilons.index(wrt)
-
-        return None
+        """Index of a derivative of the prediction in `Y`, see `DerivativeLayout`."""
+        return self._layout.y_index(
+            wrt.name, wrt2nd.name if wrt2nd is not None else None
+        )
 
     def _compute_param_arg_index(
         self,
@@ -686,55 +666,30 @@ class CCTransPredVisitor(cst.CSTVisitor):
         if wrt is None and wrt2nd is None:
             return param_name, (0, 0)
 
+        eta_index = self._layout.eta_index
         if isinstance(wrt, Eta) and isinstance(wrt2nd, Eta):
-            return param_name, (
-                1 + self._descriptor.etas.index(wrt),
-                1 + self._descriptor.etas.index(wrt2nd),
-            )
+            return param_name, (1 + eta_index[wrt.name], 1 + eta_index[wrt2nd.name])
 
         if isinstance(wrt, Eta) and wrt2nd is None:
-            return param_name, (1 + self._descriptor.etas.index(wrt), 0)
+            return param_name, (1 + eta_index[wrt.name], 0)
 
         return None
 
-    def _get_cmt_index(self, cmt: Compartment) -> int:
-        cmt_index = -1
-        for i, cmt_ in enumerate(self._descriptor.cmts):
-            if cmt_.name == cmt.name:
-                cmt_index = i
-                break
-        return cmt_index
-
     def _compute_ode_index(
         self,
         cmt: Compartment,
         wrt: Symbol | CmtSolvedA | None = None,
         wrt2nd: Symbol | None = None,
     ) -> int | None:
-        n_cmt = len(self._descriptor.cmts)
-        n_eta = len(self._descriptor.etas)
-        cmt_index = self._get_cmt_index(cmt)
-        if wrt is None:
-            return cmt_index
-        elif wrt2nd is None:  # only wrt is given
-            if isinstance(wrt, Eta):
-                eta_index = self._descriptor.etas.index(wrt)
-                return n_cmt + eta_index * n_cmt + cmt_index
-            elif isinstance(wrt, CmtSolvedA):
-                cmt2_index = self._get_cmt_index(wrt.cmt)
-                return cmt_index * n_cmt + cmt2_index
-            else:
-                return None
-        else:
-            # TODO(@xuchongyi): 做二阶 ode 的时候这个索引要和 Indexer 对齐
-            if isinstance(wrt, Eta) and isinstance(wrt2nd, Eta):
-                comb_index = self._compute_eta_2nd_partial_index(wrt, wrt2nd)
-                if comb_index == -1:
-                    raise IndexError("wrt pair not found")
-
-                return n_cmt + n_cmt * n_eta + comb_index * n_cmt + cmt_index
-            else:
+        if isinstance(wrt, CmtSolvedA):
+            if wrt2nd is not None:
                 return None
+            return self._layout.da_index(cmt.name, wrt.cmt.name)
+        return self._layout.dadt_index(
+            cmt.name,
+            wrt.name if wrt is not None else None,
+            wrt2nd.name if wrt2nd is not None else None,
+        )
 
     def _compute_solution_index(
         self, wrt: Symbol | None = None, wrt2nd: Symbol | None = None
@@ -742,29 +697,10 @@ class CCTransPredVisitor(cst.CSTVisitor):
         """
         Compute the index of the solution based on the wrt and wrt2nd.
         """
-        n_eta = len(self._descriptor.etas)
-        if wrt is None and wrt2nd is None:
-            return 0
-
-        if isinstance(wrt, Eta) and isinstance(wrt2nd, Eta):
-            return 1 + n_eta + self._compute_eta_2nd_partial_index(wrt, wrt2nd)
-
-        if isinstance(wrt, Eta):
-            return 1 + self._descriptor.etas.index(wrt)
-
-        return None
-
-    def _compute_eta_2nd_partial_index(self, eta_i: Eta, eta_j: Eta) -> int:
-        # 下三角的索引
-        i = self._descriptor.etas.index(eta_i)
-        j = self._descriptor.etas.index(eta_j)
-        if i == -1 or j == -1:
-            return -1
-
-        if i < j:
-            j, i = i, j
-
-        return i * (i + 1) // 2 + j
+        return self._layout.solution_index(
+            wrt.name if wrt is not None else None,
+            wrt2nd.name if wrt2nd is not None else None,
+        )
 
     def _eval(self, token: cst.BaseExpression) -> Any:
         """
@@ -881,9 +817,11 @@ class CCTranslator:
             descriptor=self._descriptor,
             advan_trans=self._advan_trans,
         )
-        cst.MetadataWrapper(
-            cst.Module([self._descriptor.postprocessed_pred.cst])
-        ).visit(visitor)
+        with profile_stage("cc_translator") as record_output:
+            cst.MetadataWrapper(
+                cst.Module([self._descriptor.postprocessed_pred.cst])
+            ).visit(visitor)
+            record_output(statements=len(visitor.translated))
 
         translated.extend(visitor.translated)
 
@@ -12,34 +12,44 @@ ModuleClassTypeLiteral = Literal["OdeModule", "Module"] | str
 CompoundStatementT = TypeVar("CompoundStatementT", bound=cst.BaseCompoundStatement)
 
 
-@dataclass
+@dataclass(init=False)
 class SrcEncapsulation(Generic[CompoundStatementT]):
     src: str
-    cst: CompoundStatementT
 
-    @classmethod
-    def from_src(cls, src: str) -> SrcEncapsulation[CompoundStatementT]:
-        """
-        Create a SrcEncapsulation from source code and CST.
-        """
-        return cls(
-            src=src,
-            cst=cast(
+    def __init__(self, src: str, cst: CompoundStatementT | None = None) -> None:
+        self.src = src
+        # Parsed on first access if not given
+        self._cst = cst
+
+    @property
+    def cst(self) -> CompoundStatementT:
+        if self._cst is None:
+            self._cst = cast(
                 CompoundStatementT,
                 cst.ensure_type(
-                    cst.parse_statement(src),
+                    cst.parse_statement(self.src),
                     cst.BaseCompoundStatement,
                 ),
-            ),
-        )
+            )
+        return self._cst
+
+    @classmethod
+    def from_src(cls, src: str) -> SrcEncapsulation[CompoundStatementT]:
+        """
+        Create a SrcEncapsulation from source code, the CST is parsed lazily.
+        """
+        return cls(src=src)
 
     def apply_transform(
         self,
         transformer: cst.CSTTransformer,
     ) -> SrcEncapsulation[CompoundStatementT]:
-        transformed = cst.MetadataWrapper(cst.Module(body=[self.cst])).visit(
-            transformer
-        )
+        module = cst.Module(body=[self.cst])
+        if transformer.get_inherited_dependencies():
+            transformed = cst.MetadataWrapper(module).visit(transformer)
+        else:
+            # The wrapper deep copies the tree, only needed to resolve metadata
+            transformed = module.visit(transformer)
         src = unparse(transformed)
         return SrcEncapsulation(
             src=src,
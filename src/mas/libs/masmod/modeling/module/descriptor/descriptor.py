@@ -1,21 +1,25 @@
 from __future__ import annotations
 
+import json
 import re
+from copy import copy as shallow_copy
 from copy import deepcopy
 from dataclasses import dataclass, field, replace
-from typing import Any, Literal, Sequence, overload
+from typing import Any, Literal, Mapping, Sequence, overload
+from uuid import uuid4
 
 import libcst as cst
 import numpy as np
 import numpy.typing as npt
-import polars as pl
 from typing_extensions import Self
 
+from mas.libs.masmod.modeling.__version__ import __version__
 from mas.libs.masmod.modeling.covariate.spec import (
     AnyCovariatesInclusion,
     CategoricalCovariateInclusion,
     ContinuousCovariateInclusion,
 )
+from mas.libs.masmod.modeling.covariate.stats import CovariateStatisticsLike
 from mas.libs.masmod.modeling.covariate.syntax.transformer import (
     CovariateInclusionTransformer,
 )
@@ -26,11 +30,37 @@ from mas.libs.masmod.modeling.module.defs.closed_form import (
 )
 from mas.libs.masmod.modeling.module.defs.module import Module
 from mas.libs.masmod.modeling.module.defs.ode import OdeModule, get_solver, odeint
+from mas.libs.masmod.modeling.module.descriptor.cache import (
+    CompileCache,
+    CompileCacheEntry,
+)
 from mas.libs.masmod.modeling.module.descriptor.common import (
     ModuleClassTypeLiteral,
     SrcEncapsulation,
 )
 from mas.libs.masmod.modeling.module.descriptor.interpreter import interpret_cls_def
+from mas.libs.masmod.modeling.module.descriptor.layout import DerivativeLayout
+from mas.libs.masmod.modeling.module.descriptor.params import (
+    BlockParameter,
+    ParameterTable,
+    ThetaParameter,
+)
+from mas.libs.masmod.modeling.module.descriptor.serialize import (
+    SCHEMA_VERSION,
+    decode_blocks,
+    decode_cmt,
+    decode_colvar,
+    decode_sharedvar,
+    decode_theta,
+    encode_block,
+    encode_cmt,
+    encode_colvar,
+    encode_sharedvar,
+    encode_theta,
+)
+from mas.libs.masmod.modeling.module.descriptor.sparsity import DerivativeSparsity
+from mas.libs.masmod.modeling.module.descriptor.stage import AutoDiffStage, pred_locals
+from mas.libs.masmod.modeling.symbols._block import SymbolBlock
 from mas.libs.masmod.modeling.symbols._cmt import Compartment
 from mas.libs.masmod.modeling.symbols._column import (
     AnyCategoricalColVar,
@@ -41,9 +71,11 @@ from mas.libs.masmod.modeling.symbols._ns import SymbolNamespace
 from mas.libs.masmod.modeling.symbols._omega_eta import Eta, Omega
 from mas.libs.masmod.modeling.symbols._sharedvar import SharedVar
 from mas.libs.masmod.modeling.symbols._sigma_eps import Eps, Sigma
-from mas.libs.masmod.modeling.symbols._theta import Theta
-from mas.libs.masmod.modeling.symbols._y import likelihood, prediction
-from mas.libs.masmod.modeling.syntax.transformers.autodiff import AutoDiffTransformer
+from mas.libs.masmod.modeling.symbols._theta import Theta, code_gen_theta
+from mas.libs.masmod.modeling.syntax.transformers.autodiff import (
+    AutoDiffMemo,
+    AutoDiffOptions,
+)
 from mas.libs.masmod.modeling.syntax.transformers.inline.transpiler import (
     InlineFunctionTranspiler,
 )
@@ -56,6 +88,91 @@ from mas.libs.masmod.modeling.utils.block_diagonal import block_diagonal
 from mas.libs.masmod.modeling.utils.find_global import find_global_context
 from mas.libs.masmod.modeling.utils.inspect_hack import inspect
 from mas.libs.masmod.modeling.utils.loggings import logger
+from mas.libs.masmod.modeling.utils.profiling import profile_stage
+
+
+@dataclass(kw_only=True)
+class _ModuleInspection:
+    """Metadata and symbol table collected from a Module instance."""
+
+    src: str
+    pred_func_def: SrcEncapsulation[cst.FunctionDef]
+    docstring: str | None
+    class_type: ModuleClassTypeLiteral
+    configuration: dict[str, Any]
+    thetas: list[Theta]
+    etas: list[Eta]
+    epsilons: list[Eps]
+    colvars: list[ColVar]
+    cmts: list[Compartment]
+    sharedvars: list[SharedVar]
+    n_cmt: int
+    advan: int
+    trans: int
+    defdose_cmt: int
+    defobs_cmt: int
+
+    @property
+    def symbols(self) -> list[Theta | Eta | Eps | Compartment | ColVar]:
+        return [*self.thetas, *self.etas, *self.epsilons, *self.cmts, *self.colvars]
+
+
+# Marks the output of `ModuleDescriptor.to_dict`
+_FORMAT = "masmod.ModuleDescriptor"
+
+# Fields the interpreted module of a descriptor is generated from
+_MOD_FIELDS = frozenset(
+    [
+        "class_name",
+        "class_type",
+        "docstring",
+        "configuration",
+        "thetas",
+        "etas",
+        "epsilons",
+        "colvars",
+        "cmts",
+        "sharedvars",
+        "preprocessed_pred",
+    ]
+)
+
+# Symbol fields the parameter table holds the initial estimates of
+_PARAMETER_FIELDS = frozenset(["thetas", "etas", "epsilons"])
+
+# Fields the derivative layout of a descriptor is computed from
+_LAYOUT_FIELDS = frozenset(["thetas", "etas", "epsilons", "cmts", "_autodiff_options"])
+
+
+class _ReadOnlyBlock(SymbolBlock):
+    """Block of the parameter table of a descriptor, writes would be lost."""
+
+    _update_method: str
+
+    @property
+    def fixed(self) -> bool:
+        return self._fixed
+
+    @fixed.setter
+    def fixed(self, v: bool) -> None:
+        raise AttributeError(
+            f"{type(self).__name__} of a descriptor is read-only, "
+            f"use `{self._update_method}` instead"
+        )
+
+    def __setitem__(self, __key: Any, v: float) -> None:
+        raise ValueError(
+            f"{type(self).__name__} of a descriptor is read-only, "
+            f"use `{self._update_method}` instead"
+        )
+
+
+class _ReadOnlyOmega(_ReadOnlyBlock, Omega):
+    _update_method = "with_omega"
+
+
+class _ReadOnlySigma(_ReadOnlyBlock, Sigma):
+    _update_method = "with_sigma"
 
 
 @dataclass(kw_only=True)
@@ -84,32 +201,222 @@ class ModuleDescriptor(CodeGen):
     postprocessed_pred: SrcEncapsulation[cst.FunctionDef]
 
     def __post_init__(self):
-        self._mod = interpret_cls_def(self._code_gen())
+        # Initial estimates seeded by the symbols, which are then replaced by
+        # read-only snapshots of the table
+        self._params = ParameterTable.from_symbols(
+            self.thetas, self._blocks(self.etas), self._blocks(self.epsilons)
+        )
+        self._snapshot_symbols()
+        self._mod: Module | None = None
+        # Derivatives reused when recompiling the module, see `add_covariate`
+        self._autodiff_memo: AutoDiffMemo | None = None
+        self._autodiff_stage: AutoDiffStage | None = None
+        self._autodiff_options = AutoDiffOptions()
+        self._sparsity: DerivativeSparsity | None = None
+        self._layout: DerivativeLayout | None = None
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        super().__setattr__(name, value)
+        if name in _MOD_FIELDS:
+            # The module no longer matches the descriptor
+            self.__dict__["_mod"] = None
+        elif name == "postprocessed_pred":
+            self.__dict__["_sparsity"] = None
+        if name in _LAYOUT_FIELDS:
+            self.__dict__["_layout"] = None
+        if name in _PARAMETER_FIELDS and "_params" in self.__dict__:
+            self._sync_parameters()
 
     @property
-    def mod(self):
+    def mod(self) -> Module:
+        """Module: The module instance described, interpreted from the generated
+        class on first access unless the descriptor was created from it."""
+        if self._mod is None:
+            self._mod = interpret_cls_def(self._code_gen())
         return self._mod
 
+    @property
+    def derivative_sparsity(self) -> DerivativeSparsity:
+        """DerivativeSparsity: Structurally nonzero derivatives emitted in the
+        postprocessed pred function."""
+        if self._sparsity is None:
+            self._sparsity = DerivativeSparsity.of(self.postprocessed_pred.cst)
+        return self._sparsity
+
+    @property
+    def derivative_layout(self) -> DerivativeLayout:
+        """DerivativeLayout: Offsets of the derivatives in the buffers of the
+        compiled pred function."""
+        if self._layout is None:
+            self._layout = DerivativeLayout.of(self)
+        return self._layout
+
+    @property
+    def parameters(self) -> ParameterTable:
+        """ParameterTable: Initial estimates, bounds and fixed flags of parameters.
+
+        Shared with the descriptors returned by `with_theta`, `with_omega` and
+        `with_sigma` until they update it. The thetas, etas and epsilons of the
+        descriptor are read-only snapshots of the table.
+        """
+        return self._params
+
+    def _sync_parameters(self) -> None:
+        """Take the parameters of symbols new to the table, e.g. assigned to
+        `epsilons`, and snapshot the symbols again."""
+        self._params = self._params.for_symbols(
+            self.thetas, self._blocks(self.etas), self._blocks(self.epsilons)
+        )
+        self._snapshot_symbols()
+
+    def _snapshot_symbols(self) -> None:
+        # Symbols are interned by name, the snapshots are created under a unique
+        # name and renamed as `Module` does, so they are never shared
+        thetas: list[Theta] = []
+        for theta in self.thetas:
+            param = self._params.thetas[theta.name]
+            snapshot = Theta(
+                name=f"__unnamed_theta_{uuid4().hex}",
+                init_value=param.init_value,
+                bounds=param.bounds,
+                fixed=param.fixed,
+            )
+            snapshot.name = theta.name
+            snapshot.set_read_only("with_theta")
+            thetas.append(snapshot)
+        etas = self._snapshot_blocks(self.etas, self._params.omegas, _ReadOnlyOmega)
+        epsilons = self._snapshot_blocks(
+            self.epsilons, self._params.sigmas, _ReadOnlySigma
+        )
+        # Not a change of the fields, see `__setattr__`
+        self.__dict__.update(thetas=thetas, etas=etas, epsilons=epsilons)
+
+    @classmethod
+    def _snapshot_blocks(
+        cls,
+        els: list[Eta] | list[Eps],
+        params: Mapping[tuple[str, ...], BlockParameter],
+        kind: type[_ReadOnlyOmega] | type[_ReadOnlySigma],
+    ) -> list[Any]:
+        snapshots: dict[str, Eta | Eps] = {}
+        for block in cls._blocks(els):
+            names = tuple(block.names)
+            param = params[names]
+            block_els = [type(el)(name=f"__unnamed_{uuid4().hex}") for el in block.els]
+            snapshot = kind(els=block_els, values=param.values, fixed=param.fixed)
+            for name, el in zip(names, block_els):
+                if isinstance(el, Eta):
+                    el.omega = snapshot
+                else:
+                    el.sigma = snapshot
+                el.name = name
+                snapshots[name] = el
+        return [snapshots[el.name] for el in els]
+
+    @staticmethod
+    def _blocks(els: list[Eta] | list[Eps]) -> list[Omega | Sigma]:
+        blocks: list[Omega | Sigma] = []
+        visited_ids: set[int] = set()
+        for el in els:
+            block = el.omega if isinstance(el, Eta) else el.sigma
+            if id(block) not in visited_ids:
+                visited_ids.add(id(block))
+                blocks.append(block)
+        return blocks
+
+    @classmethod
+    def _block_names(cls, els: list[Eta] | list[Eps]) -> list[tuple[str, ...]]:
+        return [tuple(block.names) for block in cls._blocks(els)]
+
+    def _share_state(self, other: Self) -> Self:
+        other._params = self._params
+        other._autodiff_memo = self._autodiff_memo
+        other._autodiff_stage = self._autodiff_stage
+        other._autodiff_options = self._autodiff_options
+        return other
+
+    def _with_parameters(self, params: ParameterTable) -> Self:
+        # Pred sources are shared, the symbols are snapshots of the new table, and
+        # the module is only interpreted again with the new estimates if asked for
+        self_ = shallow_copy(self)
+        self_._params = params
+        self_._snapshot_symbols()
+        self_._mod = None
+        return self_
+
+    @property
+    def autodiff_options(self) -> AutoDiffOptions:
+        """AutoDiffOptions: Options pred was differentiated with."""
+        return self._autodiff_options
+
+    @property
+    def autodiff_stage(self) -> AutoDiffStage:
+        """AutoDiffStage: The pred function right before automatic differentiation."""
+        if self._autodiff_stage is None:
+            # Not kept by the compile cache or batch results, inline again from the
+            # preprocessed pred function
+            self._autodiff_stage = AutoDiffStage.from_preprocessed(
+                self.preprocessed_pred,
+                self.mod,
+                globals=find_global_context(o=self.mod),
+            )
+        return self._autodiff_stage
+
+    def rediff(self) -> Self:
+        """
+        Differentiate the pred function again against the current symbols.
+
+        Only `AutoDiffTransformer` runs, starting from `autodiff_stage`, so symbols
+        can be added or removed, e.g. an eps appended to `epsilons`, without
+        inspecting and inlining the module source again.
+        """
+        self_ = self.copy()
+        mod = self_.mod
+        # Symbols are compared by identity, use the ones of the interpreted module
+        symbols = SymbolNamespace(
+            getattr(mod, symbol.name)
+            for symbol in [
+                *self_.thetas,
+                *self_.etas,
+                *self_.epsilons,
+                *self_.cmts,
+                *self_.colvars,
+            ]
+        )
+        postprocessed_pred = self.autodiff_stage.differentiate(
+            mod, symbols, memo=self._autodiff_memo, options=self._autodiff_options
+        )
+        return self._share_state(replace(self_, postprocessed_pred=postprocessed_pred))
+
     @property
     def is_closed_form_solution(self) -> bool:
         """bool: If the module is a closed form solution."""
         return self.class_type not in ["OdeModule", "Module"]
 
     def copy(self):
-        self_ = deepcopy(self)
+        # Etas and epsilons refuse to be deep copied on their own, they are copied
+        # with their omega and sigma blocks below. The interpreted module is
+        # regenerated by `replace`, and the parameter table is immutable.
+        memo: dict[int, Any] = {
+            id(self._mod): self._mod,
+            id(self._params): self._params,
+        }
+        for el in [*self.etas, *self.epsilons]:
+            memo[id(el)] = el
+        self_ = deepcopy(self, memo)
 
+        # The blocks of the symbols, the parameter table holds the initial estimates
         etas_: list[Eta] = []
-        for omega_ in self_.omegas:
+        for omega_ in self._blocks(self_.etas):
             omega_self = deepcopy(omega_)
             etas_.extend(omega_self.els)
 
         epsilons_: list[Eps] = []
-        for sigma_ in self_.sigmas:
+        for sigma_ in self._blocks(self_.epsilons):
             sigma_self = deepcopy(sigma_)
             epsilons_.extend(sigma_self.els)
 
-        self_ = replace(self_, etas=etas_, epsilons=epsilons_)
-        return self_
+        return self._share_state(replace(self_, etas=etas_, epsilons=epsilons_))
 
     def _code_gen(self) -> cst.ClassDef:
         """
@@ -196,8 +503,19 @@ class ModuleDescriptor(CodeGen):
             cst.EmptyLine(),
             comment="Define typical value thetas",
         )
+        params = self.parameters
         for i, theta in enumerate(self.thetas):
-            line = cst.SimpleStatementLine(body=[theta._code_gen()])
+            theta_param = params.thetas[theta.name]
+            line = cst.SimpleStatementLine(
+                body=[
+                    code_gen_theta(
+                        name=theta.name,
+                        init_value=theta_param.init_value,
+                        bounds=theta_param.bounds,
+                        fixed=theta_param.fixed,
+                    )
+                ]
+            )
             if i == 0:
                 line = line.with_changes(
                     leading_lines=[cst.EmptyLine(), leading_comment]
@@ -212,7 +530,13 @@ class ModuleDescriptor(CodeGen):
         visited_omega: set[Omega] = set()
         for i, eta in enumerate(self.etas):
             if eta.omega not in visited_omega:
-                line = cst.SimpleStatementLine(body=[eta.omega._code_gen()])
+                omega_param = params.omegas[tuple(eta.omega.names)]
+                omega_ = Omega(
+                    els=eta.omega.els,
+                    values=omega_param.values,
+                    fixed=omega_param.fixed,
+                )
+                line = cst.SimpleStatementLine(body=[omega_._code_gen()])
                 if i == 0:
                     line = line.with_changes(
                         leading_lines=[cst.EmptyLine(), leading_comment]
@@ -228,7 +552,13 @@ class ModuleDescriptor(CodeGen):
         visited_sigma: set[Sigma] = set()
         for i, eps in enumerate(self.epsilons):
             if eps.sigma not in visited_sigma:
-                line = cst.SimpleStatementLine(body=[eps.sigma._code_gen()])
+                sigma_param = params.sigmas[tuple(eps.sigma.names)]
+                sigma_ = Sigma(
+                    els=eps.sigma.els,
+                    values=sigma_param.values,
+                    fixed=sigma_param.fixed,
+                )
+                line = cst.SimpleStatementLine(body=[sigma_._code_gen()])
                 if i == 0:
                     line = line.with_changes(
                         leading_lines=[cst.EmptyLine(), leading_comment]
@@ -305,21 +635,23 @@ class ModuleDescriptor(CodeGen):
     def theta_inits(
         self, named: bool = False
     ) -> npt.NDArray[np.float64] | dict[str, float]:
+        params = self.parameters.thetas
         if not named:
-            return np.array([theta.init_value for theta in self.thetas], dtype=float)
-        return {
-            name: value
-            for name, value in [(theta.name, theta.init_value) for theta in self.thetas]
-        }
+            return np.array(
+                [params[theta.name].init_value for theta in self.thetas], dtype=float
+            )
+        return {theta.name: params[theta.name].init_value for theta in self.thetas}
 
     def theta_names(self) -> list[str]:
         return [theta.name for theta in self.thetas]
 
     def theta_fixed(self) -> list[bool]:
-        return [theta.fixed for theta in self.thetas]
+        params = self.parameters.thetas
+        return [params[theta.name].fixed for theta in self.thetas]
 
     def theta_bounds(self) -> list[BoundsType]:
-        return [theta.bounds for theta in self.thetas]
+        params = self.parameters.thetas
+        return [params[theta.name].bounds for theta in self.thetas]
 
     def with_theta(
         self,
@@ -333,19 +665,24 @@ class ModuleDescriptor(CodeGen):
         theta_bounds: dict[str, BoundsType] | BoundsType | None = None,
         theta_fixed: dict[str, bool] | bool | None = None,
     ) -> Self:
-        self_ = self.copy()
+        params = self.parameters
+        updates: dict[str, ThetaParameter] = {}
         # Update thetas
-        for i, theta in enumerate(self_.thetas):
+        for i, theta in enumerate(self.thetas):
+            param = params.thetas[theta.name]
+            init_value: ValueType = param.init_value
+            bounds: BoundsType | None = param.bounds
+            fixed = param.fixed
             match theta_inits:
                 case None:
                     pass
                 case dict():
                     if theta.name in theta_inits:
-                        theta.init_value = theta_inits[theta.name]
+                        init_value = theta_inits[theta.name]
                 case float() | int():
-                    theta.init_value = theta_inits
+                    init_value = theta_inits
                 case list() | tuple() | np.ndarray():
-                    theta.init_value = theta_inits[i]
+                    init_value = theta_inits[i]
                 case _:
                     raise TypeError(
                         f"`theta_inits` should be a dict, float, or None. {type(theta_inits)} is not supported."
@@ -355,9 +692,9 @@ class ModuleDescriptor(CodeGen):
                     pass
                 case dict():
                     if theta.name in theta_bounds:
-                        theta.bounds = theta_bounds[theta.name]
+                        bounds = theta_bounds[theta.name]
                 case tuple():
-                    theta.bounds = theta_bounds
+                    bounds = theta_bounds
                 case _:
                     raise TypeError(
                         f"`theta_bounds` should be a dict, tuple, or None. {type(theta_bounds)} is not supported."
@@ -367,28 +704,29 @@ class ModuleDescriptor(CodeGen):
                     pass
                 case dict():
                     if theta.name in theta_fixed.keys():
-                        theta._fixed = theta_fixed[theta.name]
+                        fixed = theta_fixed[theta.name]
                 case bool():
-                    theta._fixed = theta_fixed
+                    fixed = theta_fixed
                 case _:
                     raise TypeError(
                         f"`theta_fixed` should be a list, bool, or None. {type(theta_fixed)} is not supported."
                     )
-        return self_
+            updates[theta.name] = ThetaParameter.of(
+                init_value=init_value, bounds=bounds, fixed=fixed
+            )
+        return self._with_parameters(params.with_thetas(updates))
 
     def eta_inits(self) -> npt.NDArray[np.float64]:
-        visited_ids: set[int] = set()
         init_values: npt.NDArray[np.float64] = np.empty([0, 0], dtype=np.float64)
 
-        for _eta in self.etas:
-            if id(_eta.omega) not in visited_ids:
-                visited_ids.add(id(_eta.omega))
-                init_values = block_diagonal(
-                    left=init_values,
-                    right=_eta.omega.values,
-                    fill=np.nan,
-                    dtype=np.float64,
-                )
+        params = self.parameters.omegas
+        for omega_ in self._blocks(self.etas):
+            init_values = block_diagonal(
+                left=init_values,
+                right=params[tuple(omega_.names)].values,
+                fill=np.nan,
+                dtype=np.float64,
+            )
 
         return init_values
 
@@ -397,32 +735,31 @@ class ModuleDescriptor(CodeGen):
 
     @property
     def omegas(self) -> list[Omega]:
-        omegas: list[Omega] = []
-        visited_ids: set[int] = set()
-        for _eta in self.etas:
-            if id(_eta.omega) not in visited_ids:
-                visited_ids.add(id(_eta.omega))
-                omegas.append(_eta.omega)
-        return omegas
+        """list[Omega]: Read-only Omega blocks holding the current initial
+        estimates, updated with `with_omega`."""
+        return [
+            omega_ for omega_ in self._blocks(self.etas) if isinstance(omega_, Omega)
+        ]
 
     def with_omega(
         self,
         omega_inits: dict[str, ValueType] | ValueType | None = None,  # diagonal only
         omega_fixed: dict[str, bool] | bool | None | None = None,
     ) -> Self:
-        self_ = self.copy()
-        omegas_ = self_.omegas
-        for omega_ in omegas_:
-            etas_in_omega_ = omega_.els
+        params = self.parameters
+        updates: dict[tuple[str, ...], BlockParameter] = {}
+        for omega_ in self._blocks(self.etas):
+            names = tuple(omega_.names)
+            values = params.omegas[names].values.copy()
             is_omega_fixed: bool | None = None
-            for eta_i in etas_in_omega_:
+            for i, eta_i in enumerate(omega_.els):
                 if omega_inits is not None:
                     if isinstance(omega_inits, dict):
                         init_value = omega_inits.get(eta_i.name, None)
                     else:
                         init_value = omega_inits
                     if init_value is not None:
-                        eta_i.omega[eta_i, eta_i] = init_value
+                        values[i, i] = init_value
                 if isinstance(omega_fixed, dict):
                     this_omega_fixed = omega_fixed.get(eta_i.name, None)
                     if this_omega_fixed is not None:
@@ -432,26 +769,26 @@ class ModuleDescriptor(CodeGen):
                             if is_omega_fixed != this_omega_fixed:
                                 raise ValueError("Etas must be fixed within same omega")
 
+            fixed = params.omegas[names].fixed
             if is_omega_fixed is not None:
-                omega_.fixed = is_omega_fixed
+                fixed = is_omega_fixed
             elif isinstance(omega_fixed, bool):
-                omega_.fixed = omega_fixed
+                fixed = omega_fixed
+            updates[names] = BlockParameter(values=values, fixed=fixed)
 
-        return self_
+        return self._with_parameters(params.with_omegas(updates))
 
     def eps_inits(self) -> npt.NDArray[np.float64]:
-        visited_ids: set[int] = set()
         init_values: npt.NDArray[np.float64] = np.empty([0, 0], dtype=np.float64)
 
-        for _eta in self.epsilons:
-            if id(_eta.sigma) not in visited_ids:
-                visited_ids.add(id(_eta.sigma))
-                init_values = block_diagonal(
-                    left=init_values,
-                    right=_eta.sigma.values,
-                    fill=np.nan,
-                    dtype=np.float64,
-                )
+        params = self.parameters.sigmas
+        for sigma_ in self._blocks(self.epsilons):
+            init_values = block_diagonal(
+                left=init_values,
+                right=params[tuple(sigma_.names)].values,
+                fill=np.nan,
+                dtype=np.float64,
+            )
 
         return init_values
 
@@ -460,32 +797,33 @@ class ModuleDescriptor(CodeGen):
 
     @property
     def sigmas(self) -> list[Sigma]:
-        sigmas: list[Sigma] = []
-        visited_ids: set[int] = set()
-        for _eps in self.epsilons:
-            if id(_eps.sigma) not in visited_ids:
-                visited_ids.add(id(_eps.sigma))
-                sigmas.append(_eps.sigma)
-        return sigmas
+        """list[Sigma]: Read-only Sigma blocks holding the current initial
+        estimates, updated with `with_sigma`."""
+        return [
+            sigma_
+            for sigma_ in self._blocks(self.epsilons)
+            if isinstance(sigma_, Sigma)
+        ]
 
     def with_sigma(
         self,
         sigma_inits: dict[str, ValueType] | ValueType | None = None,  # diagonal only
         sigma_fixed: dict[str, bool] | bool | None | None = None,
     ) -> Self:
-        self_ = self.copy()
-        sigmas_ = self_.sigmas
-        for sigma_ in sigmas_:
-            epsilons_in_sigma_ = sigma_.els
+        params = self.parameters
+        updates: dict[tuple[str, ...], BlockParameter] = {}
+        for sigma_ in self._blocks(self.epsilons):
+            names = tuple(sigma_.names)
+            values = params.sigmas[names].values.copy()
             is_sigma_fixed: bool | None = None
-            for epsilon_i in epsilons_in_sigma_:
+            for i, epsilon_i in enumerate(sigma_.els):
                 if sigma_inits is not None:
                     if isinstance(sigma_inits, dict):
                         init_value = sigma_inits.get(epsilon_i.name, None)
                     else:
                         init_value = sigma_inits
                     if init_value is not None:
-                        epsilon_i.sigma[epsilon_i, epsilon_i] = init_value
+                        values[i, i] = init_value
                 if isinstance(sigma_fixed, dict):
                     this_sigma_fixed = sigma_fixed.get(epsilon_i.name, None)
                     if this_sigma_fixed is not None:
@@ -496,11 +834,14 @@ class ModuleDescriptor(CodeGen):
                                 raise ValueError(
                                     "Epsilons must be fixed within same sigma"
                                 )
+            fixed = params.sigmas[names].fixed
             if is_sigma_fixed is not None:
-                sigma_.fixed = is_sigma_fixed
+                fixed = is_sigma_fixed
             elif isinstance(sigma_fixed, bool):
-                sigma_.fixed = sigma_fixed
-        return self_
+                fixed = sigma_fixed
+            updates[names] = BlockParameter(values=values, fixed=fixed)
+
+        return self._with_parameters(params.with_sigmas(updates))
 
     @overload
     def add_covariate(
@@ -508,7 +849,7 @@ class ModuleDescriptor(CodeGen):
         *,
         covariate: AnyColVar,
         on: Theta,
-        data: pl.DataFrame,
+        data: CovariateStatisticsLike,
         relation: Literal["linear", "piecewise", "exp", "power"] = "linear",
         init: ValueType | None = None,
         bounds: BoundsType | None = None,
@@ -519,13 +860,13 @@ class ModuleDescriptor(CodeGen):
     def add_covariate(
         self,
         *relations: AnyCovariatesInclusion,
-        data: pl.DataFrame,
+        data: CovariateStatisticsLike,
     ) -> Self: ...
 
     def add_covariate(
         self,
         *relations: AnyCovariatesInclusion,
-        data: pl.DataFrame,
+        data: CovariateStatisticsLike,
         covariate: AnyColVar | None = None,
         on: Theta | None = None,
         relation: Literal["linear", "piecewise", "exp", "power"] = "linear",
@@ -575,14 +916,19 @@ class ModuleDescriptor(CodeGen):
             transformer
         )
         cls_def = cst.ensure_type(transformed.body[0], cst.ClassDef)
+        # Only the statements reading the modified thetas are differentiated again,
+        # the others are served from the memo of this descriptor
         return self.from_module(
-            interpret_cls_def(cls_def), src=unparse(cls_def).strip()
+            interpret_cls_def(cls_def),
+            src=unparse(cls_def).strip(),
+            memo=self._autodiff_memo,
+            options=self._autodiff_options,
         )
 
     @classmethod
-    def from_module(cls, mod: Module, src: str | None = None) -> Self:
+    def _inspect(cls, mod: Module, src: str | None = None) -> _ModuleInspection:
         """
-        Create a ModuleDescriptor from a Module instance.
+        Collect the class metadata and symbol table of a Module instance.
         """
         logger.debug(
             "[MTran::interpret] Start interpreting module: %s", mod.__class__.__name__
@@ -594,7 +940,9 @@ class ModuleDescriptor(CodeGen):
             src = src
         logger.debug("[MTran::interpret] Raw source code:\n %s", src.strip())
 
-        parsed_code_module = cst.parse_module(src.strip())
+        with profile_stage("parse") as record_output:
+            parsed_code_module = cst.parse_module(src.strip())
+            record_output(parsed_code_module)
         # Find ClassDef in the module source code
         part: cst.ClassDef | None = None
         for stmt in parsed_code_module.body:
@@ -686,8 +1034,6 @@ class ModuleDescriptor(CodeGen):
         #             raise ValueError(f"Duplicate `column` definition for '{col.col_name}'")
         #         visited_colnames.add(col.col_name)
 
-        globals = find_global_context(o=mod)
-
         if isinstance(mod, OdeModule):
             n_cmt = len(cmts)
             default_dose: int | None = None
@@ -768,23 +1114,289 @@ class ModuleDescriptor(CodeGen):
                 n_cmt = 0
                 class_type = Module.__name__
 
-        locals = {
-            "self": mod,
-            "__self__": mod,
-            "__class__": mod.__class__,
-            "prediction": prediction,
-            "likelihood": likelihood,
-        }
         # Check 1: No Private Variables
         visitor = NoPrivateVisitor(source_code=src)
-        cst.parse_module(src).visit(visitor)
+        with profile_stage("no_private", parsed_code_module) as record_output:
+            cst.parse_module(src).visit(visitor)
+            record_output(parsed_code_module)
+
+        return _ModuleInspection(
+            src=src,
+            pred_func_def=pred_func_def,
+            docstring=docstring,
+            class_type=class_type,
+            configuration=configuration,
+            thetas=thetas,
+            etas=etas,
+            epsilons=epsilons,
+            colvars=colvars,
+            cmts=cmts,
+            sharedvars=sharedvars,
+            n_cmt=n_cmt,
+            advan=advan,
+            trans=trans,
+            defdose_cmt=defdose_cmt,
+            defobs_cmt=defobs_cmt,
+        )
+
+    @classmethod
+    def _from_inspection(
+        cls,
+        mod: Module,
+        inspection: _ModuleInspection,
+        preprocessed_pred: SrcEncapsulation[cst.FunctionDef],
+        postprocessed_pred: SrcEncapsulation[cst.FunctionDef],
+        memo: AutoDiffMemo | None = None,
+        stage: AutoDiffStage | None = None,
+        options: AutoDiffOptions | None = None,
+    ) -> Self:
+        descriptor = cls(
+            class_name=mod.__class__.__name__,
+            class_type=inspection.class_type,
+            configuration=inspection.configuration,
+            preprocessed_pred=preprocessed_pred,
+            postprocessed_pred=postprocessed_pred,
+            thetas=inspection.thetas,
+            etas=inspection.etas,
+            epsilons=inspection.epsilons,
+            colvars=inspection.colvars,
+            # colvar_collections=colvar_collections,
+            cmts=inspection.cmts,
+            sharedvars=inspection.sharedvars,
+            n_cmt=inspection.n_cmt,
+            advan=inspection.advan,
+            trans=inspection.trans,
+            defdose_cmt=inspection.defdose_cmt,
+            defobs_cmt=inspection.defobs_cmt,
+            docstring=inspection.docstring,
+        )
+        descriptor._autodiff_memo = AutoDiffMemo() if memo is None else memo
+        descriptor._autodiff_stage = stage
+        descriptor._autodiff_options = options or AutoDiffOptions()
+        # The symbols of the descriptor are the attributes of `mod`, no need to
+        # interpret the generated class again
+        descriptor._mod = mod
+        return descriptor
+
+    @classmethod
+    def from_compiled(
+        cls,
+        mod: Module,
+        *,
+        preprocessed_pred: str,
+        postprocessed_pred: str,
+        src: str | None = None,
+        stage: AutoDiffStage | None = None,
+        options: AutoDiffOptions | None = None,
+    ) -> Self:
+        """
+        Create a ModuleDescriptor from a Module instance and already compiled pred
+        sources, without running the transforms again.
+
+        `options` are the options `postprocessed_pred` was differentiated with,
+        the defaults if not given.
+        """
+        inspection = cls._inspect(mod, src)
+        return cls._from_inspection(
+            mod,
+            inspection,
+            preprocessed_pred=SrcEncapsulation.from_src(preprocessed_pred),
+            postprocessed_pred=SrcEncapsulation.from_src(postprocessed_pred),
+            stage=stage,
+            options=options,
+        )
+
+    def to_dict(self) -> dict[str, Any]:
+        """
+        Serialize the descriptor to JSON compatible builtins.
+
+        Holds the symbol tables, the configuration, the advan/trans metadata and
+        the pred sources, see `from_dict`.
+        """
+        params = self.parameters
+        return {
+            "format": _FORMAT,
+            "schema": SCHEMA_VERSION,
+            "version": __version__,
+            "class_name": self.class_name,
+            "class_type": self.class_type,
+            "docstring": self.docstring,
+            "configuration": self.configuration,
+            "n_cmt": self.n_cmt,
+            "advan": self.advan,
+            "trans": self.trans,
+            "defdose_cmt": self.defdose_cmt,
+            "defobs_cmt": self.defobs_cmt,
+            "thetas": [
+                encode_theta(theta.name, params.thetas[theta.name])
+                for theta in self.thetas
+            ],
+            "etas": self.eta_names(),
+            "epsilons": self.eps_names(),
+            "omegas": [
+                encode_block(names, params.omegas[names])
+                for names in self._block_names(self.etas)
+            ],
+            "sigmas": [
+                encode_block(names, params.sigmas[names])
+                for names in self._block_names(self.epsilons)
+            ],
+            "colvars": [encode_colvar(colvar) for colvar in self.colvars],
+            "cmts": [encode_cmt(cmt) for cmt in self.cmts],
+            "sharedvars": [encode_sharedvar(v) for v in self.sharedvars],
+            "preprocessed_pred": self.preprocessed_pred.src,
+            "postprocessed_pred": self.postprocessed_pred.src,
+            "autodiff_stage": (
+                None if self._autodiff_stage is None else self._autodiff_stage.to_dict()
+            ),
+            "autodiff_options": self._autodiff_options.to_dict(),
+        }
+
+    @classmethod
+    def from_dict(cls, content: dict[str, Any]) -> Self:
+        """
+        Create a ModuleDescriptor from the output of `to_dict`.
+
+        Neither autodiff nor the interpretation of the module run, the pred sources
+        are parsed and the module is interpreted on first access.
+        """
+        if content.get("format") != _FORMAT:
+            raise ValueError("Not a serialized ModuleDescriptor")
+        if content.get("schema") != SCHEMA_VERSION:
+            raise ValueError(
+                f"Unsupported ModuleDescriptor schema {content.get('schema')}, "
+                f"expected {SCHEMA_VERSION}"
+            )
+
+        thetas: list[Theta] = []
+        theta_params: dict[str, ThetaParameter] = {}
+        for theta_content in content["thetas"]:
+            theta, theta_param = decode_theta(theta_content)
+            thetas.append(theta)
+            theta_params[theta.name] = theta_param
+        etas, omega_params = decode_blocks(content["omegas"], Omega)
+        epsilons, sigma_params = decode_blocks(content["sigmas"], Sigma)
+
+        descriptor = cls(
+            class_name=content["class_name"],
+            class_type=content["class_type"],
+            docstring=content["docstring"],
+            configuration=content["configuration"],
+            thetas=thetas,
+            etas=[etas[name] for name in content["etas"]],  # type: ignore[misc]
+            epsilons=[epsilons[name] for name in content["epsilons"]],  # type: ignore[misc]
+            colvars=[decode_colvar(v) for v in content["colvars"]],
+            cmts=[decode_cmt(v) for v in content["cmts"]],
+            sharedvars=[decode_sharedvar(v) for v in content["sharedvars"]],
+            n_cmt=content["n_cmt"],
+            advan=content["advan"],
+            trans=content["trans"],
+            defdose_cmt=content["defdose_cmt"],
+            defobs_cmt=content["defobs_cmt"],
+            preprocessed_pred=SrcEncapsulation.from_src(content["preprocessed_pred"]),
+            postprocessed_pred=SrcEncapsulation.from_src(content["postprocessed_pred"]),
+        )
+        descriptor._params = ParameterTable(
+            thetas=theta_params, omegas=omega_params, sigmas=sigma_params
+        )
+        descriptor._autodiff_memo = AutoDiffMemo()
+        descriptor._autodiff_options = AutoDiffOptions.from_dict(
+            content.get("autodiff_options", {})
+        )
+        if content["autodiff_stage"] is not None:
+            descriptor._autodiff_stage = AutoDiffStage.from_dict(
+                content["autodiff_stage"]
+            )
+        return descriptor
+
+    def to_bytes(self) -> bytes:
+        """Serialize the descriptor to UTF-8 encoded JSON, see `to_dict`."""
+        return json.dumps(self.to_dict(), separators=(",", ":")).encode("utf-8")
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> Self:
+        """Create a ModuleDescriptor from the output of `to_bytes`."""
+        try:
+            content = json.loads(data.decode("utf-8"))
+        except (UnicodeDecodeError, json.JSONDecodeError) as e:
+            raise ValueError("Not a serialized ModuleDescriptor") from e
+        if not isinstance(content, dict):
+            raise ValueError("Not a serialized ModuleDescriptor")
+        return cls.from_dict(content)
+
+    @classmethod
+    def from_module(
+        cls,
+        mod: Module,
+        src: str | None = None,
+        *,
+        cache: CompileCache | None = None,
+        memo: AutoDiffMemo | None = None,
+        options: AutoDiffOptions | None = None,
+    ) -> Self:
+        """
+        Create a ModuleDescriptor from a Module instance.
+
+        Parameters
+        ----------
+        mod : Module
+            The module instance to interpret.
+        src : str | None
+            Source code of the module class. Inspected from `mod` if not given.
+        cache : CompileCache | None
+            Opt-in on-disk compile cache. On hit, the inline transpile and autodiff
+            stages are skipped and the cached pred sources are reused.
+        memo : AutoDiffMemo | None
+            Derivatives of a previous compilation to reuse for unchanged
+            statements. A new memo is created if not given.
+        options : AutoDiffOptions | None
+            Options of the generated derivative code, e.g. global CSE. Kept by the
+            descriptor for `rediff` and `add_covariate`.
+        """
+        if options is None:
+            options = AutoDiffOptions()
+        inspection = cls._inspect(mod, src)
+        pred_func_def = inspection.pred_func_def
+
+        cache_key: str | None = None
+        if cache is not None:
+            cache_key = CompileCache.key(
+                class_src=inspection.src,
+                pred_src=pred_func_def.src,
+                symbols=[
+                    (type(symbol).__name__, symbol.name)
+                    for symbol in inspection.symbols
+                ],
+                configuration=inspection.configuration,
+                # The generated code does not depend on the number of workers
+                options={**options.to_dict(), "workers": 1},
+            )
+            entry = cache.get(cache_key)
+            if entry is not None:
+                return cls._from_inspection(
+                    mod,
+                    inspection,
+                    preprocessed_pred=SrcEncapsulation.from_src(
+                        entry.preprocessed_pred
+                    ),
+                    postprocessed_pred=SrcEncapsulation.from_src(
+                        entry.postprocessed_pred
+                    ),
+                    stage=entry.stage,
+                    options=options,
+                )
+
+        globals = find_global_context(o=mod)
+        locals = pred_locals(mod)
 
         # region: Preprocess pred function
         logger.debug("[MTran::distill] Preprocess transforms")
         # Transform 1: Fix super()
         logger.debug("[MTran::distill] super() call fixer@preprocess")
         fixer = SuperCallFixer()
-        preprocessed_pred_func_def = pred_func_def.apply_transform(fixer)
+        with profile_stage("super_call_fixer", pred_func_def.cst) as record_output:
+            preprocessed_pred_func_def = pred_func_def.apply_transform(fixer)
+            record_output(preprocessed_pred_func_def.cst)
 
         # Transform 2: Inline Function Transpile
         logger.debug("[MTran::distill] Inline function transpile@preprocess")
@@ -794,41 +1406,30 @@ class ModuleDescriptor(CodeGen):
             locals=locals,
             globals=globals,
         )
-        preprocessed_pred_func_def = preprocessed_pred_func_def.apply_transform(
-            transpiler
-        )
+        with profile_stage(
+            "inline_preprocess", preprocessed_pred_func_def.cst
+        ) as record_output:
+            preprocessed_pred_func_def = preprocessed_pred_func_def.apply_transform(
+                transpiler
+            )
+            record_output(preprocessed_pred_func_def.cst)
         logger.debug(
             "[MTran::distill] Preprocessed finished\n%s",
             preprocessed_pred_func_def.src,
         )
         # endregion
 
-        # TODO: should save CST here before autodiff
-
         # region: Postprocess pred function
         # Transform 1: Inline Function Transpile for finalization
-        logger.debug("[MTran::distill] Inline function transpile@postprocess")
-        transpiler = InlineFunctionTranspiler(
-            stage="postprocess",
-            source_code=preprocessed_pred_func_def.src,
-            locals=locals,
-            globals=globals,
-        )
-        postprocessed_pred_func_def = preprocessed_pred_func_def.apply_transform(
-            transpiler
+        stage = AutoDiffStage.from_preprocessed(
+            preprocessed_pred_func_def, mod, globals=globals
         )
 
         # Transform 2: Automatic Gradient
-        logger.debug("[MTran::distill] Automatic differentiation@postprocess")
-        autodiff_transformer = AutoDiffTransformer(
-            source_code=postprocessed_pred_func_def.src,
-            locals=locals,
-            globals=globals,
-            symbol_defs=SymbolNamespace([*thetas, *etas, *epsilons, *cmts, *colvars]),
-            module_cls=mod.__class__,
-        )
-        postprocessed_pred_func_def = postprocessed_pred_func_def.apply_transform(
-            autodiff_transformer
+        if memo is None:
+            memo = AutoDiffMemo()
+        postprocessed_pred_func_def = stage.differentiate(
+            mod, SymbolNamespace(inspection.symbols), memo=memo, options=options
         )
         logger.debug(
             "[MTran::distill] Postprocess finished\n%s",
@@ -836,23 +1437,22 @@ class ModuleDescriptor(CodeGen):
         )
         # endregion
 
-        return cls(
-            class_name=mod.__class__.__name__,
-            class_type=class_type,
-            configuration=configuration,
+        if cache is not None and cache_key is not None:
+            cache.put(
+                cache_key,
+                CompileCacheEntry(
+                    preprocessed_pred=preprocessed_pred_func_def.src,
+                    postprocessed_pred=postprocessed_pred_func_def.src,
+                    stage=stage,
+                ),
+            )
+
+        return cls._from_inspection(
+            mod,
+            inspection,
             preprocessed_pred=preprocessed_pred_func_def,
             postprocessed_pred=postprocessed_pred_func_def,
-            thetas=thetas,
-            etas=etas,
-            epsilons=epsilons,
-            colvars=colvars,
-            # colvar_collections=colvar_collections,
-            cmts=cmts,
-            sharedvars=sharedvars,
-            n_cmt=n_cmt,
-            advan=advan,
-            trans=trans,
-            defdose_cmt=defdose_cmt,
-            defobs_cmt=defobs_cmt,
-            docstring=docstring,
+            memo=memo,
+            stage=stage,
+            options=options,
         )
@@ -12,10 +12,16 @@ def interpret_cls_def(cls_def: cst.ClassDef) -> Module:
     """
     class_name = cls_def.name.value
     apis = importlib.import_module("mas.libs.masmod.modeling.api")
-    globals_ = {**vars(apis)}
+    # Attributes of the api are loaded lazily, resolve them all explicitly
+    globals_ = {
+        "__name__": apis.__name__,
+        **{name: getattr(apis, name) for name in apis.__all__},
+    }
     locals_ = {}
     exec(unparse(cls_def).strip(), globals_, locals_)
     module = locals_[class_name]()
     if not isinstance(module, Module):
         raise TypeError(f"Expected a Module instance, got {type(module)}")
+    # The class is defined by `exec`, its globals can not be found from call stacks
+    setattr(module, "_m__globals__", globals_)
     return module
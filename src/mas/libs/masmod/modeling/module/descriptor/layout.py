@@ -0,0 +1,281 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING
+
+import numpy as np
+import numpy.typing as npt
+
+if TYPE_CHECKING:
+    from mas.libs.masmod.modeling.module.descriptor.descriptor import (
+        ModuleDescriptor,
+    )
+
+__all__ = ["DerivativeLayout"]
+
+
+def _pair_index(i: int, j: int) -> int:
+    """Index of the pair of etas `i`, `j` in the lower triangle, row by row."""
+    if i < j:
+        i, j = j, i
+    return i * (i + 1) // 2 + j
+
+
+@dataclass(frozen=True)
+class DerivativeLayout:
+    """Offsets of the derivatives in the flat buffers of the compiled pred function.
+
+    `Y` holds Y, ∂Y/∂η, ∂Y/∂ε, ∂²Y/∂η∂ε, the lower triangle of ∂²Y/∂η∂η, then
+    ∂Y/∂θ and ∂²Y/∂θ∂η if theta gradients are generated. The `dAdt` of the
+    compartments are followed by their ∂/∂η and the lower triangle of ∂²/∂η∂η,
+    compartment by compartment. The solutions of the closed form modules hold
+    the value, ∂/∂η and the lower triangle of ∂²/∂η∂η.
+
+    The indices are looked up by the name of the symbols in O(1), the index
+    arrays, e.g. `y_eta_eta`, gather the blocks of a `Y` buffer with NumPy.
+
+    Attributes
+    ----------
+    thetas, etas, epsilons, cmts : tuple[str, ...]
+        Names of the symbols, in the order of the descriptor.
+    theta_gradients : bool
+        Whether `Y` holds the theta gradients, see `AutoDiffOptions`.
+    """
+
+    thetas: tuple[str, ...]
+    etas: tuple[str, ...]
+    epsilons: tuple[str, ...]
+    cmts: tuple[str, ...]
+    theta_gradients: bool = False
+
+    theta_index: dict[str, int] = field(init=False, repr=False, compare=False)
+    eta_index: dict[str, int] = field(init=False, repr=False, compare=False)
+    eps_index: dict[str, int] = field(init=False, repr=False, compare=False)
+    cmt_index: dict[str, int] = field(init=False, repr=False, compare=False)
+    _y_first: dict[str, int] = field(init=False, repr=False, compare=False)
+    _y_second: dict[tuple[str, str], int] = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        def index(names: tuple[str, ...]) -> dict[str, int]:
+            return {name: i for i, name in enumerate(names)}
+
+        set_ = object.__setattr__
+        set_(self, "theta_index", index(self.thetas))
+        set_(self, "eta_index", index(self.etas))
+        set_(self, "eps_index", index(self.epsilons))
+        set_(self, "cmt_index", index(self.cmts))
+
+        y_eta, y_eps = self.y_eta.tolist(), self.y_eps.tolist()
+        y_first = {**dict(zip(self.etas, y_eta)), **dict(zip(self.epsilons, y_eps))}
+        y_second: dict[tuple[str, str], int] = {}
+        for eta, row in zip(self.etas, self.y_eta_eps.tolist()):
+            y_second.update(((eta, eps), i) for eps, i in zip(self.epsilons, row))
+        for eta, row in zip(self.etas, self.y_eta_eta.tolist()):
+            y_second.update(((eta, eta2), i) for eta2, i in zip(self.etas, row))
+        if self.theta_gradients:
+            y_first.update(zip(self.thetas, self.y_theta.tolist()))
+            for theta, row in zip(self.thetas, self.y_theta_eta.tolist()):
+                y_second.update(((theta, eta), i) for eta, i in zip(self.etas, row))
+        set_(self, "_y_first", y_first)
+        set_(self, "_y_second", y_second)
+
+    @classmethod
+    def of(cls, descriptor: ModuleDescriptor) -> DerivativeLayout:
+        """Layout of the buffers of a descriptor."""
+        return cls(
+            thetas=tuple(theta.name for theta in descriptor.thetas),
+            etas=tuple(eta.name for eta in descriptor.etas),
+            epsilons=tuple(eps.name for eps in descriptor.epsilons),
+            cmts=tuple(cmt.name for cmt in descriptor.cmts),
+            theta_gradients=descriptor.autodiff_options.theta_gradients,
+        )
+
+    # region Y
+
+    @property
+    def _n_eta_eps(self) -> int:
+        # End of the eta and eps derivatives
+        n_eta, n_eps = len(self.etas), len(self.epsilons)
+        return 1 + n_eta + n_eps + n_eta * n_eps + n_eta * (n_eta + 1) // 2
+
+    @property
+    def y_size(self) -> int:
+        """int: Length of `Y`."""
+        if not self.theta_gradients:
+            return self._n_eta_eps
+        return self._n_eta_eps + len(self.thetas) * (1 + len(self.etas))
+
+    @property
+    def y_eta(self) -> npt.NDArray[np.intp]:
+        """NDArray: Indices of ∂Y/∂η, by eta."""
+        return np.arange(1, 1 + len(self.etas), dtype=np.intp)
+
+    @property
+    def y_eps(self) -> npt.NDArray[np.intp]:
+        """NDArray: Indices of ∂Y/∂ε, by eps."""
+        start = 1 + len(self.etas)
+        return np.arange(start, start + len(self.epsilons), dtype=np.intp)
+
+    @property
+    def y_eta_eps(self) -> npt.NDArray[np.intp]:
+        """NDArray: Indices of ∂²Y/∂η∂ε, by eta and eps."""
+        n_eta, n_eps = len(self.etas), len(self.epsilons)
+        start = 1 + n_eta + n_eps
+        return np.arange(start, start + n_eta * n_eps, dtype=np.intp).reshape(
+            n_eta, n_eps
+        )
+
+    @property
+    def y_eta_eta(self) -> npt.NDArray[np.intp]:
+        """NDArray: Indices of ∂²Y/∂η∂η, by eta and eta, symmetric."""
+        n_eta, n_eps = len(self.etas), len(self.epsilons)
+        i, j = np.indices((n_eta, n_eta), dtype=np.intp)
+        lower, upper = np.maximum(i, j), np.minimum(i, j)
+        return 1 + n_eta + n_eps + n_eta * n_eps + lower * (lower + 1) // 2 + upper
+
+    @property
+    def y_theta(self) -> npt.NDArray[np.intp]:
+        """NDArray: Indices of ∂Y/∂θ, by theta, empty without theta gradients."""
+        if not self.theta_gradients:
+            return np.empty(0, dtype=np.intp)
+        start = self._n_eta_eps
+        return np.arange(start, start + len(self.thetas), dtype=np.intp)
+
+    @property
+    def y_theta_eta(self) -> npt.NDArray[np.intp]:
+        """NDArray: Indices of ∂²Y/∂θ∂η, by theta and eta, empty without theta
+        gradients."""
+        n_eta = len(self.etas)
+        if not self.theta_gradients:
+            return np.empty((0, n_eta), dtype=np.intp)
+        n_theta = len(self.thetas)
+        start = self._n_eta_eps + n_theta
+        return np.arange(start, start + n_theta * n_eta, dtype=np.intp).reshape(
+            n_theta, n_eta
+        )
+
+    def y_index(self, wrt: str, wrt2nd: str | None = None) -> int | None:
+        """
+        Index of a derivative of the prediction in `Y`.
+
+        None for a first order derivative `Y` does not hold, e.g. w.r.t. a column.
+
+        Raises
+        ------
+        IndexError
+            If `Y` does not hold the second order derivative.
+        """
+        if wrt2nd is None:
+            return self._y_first.get(wrt)
+        index = self._y_second.get((wrt, wrt2nd))
+        if index is None:
+            raise IndexError(
+                f"wrt {wrt}, wrt2nd {wrt2nd} is invalid second order partial derivative"
+            )
+        return index
+
+    def y_blocks(
+        self, y: npt.NDArray[np.float64]
+    ) -> dict[str, npt.NDArray[np.float64]]:
+        """
+        Blocks of a `Y` buffer, or of a stack of them along the last axis.
+
+        The blocks are "value", "eta", "eps", "eta_eps", "eta_eta", "theta" and
+        "theta_eta", shaped as the index arrays of the same names. They are views
+        of `y` except for "eta_eta", gathered from the lower triangle.
+        """
+        y = np.asarray(y)
+        if y.shape[-1] != self.y_size:
+            raise ValueError(f"Expected a Y buffer of {self.y_size}, got {y.shape[-1]}")
+        batch = y.shape[:-1]
+
+        def block(index: npt.NDArray[np.intp]) -> npt.NDArray[np.float64]:
+            if index.size == 0:
+                return y[..., :0].reshape(*batch, *index.shape)
+            start = int(index.flat[0])
+            return y[..., start : start + index.size].reshape(*batch, *index.shape)
+
+        return {
+            "value": y[..., 0:1].reshape(batch),
+            "eta": block(self.y_eta),
+            "eps": block(self.y_eps),
+            "eta_eps": block(self.y_eta_eps),
+            "eta_eta": y[..., self.y_eta_eta],
+            "theta": block(self.y_theta),
+            "theta_eta": block(self.y_theta_eta),
+        }
+
+    # endregion
+
+    # region dAdt and solutions
+
+    @property
+    def dadt_eta(self) -> npt.NDArray[np.intp]:
+        """NDArray: Indices of ∂dAdt/∂η in `dAdt`, by eta and compartment."""
+        n_cmt, n_eta = len(self.cmts), len(self.etas)
+        return np.arange(n_cmt, n_cmt + n_eta * n_cmt, dtype=np.intp).reshape(
+            n_eta, n_cmt
+        )
+
+    @property
+    def dadt_eta_eta(self) -> npt.NDArray[np.intp]:
+        """NDArray: Indices of ∂²dAdt/∂η∂η in `dAdt`, by eta, eta and
+        compartment, symmetric in the etas."""
+        n_cmt, n_eta = len(self.cmts), len(self.etas)
+        i, j, c = np.indices((n_eta, n_eta, n_cmt), dtype=np.intp)
+        lower, upper = np.maximum(i, j), np.minimum(i, j)
+        pair = lower * (lower + 1) // 2 + upper
+        return n_cmt + n_cmt * n_eta + pair * n_cmt + c
+
+    def eta_pair_index(self, eta: str, eta2: str) -> int:
+        """Index of a pair of etas in the lower triangle of ∂²/∂η∂η."""
+        return _pair_index(self.eta_index[eta], self.eta_index[eta2])
+
+    def dadt_index(
+        self, cmt: str, wrt: str | None = None, wrt2nd: str | None = None
+    ) -> int | None:
+        """
+        Index of the `dAdt` of a compartment or of its derivative in `dAdt`.
+
+        None if `dAdt` does not hold the derivative, e.g. w.r.t. a theta.
+        """
+        n_cmt = len(self.cmts)
+        cmt_index = self.cmt_index[cmt]
+        if wrt is None:
+            return cmt_index
+        eta_index = self.eta_index.get(wrt)
+        if eta_index is None:
+            return None
+        if wrt2nd is None:
+            return n_cmt + eta_index * n_cmt + cmt_index
+        eta2_index = self.eta_index.get(wrt2nd)
+        if eta2_index is None:
+            return None
+        pair_index = _pair_index(eta_index, eta2_index)
+        return n_cmt + n_cmt * len(self.etas) + pair_index * n_cmt + cmt_index
+
+    def da_index(self, cmt: str, cmt2: str) -> int:
+        """Index of ∂dAdt/∂A of a pair of compartments in `dA`."""
+        return self.cmt_index[cmt] * len(self.cmts) + self.cmt_index[cmt2]
+
+    def solution_index(
+        self, wrt: str | None = None, wrt2nd: str | None = None
+    ) -> int | None:
+        """
+        Index of a derivative of a closed form solution.
+
+        None if the solution does not hold the derivative, e.g. w.r.t. a theta.
+        """
+        if wrt is None:
+            return 0 if wrt2nd is None else None
+        eta_index = self.eta_index.get(wrt)
+        if eta_index is None:
+            return None
+        if wrt2nd is None:
+            return 1 + eta_index
+        eta2_index = self.eta_index.get(wrt2nd)
+        if eta2_index is None:
+            return None
+        return 1 + len(self.etas) + _pair_index(eta_index, eta2_index)
+
+    # endregion
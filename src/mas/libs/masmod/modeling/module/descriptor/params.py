@@ -0,0 +1,133 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, field, replace
+from typing import Iterable, Mapping
+
+import numpy as np
+import numpy.typing as npt
+
+from mas.libs.masmod.modeling.symbols._block import SymbolBlock
+from mas.libs.masmod.modeling.symbols._theta import Theta, normalize_bounds
+from mas.libs.masmod.modeling.typings import BoundsType, ValueType
+
+__all__ = ["BlockParameter", "ParameterTable", "ThetaParameter"]
+
+
+@dataclass(frozen=True)
+class ThetaParameter:
+    """Initial estimate, bounds and fixed flag of a theta."""
+
+    init_value: float
+    bounds: tuple[float | None, float | None] = (None, None)
+    fixed: bool = False
+
+    @classmethod
+    def of(
+        cls,
+        init_value: ValueType,
+        bounds: BoundsType | None = None,
+        fixed: bool = False,
+    ) -> ThetaParameter:
+        return cls(
+            init_value=float(init_value),
+            bounds=normalize_bounds(bounds),
+            fixed=bool(fixed),
+        )
+
+
+@dataclass(frozen=True)
+class BlockParameter:
+    """Initial estimates and fixed flag of an omega or sigma block."""
+
+    values: npt.NDArray[np.float64]
+    fixed: bool = False
+
+    def __post_init__(self):
+        values = np.array(self.values, dtype=np.float64)
+        values.setflags(write=False)
+        object.__setattr__(self, "values", values)
+
+
+@dataclass(frozen=True)
+class ParameterTable:
+    """Initial estimates of a module, keyed by symbol names.
+
+    Blocks are keyed by the names of their elements. The table is never mutated,
+    updates return a new table sharing the unchanged entries, so descriptors can
+    share the table with their copies until parameters are updated.
+    """
+
+    thetas: Mapping[str, ThetaParameter] = field(default_factory=dict)
+    omegas: Mapping[tuple[str, ...], BlockParameter] = field(default_factory=dict)
+    sigmas: Mapping[tuple[str, ...], BlockParameter] = field(default_factory=dict)
+
+    @classmethod
+    def from_symbols(
+        cls,
+        thetas: Iterable[Theta],
+        omegas: Iterable[SymbolBlock],
+        sigmas: Iterable[SymbolBlock],
+    ) -> ParameterTable:
+        """Collect the parameters held by symbols."""
+        return cls(
+            thetas={
+                theta.name: ThetaParameter(
+                    init_value=theta.init_value,
+                    bounds=theta.bounds,
+                    fixed=theta.fixed,
+                )
+                for theta in thetas
+            },
+            omegas={
+                tuple(omega.names): BlockParameter(
+                    values=omega.values, fixed=omega.fixed
+                )
+                for omega in omegas
+            },
+            sigmas={
+                tuple(sigma.names): BlockParameter(
+                    values=sigma.values, fixed=sigma.fixed
+                )
+                for sigma in sigmas
+            },
+        )
+
+    def for_symbols(
+        self,
+        thetas: Iterable[Theta],
+        omegas: Iterable[SymbolBlock],
+        sigmas: Iterable[SymbolBlock],
+    ) -> ParameterTable:
+        """Return the table with the entries of the given symbols.
+
+        Symbols new to the table are collected from the symbols, the entries of the
+        others are kept. The table itself is returned if the symbols did not change.
+        """
+        thetas = list(thetas)
+        omegas = list(omegas)
+        sigmas = list(sigmas)
+        if (
+            self.thetas.keys() == {theta.name for theta in thetas}
+            and self.omegas.keys() == {tuple(omega.names) for omega in omegas}
+            and self.sigmas.keys() == {tuple(sigma.names) for sigma in sigmas}
+        ):
+            return self
+        new = ParameterTable.from_symbols(thetas, omegas, sigmas)
+        return ParameterTable(
+            thetas={k: self.thetas.get(k, v) for k, v in new.thetas.items()},
+            omegas={k: self.omegas.get(k, v) for k, v in new.omegas.items()},
+            sigmas={k: self.sigmas.get(k, v) for k, v in new.sigmas.items()},
+        )
+
+    def with_thetas(self, updates: Mapping[str, ThetaParameter]) -> ParameterTable:
+        return replace(self, thetas={**self.thetas, **updates})
+
+    def with_omegas(
+        self, updates: Mapping[tuple[str, ...], BlockParameter]
+    ) -> ParameterTable:
+        return replace(self, omegas={**self.omegas, **updates})
+
+    def with_sigmas(
+        self, updates: Mapping[tuple[str, ...], BlockParameter]
+    ) -> ParameterTable:
+        return replace(self, sigmas={**self.sigmas, **updates})
@@ -0,0 +1,174 @@
+from __future__ import annotations
+
+from typing import Any
+from uuid import uuid4
+
+import numpy as np
+from sympy import Number
+
+from mas.libs.masmod.modeling.module.descriptor.params import (
+    BlockParameter,
+    ThetaParameter,
+)
+from mas.libs.masmod.modeling.symbols._cmt import Compartment
+from mas.libs.masmod.modeling.symbols._column import (
+    ColVar,
+    NumericCategoricalColVar,
+    NumericContinuousColVar,
+    StrCategoricalColVar,
+)
+from mas.libs.masmod.modeling.symbols._omega_eta import Eta, Omega
+from mas.libs.masmod.modeling.symbols._sharedvar import SharedVar
+from mas.libs.masmod.modeling.symbols._sigma_eps import Eps, Sigma
+from mas.libs.masmod.modeling.symbols._theta import Theta
+
+__all__ = [
+    "decode_blocks",
+    "decode_cmt",
+    "decode_colvar",
+    "decode_sharedvar",
+    "decode_theta",
+    "encode_block",
+    "encode_cmt",
+    "encode_colvar",
+    "encode_sharedvar",
+    "encode_theta",
+]
+
+# Version of the layout produced by `ModuleDescriptor.to_dict`
+SCHEMA_VERSION = 1
+
+_COLVAR_TYPES: dict[str, type[ColVar]] = {
+    t.__name__: t
+    for t in [NumericContinuousColVar, NumericCategoricalColVar, StrCategoricalColVar]
+}
+
+
+def _unnamed(kind: str) -> str:
+    # Symbols are interned by name, create them under a unique name and rename
+    # them afterwards as `Module` does, so they are never shared with other modules
+    return f"__unnamed_{kind}_{uuid4().hex}"
+
+
+def encode_theta(name: str, param: ThetaParameter) -> dict[str, Any]:
+    return {
+        "name": name,
+        "init_value": param.init_value,
+        "bounds": list(param.bounds),
+        "fixed": param.fixed,
+    }
+
+
+def decode_theta(content: dict[str, Any]) -> tuple[Theta, ThetaParameter]:
+    param = ThetaParameter.of(
+        init_value=content["init_value"],
+        bounds=tuple(content["bounds"]),
+        fixed=content["fixed"],
+    )
+    theta = Theta(
+        name=_unnamed("theta"),
+        init_value=param.init_value,
+        bounds=param.bounds,
+        fixed=param.fixed,
+    )
+    theta.name = content["name"]
+    return theta, param
+
+
+def encode_block(names: tuple[str, ...], param: BlockParameter) -> dict[str, Any]:
+    return {
+        "names": list(names),
+        "values": param.values.tolist(),
+        "fixed": param.fixed,
+    }
+
+
+def decode_blocks(
+    contents: list[dict[str, Any]], kind: type[Omega] | type[Sigma]
+) -> tuple[dict[str, Eta | Eps], dict[tuple[str, ...], BlockParameter]]:
+    """Rebuild omega or sigma blocks.
+
+    Returns
+    -------
+    tuple[dict[str, Eta | Eps], dict[tuple[str, ...], BlockParameter]]
+        Elements keyed by name, and the parameters of the blocks.
+    """
+    el_type = Eta if kind is Omega else Eps
+    els: dict[str, Eta | Eps] = {}
+    params: dict[tuple[str, ...], BlockParameter] = {}
+    for content in contents:
+        names = tuple(content["names"])
+        param = BlockParameter(
+            values=np.array(content["values"], dtype=np.float64),
+            fixed=content["fixed"],
+        )
+        block_els = [el_type(name=_unnamed(el_type.__name__.lower())) for _ in names]
+        block = kind(els=block_els, values=param.values.copy(), fixed=param.fixed)  # type: ignore[arg-type]
+        for name, el in zip(names, block_els):
+            if isinstance(el, Eta):
+                el.omega = block  # type: ignore[assignment]
+            else:
+                el.sigma = block  # type: ignore[assignment]
+            el.name = name
+            els[name] = el
+        params[names] = param
+    return els, params
+
+
+def encode_colvar(colvar: ColVar) -> dict[str, Any]:
+    return {
+        "name": colvar.name,
+        "col_name": colvar.col_name,
+        "type": type(colvar).__name__,
+    }
+
+
+def decode_colvar(content: dict[str, Any]) -> ColVar:
+    if content["type"] not in _COLVAR_TYPES:
+        raise ValueError(f"Unknown column type '{content['type']}'")
+    colvar = _COLVAR_TYPES[content["type"]](
+        name=_unnamed("colvar"), col_name=content["col_name"]
+    )
+    colvar.name = content["name"]
+    return colvar
+
+
+def _encode_constant(cmt: Compartment, attr: str, value: Any) -> float | None:
+    if value is None:
+        return None
+    if isinstance(value, int | float | Number):
+        return float(value)
+    raise TypeError(
+        f"Compartment '{cmt.name}' has a non-constant {attr} which cannot be serialized"
+    )
+
+
+def encode_cmt(cmt: Compartment) -> dict[str, Any]:
+    return {
+        "name": cmt.name,
+        "default_dose": cmt.default_dose,
+        "default_obs": cmt.default_obs,
+        "init_value": _encode_constant(cmt, "init_value", cmt.init_value._expr),
+        "alag": _encode_constant(cmt, "alag", cmt.alag._expr),
+        "fraction": _encode_constant(cmt, "fraction", cmt.fraction._expr),
+        "rate": _encode_constant(cmt, "rate", cmt.rate._expr),
+        "duration": _encode_constant(cmt, "duration", cmt.duration._expr),
+    }
+
+
+def decode_cmt(content: dict[str, Any]) -> Compartment:
+    content = {**content}
+    name = content.pop("name")
+    cmt = Compartment(name=_unnamed("cmt"), **content)
+    cmt.name = name
+    return cmt
+
+
+def encode_sharedvar(sharedvar: SharedVar) -> dict[str, Any]:
+    return {"name": sharedvar.name, "init_value": sharedvar.init_value}
+
+
+def decode_sharedvar(content: dict[str, Any]) -> SharedVar:
+    sharedvar = SharedVar(name=_unnamed("sharedvar"), init_value=content["init_value"])
+    sharedvar.name = content["name"]
+    return sharedvar
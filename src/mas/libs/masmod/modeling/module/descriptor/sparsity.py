@@ -0,0 +1,101 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Mapping
+
+import libcst as cst
+
+from mas.libs.masmod.modeling.syntax.unparse import unparse
+
+__all__ = ["DerivativeSparsity"]
+
+# Buffers the derivatives of locals and of the prediction are written to
+_X = "__X__"
+_Y = "__Y__"
+
+
+@dataclass(frozen=True)
+class DerivativeSparsity:
+    """Structurally nonzero derivatives emitted in the postprocessed pred function.
+
+    Derivatives not listed are never written since their variable can not depend
+    on the symbol, see `AutoDiffTransformer`.
+
+    Attributes
+    ----------
+    first_order : Mapping[str, tuple[str, ...]]
+        Names of the symbols each variable is differentiated w.r.t., keyed by the
+        name of the local, or `__Y__` for the prediction.
+    second_order : Mapping[str, tuple[tuple[str, str], ...]]
+        Pairs of symbol names of the second order derivatives of each variable.
+    """
+
+    first_order: Mapping[str, tuple[str, ...]]
+    second_order: Mapping[str, tuple[tuple[str, str], ...]]
+
+    @property
+    def nnz(self) -> int:
+        """int: Number of structurally nonzero derivatives."""
+        return sum(len(v) for v in self.first_order.values()) + sum(
+            len(v) for v in self.second_order.values()
+        )
+
+    def is_nonzero(self, name: str, wrt: str, wrt2nd: str | None = None) -> bool:
+        if wrt2nd is None:
+            return wrt in self.first_order.get(name, ())
+        return (wrt, wrt2nd) in self.second_order.get(name, ())
+
+    @classmethod
+    def of(cls, pred: cst.FunctionDef) -> DerivativeSparsity:
+        """Collect the derivatives written by a postprocessed pred function."""
+        visitor = _DerivativeTargetVisitor()
+        pred.visit(visitor)
+        return cls(
+            first_order={k: tuple(v) for k, v in visitor.first_order.items()},
+            second_order={k: tuple(v) for k, v in visitor.second_order.items()},
+        )
+
+
+def _symbol_name(node: cst.BaseExpression) -> str:
+    if isinstance(node, cst.Attribute) and isinstance(node.value, cst.Name):
+        return node.attr.value
+    return unparse(node)
+
+
+class _DerivativeTargetVisitor(cst.CSTVisitor):
+    def __init__(self) -> None:
+        super().__init__()
+        self.first_order: dict[str, list[str]] = {}
+        self.second_order: dict[str, list[tuple[str, str]]] = {}
+
+    def visit_AssignTarget(self, node: cst.AssignTarget) -> None:
+        target = node.target
+        if not isinstance(target, cst.Subscript) or not isinstance(
+            target.value, cst.Name
+        ):
+            return
+        elements = [
+            el.slice.value for el in target.slice if isinstance(el.slice, cst.Index)
+        ]
+        if target.value.value == _X and elements:
+            name = elements.pop(0)
+            if not isinstance(name, cst.SimpleString):
+                return
+            xname = str(name.evaluated_value)
+        elif target.value.value == _Y and not any(
+            isinstance(el, cst.SimpleString) for el in elements
+        ):
+            # Not `__Y__["type"]`
+            xname = _Y
+        else:
+            return
+
+        wrts = [_symbol_name(el) for el in elements]
+        if len(wrts) == 1:
+            first_order = self.first_order.setdefault(xname, [])
+            if wrts[0] not in first_order:
+                first_order.append(wrts[0])
+        elif len(wrts) == 2:
+            second_order = self.second_order.setdefault(xname, [])
+            if (wrts[0], wrts[1]) not in second_order:
+                second_order.append((wrts[0], wrts[1]))
@@ -0,0 +1,154 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Any
+
+import libcst as cst
+
+from mas.libs.masmod.modeling.module.defs.module import Module
+from mas.libs.masmod.modeling.module.descriptor.common import SrcEncapsulation
+from mas.libs.masmod.modeling.symbols._ns import SymbolNamespace
+from mas.libs.masmod.modeling.symbols._y import likelihood, prediction
+from mas.libs.masmod.modeling.syntax.transformers.autodiff import (
+    AutoDiffMemo,
+    AutoDiffOptions,
+    AutoDiffTransformer,
+)
+from mas.libs.masmod.modeling.syntax.transformers.constant_fold import (
+    ConstantFolder,
+)
+from mas.libs.masmod.modeling.syntax.transformers.dead_code import (
+    DeadCodeEliminator,
+)
+from mas.libs.masmod.modeling.syntax.transformers.inline.transpiler import (
+    InlineFunctionTranspiler,
+)
+from mas.libs.masmod.modeling.syntax.transformers.reverse import (
+    ReverseAutoDiffTransformer,
+)
+from mas.libs.masmod.modeling.utils.loggings import logger
+from mas.libs.masmod.modeling.utils.profiling import profile_stage
+
+__all__ = ["AutoDiffStage", "pred_locals"]
+
+
+def pred_locals(mod: Module) -> dict[str, Any]:
+    """Local names the pred function of `mod` is evaluated with."""
+    return {
+        "self": mod,
+        "__self__": mod,
+        "__class__": mod.__class__,
+        "prediction": prediction,
+        "likelihood": likelihood,
+    }
+
+
+@dataclass(frozen=True)
+class AutoDiffStage:
+    """The pred function at the boundary before automatic differentiation.
+
+    After postprocess inlining the pred function only refers to the module through
+    `self` and to the math functions known to sympy, so the stage holds plain
+    sources and the evaluation context is rebuilt from any module instance with
+    the same symbol names. This allows differentiating again against a new
+    symbol table without inspecting, fixing or inlining the source again.
+
+    Attributes
+    ----------
+    preprocessed_pred : str
+        Source code of the pred function after preprocess transforms.
+    pred : str
+        Source code of the pred function after postprocess inlining, i.e. the
+        input of `AutoDiffTransformer`.
+    """
+
+    preprocessed_pred: str
+    pred: str
+
+    @classmethod
+    def from_preprocessed(
+        cls,
+        preprocessed_pred: SrcEncapsulation[cst.FunctionDef],
+        mod: Module,
+        globals: dict[str, Any],
+    ) -> AutoDiffStage:
+        """Run the postprocess inline transpile on a preprocessed pred function."""
+        logger.debug("[MTran::distill] Inline function transpile@postprocess")
+        transpiler = InlineFunctionTranspiler(
+            stage="postprocess",
+            source_code=preprocessed_pred.src,
+            locals=pred_locals(mod),
+            globals=globals,
+        )
+        with profile_stage(
+            "inline_postprocess", preprocessed_pred.cst
+        ) as record_output:
+            pred = preprocessed_pred.apply_transform(transpiler)
+            record_output(pred.cst)
+        return cls(preprocessed_pred=preprocessed_pred.src, pred=pred.src)
+
+    def to_dict(self) -> dict[str, str]:
+        return {"preprocessed_pred": self.preprocessed_pred, "pred": self.pred}
+
+    @classmethod
+    def from_dict(cls, content: dict[str, str]) -> AutoDiffStage:
+        return cls(preprocessed_pred=content["preprocessed_pred"], pred=content["pred"])
+
+    def differentiate(
+        self,
+        mod: Module,
+        symbols: SymbolNamespace,
+        memo: AutoDiffMemo | None = None,
+        options: AutoDiffOptions | None = None,
+    ) -> SrcEncapsulation[cst.FunctionDef]:
+        """Run `AutoDiffTransformer` on the pred function.
+
+        `ReverseAutoDiffTransformer` is used instead in the reverse mode. The
+        literals of pred are folded first and the dead assignments are removed
+        afterwards, see `AutoDiffOptions.fold_constants` and
+        `AutoDiffOptions.eliminate_dead_code`.
+
+        Parameters
+        ----------
+        mod : Module
+            Module instance providing `self` of the pred function.
+        symbols : SymbolNamespace
+            Symbols to differentiate against.
+        memo : AutoDiffMemo | None
+            Derivatives of a previous run to reuse for unchanged statements.
+        options : AutoDiffOptions | None
+            Options of the generated derivative code, the defaults if not given.
+        """
+        if options is None:
+            options = AutoDiffOptions()
+        pred: SrcEncapsulation[cst.FunctionDef] = SrcEncapsulation.from_src(self.pred)
+        if options.fold_constants:
+            logger.debug("[MTran::distill] Constant folding@postprocess")
+            with profile_stage("constant_fold", pred.cst) as record_output:
+                pred = pred.apply_transform(ConstantFolder())
+                record_output(pred.cst)
+
+        logger.debug("[MTran::distill] Automatic differentiation@postprocess")
+        transformer_cls = AutoDiffTransformer
+        if options.mode == "reverse":
+            transformer_cls = ReverseAutoDiffTransformer
+        transformer = transformer_cls(
+            source_code=pred.src,
+            locals=pred_locals(mod),
+            globals={},
+            symbol_defs=symbols,
+            module_cls=mod.__class__,
+            memo=memo,
+            options=options,
+        )
+        with profile_stage("autodiff", pred.cst) as record_output:
+            postprocessed_pred = pred.apply_transform(transformer)
+            record_output(postprocessed_pred.cst)
+
+        if options.eliminate_dead_code:
+            logger.debug("[MTran::distill] Dead code elimination@postprocess")
+            eliminator = DeadCodeEliminator(export_locals=options.export_locals)
+            with profile_stage("dead_code", postprocessed_pred.cst) as record_output:
+                postprocessed_pred = postprocessed_pred.apply_transform(eliminator)
+                record_output(postprocessed_pred.cst)
+        return postprocessed_pred
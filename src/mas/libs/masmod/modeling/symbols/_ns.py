@@ -1,6 +1,7 @@
-from typing import Generator
+from typing import Generator, Iterable, Iterator
 
 from sympy import Basic, Symbol
+from typing_extensions import Self
 
 from mas.libs.masmod.modeling.symbols._cmt import Compartment
 from mas.libs.masmod.modeling.symbols._column import ColVar
@@ -8,62 +9,72 @@ from mas.libs.masmod.modeling.symbols._omega_eta import Eta
 from mas.libs.masmod.modeling.symbols._sigma_eps import Eps
 from mas.libs.masmod.modeling.symbols._theta import Theta
 
+SymbolDef = Theta | Eta | Eps | Compartment | ColVar
 
-class SymbolNamespace(list[Theta | Eta | Eps | Compartment | ColVar]):
-    def iter_theta(self) -> Generator[Theta, None, None]:
+
+class SymbolNamespace(tuple[SymbolDef, ...]):
+    """
+    Symbols defined by a module, in definition order.
+
+    The symbols are indexed by kind and by name when the namespace is created, so
+    the `iter_*` methods, `has_symbol` and `get_symbol` do not scan the symbols.
+    The namespace is immutable to keep the indices in sync.
+    """
+
+    _thetas: tuple[Theta, ...]
+    _etas: tuple[Eta, ...]
+    _epsilons: tuple[Eps, ...]
+    _cmts: tuple[Compartment, ...]
+    _colvars: tuple[ColVar, ...]
+    _symbols: frozenset[Symbol]
+    _by_name: dict[str, SymbolDef]
+
+    def __new__(cls, symbols: Iterable[SymbolDef] = ()) -> Self:
+        self = super().__new__(cls, symbols)
+        self._thetas = tuple(s for s in self if isinstance(s, Theta))
+        self._etas = tuple(s for s in self if isinstance(s, Eta))
+        self._epsilons = tuple(s for s in self if isinstance(s, Eps))
+        self._cmts = tuple(s for s in self if isinstance(s, Compartment))
+        self._colvars = tuple(s for s in self if isinstance(s, ColVar))
+        # Compartments are not symbols of the expressions, their amounts are
+        self._symbols = frozenset(
+            [*self._thetas, *self._etas, *self._epsilons, *self._colvars]
+        )
+        self._by_name = {s.name: s for s in self}
+        return self
+
+    def iter_theta(self) -> Iterator[Theta]:
         """Get all theta symbols in the definition."""
-        for s in self:
-            if isinstance(s, Theta):
-                yield s
+        return iter(self._thetas)
 
-    def iter_eta(self) -> Generator[Eta, None, None]:
+    def iter_eta(self) -> Iterator[Eta]:
         """Get all eta symbols in the definition."""
-        for s in self:
-            if isinstance(s, Eta):
-                yield s
+        return iter(self._etas)
 
-    def iter_eps(self) -> Generator[Eps, None, None]:
+    def iter_eps(self) -> Iterator[Eps]:
         """Get all epsilon symbols in the definition."""
-        for s in self:
-            if isinstance(s, Eps):
-                yield s
+        return iter(self._epsilons)
 
-    def iter_cmt(self) -> Generator[Compartment, None, None]:
+    def iter_cmt(self) -> Iterator[Compartment]:
         """Get all compartments in the definition."""
-        for s in self:
-            if isinstance(s, Compartment):
-                yield s
+        return iter(self._cmts)
 
-    def iter_colvar(self) -> Generator[ColVar, None, None]:
+    def iter_colvar(self) -> Iterator[ColVar]:
         """Get all column variables in the definition."""
-        for s in self:
-            if isinstance(s, ColVar):
-                yield s
+        return iter(self._colvars)
 
     def iter_symbols(self) -> Generator[Symbol, None, None]:
         """Get all symbols in the definition."""
         for s in self:
-            if isinstance(s, Theta):
-                yield s
-            elif isinstance(s, Eta):
-                yield s
-            elif isinstance(s, Eps):
-                yield s
-            elif isinstance(s, ColVar):
+            if isinstance(s, Theta | Eta | Eps | ColVar):
                 yield s
             else:
                 raise TypeError(f"Unknown symbol type: {type(s)}")
 
     def has_symbol(self, symbol: Basic) -> bool:
         """Check if the symbol is in the definition."""
-        for s in self:
-            if isinstance(s, Theta) and s == symbol:
-                return True
-            elif isinstance(s, Eta) and s == symbol:
-                return True
-            elif isinstance(s, Eps) and s == symbol:
-                return True
-            elif isinstance(s, ColVar) and s == symbol:
-                return True
-
-        return False
+        return symbol in self._symbols
+
+    def get_symbol(self, name: str) -> SymbolDef | None:
+        """Get the symbol or compartment of a name, None if not defined."""
+        return self._by_name.get(name)
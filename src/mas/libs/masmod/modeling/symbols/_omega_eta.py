@@ -88,11 +88,21 @@ class Omega(SymbolBlock[Eta], CodeGen):
     def _code_gen(self):
         values = self.values
 
+        lhs_attrs = [
+            cst.Attribute(value=cst.Name("self"), attr=cst.Name(value=name))
+            for name in self.names
+        ]
+        # Unpack the elements of a block, `self.a, self.b = ...`
         lhs_targets = [
             cst.AssignTarget(
-                cst.Attribute(value=cst.Name("self"), attr=cst.Name(value=name))
+                cst.Tuple(
+                    [cst.Element(attr) for attr in lhs_attrs],
+                    lpar=[],
+                    rpar=[],
+                )
+                if len(lhs_attrs) > 1
+                else lhs_attrs[0]
             )
-            for name in self.names
         ]
 
         args = []
@@ -34,7 +34,7 @@ class Theta(Symbol, CodeGen, AsCSTExpression):
         Boundary of the theta parameter.
     """
 
-    __slots__ = ("_init_value", "_fixed", "_bounds")
+    __slots__ = ("_init_value", "_fixed", "_bounds", "_update_method")
 
     def __new__(
         cls,
@@ -45,6 +45,7 @@ class Theta(Symbol, CodeGen, AsCSTExpression):
         **kwargs: Any,
     ) -> Theta:
         instance = cast(Theta, super().__new__(cls, name, **kwargs))
+        instance._update_method = None
         instance.bounds = bounds
         instance.init_value = init_value
         instance._fixed = fixed
@@ -60,50 +61,11 @@ class Theta(Symbol, CodeGen, AsCSTExpression):
         )
 
     def _code_gen(self):
-        args = [
-            cst.Arg(value=cst.parse_expression(str(self.init_value))),
-        ]
-        if self.bounds[0] or self.bounds[1]:
-            if self.bounds[0] is None:
-                lower_ = cst.Name(value="None")
-            else:
-                lower_ = cst.parse_expression(str(self.bounds[0]))
-
-            if self.bounds[1] is None:
-                upper_ = cst.Name(value="None")
-            else:
-                upper_ = cst.parse_expression(str(self.bounds[1]))
-
-            args.append(
-                cst.Arg(
-                    keyword=cst.Name(value="bounds"),
-                    value=cst.Tuple(
-                        [
-                            cst.Element(lower_),
-                            cst.Element(upper_),
-                        ]
-                    ),
-                )
-            )
-        if self.fixed:
-            args.append(
-                cst.Arg(
-                    keyword=cst.Name(value="fixed"),
-                    value=cst.Name(value=str(self.fixed)),
-                )
-            )
-        return cst.Assign(
-            targets=[
-                cst.AssignTarget(
-                    cst.Attribute(
-                        value=cst.Name("self"), attr=cst.Name(value=self.name)
-                    )
-                )
-            ],
-            value=cst.Call(
-                func=cst.Name(value=theta.__name__),
-                args=args,
-            ),
+        return code_gen_theta(
+            name=self.name,
+            init_value=self.init_value,
+            bounds=self.bounds,
+            fixed=self.fixed,
         )
 
     def __deepcopy__(self, memo: dict[int, Any]) -> Theta:
@@ -119,6 +81,16 @@ class Theta(Symbol, CodeGen, AsCSTExpression):
         ins.name = self.name
         return ins
 
+    def set_read_only(self, update_method: str) -> None:
+        """Reject writes of the parameters, pointing to `update_method` instead."""
+        self._update_method = update_method
+
+    def _check_writable(self) -> None:
+        if self._update_method is not None:
+            raise AttributeError(
+                f"Theta {self.name} is read-only, use `{self._update_method}` instead"
+            )
+
     @property
     def init_value(self) -> float:
         """float: Initial value for variable"""
@@ -126,6 +98,7 @@ class Theta(Symbol, CodeGen, AsCSTExpression):
 
     @init_value.setter
     def init_value(self, init_value: ValueType) -> None:
+        self._check_writable()
         self._init_value = float(init_value)
 
     @property
@@ -140,50 +113,110 @@ class Theta(Symbol, CodeGen, AsCSTExpression):
 
     @bounds.setter
     def bounds(self, bounds: BoundsType | None) -> None:
-        if bounds is not None:
-            if len(bounds) != 2:
-                raise ValueError("Invalid length of bounds, expect 2")
-
-            _lower, _upper = bounds
-
-            if _lower is not None and type(_lower) not in [
-                float,
-                int,
-                np.float64,
-                np.int64,
-            ]:
-                raise TypeError(
-                    "Invalid argument bound, expect float or int or None, but {0} is given".format(
-                        type(_lower)
-                    )
+        self._check_writable()
+        self._bounds = normalize_bounds(bounds)
+
+
+def normalize_bounds(
+    bounds: BoundsType | None,
+) -> tuple[float | None, float | None]:
+    """Validate theta bounds and convert them to a tuple of floats or None."""
+    if bounds is not None:
+        if len(bounds) != 2:
+            raise ValueError("Invalid length of bounds, expect 2")
+
+        _lower, _upper = bounds
+
+        if _lower is not None and type(_lower) not in [
+            float,
+            int,
+            np.float64,
+            np.int64,
+        ]:
+            raise TypeError(
+                "Invalid argument bound, expect float or int or None, but {0} is given".format(
+                    type(_lower)
                 )
-            elif _lower is None:
-                _lower = None
-            else:
-                _lower = float(_lower)
-
-            if _upper is not None and type(_upper) not in [
-                float,
-                int,
-                np.float64,
-                np.int64,
-            ]:
-                raise TypeError(
-                    "Invalid argument bound, expect float or int or None, but {0} is given".format(
-                        type(_lower)
-                    )
+            )
+        elif _lower is None:
+            _lower = None
+        else:
+            _lower = float(_lower)
+
+        if _upper is not None and type(_upper) not in [
+            float,
+            int,
+            np.float64,
+            np.int64,
+        ]:
+            raise TypeError(
+                "Invalid argument bound, expect float or int or None, but {0} is given".format(
+                    type(_lower)
                 )
-            elif _upper is None:
-                _upper = None
-            else:
-                _upper = float(_upper)
+            )
+        elif _upper is None:
+            _upper = None
+        else:
+            _upper = float(_upper)
+
+        bounds = (_lower, _upper)
+
+    else:
+        bounds = (None, None)
 
-            bounds = (_lower, _upper)
+    return bounds
 
+
+def code_gen_theta(
+    name: str,
+    init_value: float,
+    bounds: tuple[float | None, float | None],
+    fixed: bool,
+) -> cst.Assign:
+    """Generate `self.<name> = theta(...)`."""
+    args = [
+        cst.Arg(value=cst.parse_expression(str(init_value))),
+    ]
+    if bounds[0] or bounds[1]:
+        if bounds[0] is None:
+            lower_ = cst.Name(value="None")
         else:
-            bounds = (None, None)
+            lower_ = cst.parse_expression(str(bounds[0]))
 
-        self._bounds = bounds
+        if bounds[1] is None:
+            upper_ = cst.Name(value="None")
+        else:
+            upper_ = cst.parse_expression(str(bounds[1]))
+
+        args.append(
+            cst.Arg(
+                keyword=cst.Name(value="bounds"),
+                value=cst.Tuple(
+                    [
+                        cst.Element(lower_),
+                        cst.Element(upper_),
+                    ]
+                ),
+            )
+        )
+    if fixed:
+        args.append(
+            cst.Arg(
+                keyword=cst.Name(value="fixed"),
+                value=cst.Name(value=str(fixed)),
+            )
+        )
+    return cst.Assign(
+        targets=[
+            cst.AssignTarget(
+                cst.Attribute(value=cst.Name("self"), attr=cst.Name(value=name))
+            )
+        ],
+        value=cst.Call(
+            func=cst.Name(value=theta.__name__),
+            args=args,
+        ),
+    )
 
 
 def theta(
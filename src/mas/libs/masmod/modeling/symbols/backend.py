@@ -0,0 +1,127 @@
+from __future__ import annotations
+
+import abc
+from typing import Any, Iterator, Literal
+
+from sympy import Basic, Expr, Symbol, cse, sympify
+
+__all__ = [
+    "BackendName",
+    "SymbolicBackend",
+    "SympyBackend",
+    "SymengineBackend",
+    "get_backend",
+]
+
+BackendName = Literal["sympy", "symengine"]
+
+
+class SymbolicBackend(abc.ABC):
+    """
+    Engine differentiating and reducing the sympy expressions of the autodiff.
+
+    Expressions are always given and returned as sympy expressions, so that the
+    custom symbols (`XWrt`, `CmtSolvedAWrt`, ...) and the code generation from
+    them are left to sympy whatever the backend.
+    """
+
+    name: BackendName
+
+    @abc.abstractmethod
+    def diff(self, expr: Expr, wrt: Basic) -> Expr:
+        """Derivative of `expr` w.r.t. the symbol `wrt`."""
+
+    @abc.abstractmethod
+    def cse(
+        self, exprs: list[Expr], symbols: Iterator[Symbol]
+    ) -> tuple[list[tuple[Symbol, Expr]], list[Expr]]:
+        """
+        Common subexpressions of `exprs`, like `sympy.cse(exprs, symbols, list=True)`.
+
+        Returns
+        -------
+        tuple[list[tuple[Symbol, Expr]], list[Expr]]
+            The temporaries named from `symbols` with their values, in order of
+            definition, and `exprs` reduced with the temporaries.
+        """
+
+
+class SympyBackend(SymbolicBackend):
+    """Differentiate and reduce with sympy."""
+
+    name: BackendName = "sympy"
+
+    def diff(self, expr: Expr, wrt: Basic) -> Expr:
+        return expr.diff(wrt)
+
+    def cse(
+        self, exprs: list[Expr], symbols: Iterator[Symbol]
+    ) -> tuple[list[tuple[Symbol, Expr]], list[Expr]]:
+        replacements, reductions = cse(exprs=exprs, symbols=symbols, list=True)
+        if not isinstance(reductions, list):
+            raise NotImplementedError()
+        return replacements, reductions
+
+
+class SymengineBackend(SymbolicBackend):
+    """
+    Differentiate and reduce with symengine, requires the `symengine` package.
+
+    The symbols of the expressions are swapped for plain placeholders before the
+    conversion to symengine and restored afterwards, since symengine does not keep
+    the subclasses of `sympy.Symbol`.
+    """
+
+    name: BackendName = "symengine"
+
+    def __init__(self) -> None:
+        try:
+            import symengine
+        except ImportError as e:
+            raise ImportError(
+                "The symengine backend requires the `symengine` package, "
+                "install it with `pip install symengine`"
+            ) from e
+        self._symengine = symengine
+
+    def _encode(self, exprs: list[Basic]) -> tuple[list[Any], dict[Symbol, Basic]]:
+        placeholders: dict[Basic, Symbol] = {}
+        for expr in exprs:
+            for symbol in sorted(expr.free_symbols, key=str):
+                if symbol not in placeholders:
+                    placeholders[symbol] = Symbol(f"__sym{len(placeholders)}")
+        encoded = [
+            self._symengine.sympify(expr.xreplace(placeholders)) for expr in exprs
+        ]
+        return encoded, {v: k for k, v in placeholders.items()}
+
+    @staticmethod
+    def _decode(expr: Any, originals: dict[Symbol, Basic]) -> Expr:
+        return sympify(expr).xreplace(originals)
+
+    def diff(self, expr: Expr, wrt: Basic) -> Expr:
+        if wrt not in expr.free_symbols:
+            return sympify(0)
+        (encoded, encoded_wrt), originals = self._encode([expr, wrt])
+        return self._decode(encoded.diff(encoded_wrt), originals)
+
+    def cse(
+        self, exprs: list[Expr], symbols: Iterator[Symbol]
+    ) -> tuple[list[tuple[Symbol, Expr]], list[Expr]]:
+        encoded, originals = self._encode(exprs)
+        se_replacements, se_reductions = self._symengine.cse(encoded)
+        replacements: list[tuple[Symbol, Expr]] = []
+        for term, sub_expr in se_replacements:
+            renamed = next(symbols)
+            replacements.append((renamed, self._decode(sub_expr, originals)))
+            originals[sympify(term)] = renamed
+        return replacements, [self._decode(expr, originals) for expr in se_reductions]
+
+
+def get_backend(name: BackendName) -> SymbolicBackend:
+    """Backend of the given name, see `AutoDiffOptions.backend`."""
+    if name == "sympy":
+        return SympyBackend()
+    if name == "symengine":
+        return SymengineBackend()
+    raise ValueError(f"Unknown symbolic backend '{name}'")
@@ -0,0 +1,98 @@
+from __future__ import annotations
+
+from typing import Any
+
+from sympy import Basic, Dummy, Symbol
+
+from mas.libs.masmod.modeling.symbols._cmt import Compartment
+from mas.libs.masmod.modeling.symbols._ns import SymbolNamespace
+
+__all__ = ["SymbolTable"]
+
+# Picklable reference to a symbol, a compartment or a plain value held by a symbol
+SymbolRef = tuple[Any, ...]
+
+
+class SymbolTable:
+    """
+    Picklable representation of the expressions of one module.
+
+    The symbols of the module (`XWrt`, `CmtSolvedAWrt`, `Eta`, ...) can not be
+    pickled, their constructors take more than the name and some hold their
+    compartment. An expression is encoded with each of them swapped for a dummy
+    and a reference of the symbol: the name and class with the values of its
+    slots, or the name of a symbol or compartment defined by the module. The
+    references are resolved against the same namespace when decoding, so that the
+    decoded expression holds the symbols of the module again.
+
+    Examples
+    --------
+    >>> table = SymbolTable(symbol_defs)
+    >>> payload = pickle.dumps(table.encode(expr))
+    >>> table.decode(pickle.loads(payload)) == expr
+    True
+    """
+
+    def __init__(self, symbol_defs: SymbolNamespace) -> None:
+        self._defined: dict[tuple[type, str], Symbol] = {}
+        for symbol in [
+            *symbol_defs.iter_theta(),
+            *symbol_defs.iter_eta(),
+            *symbol_defs.iter_eps(),
+            *symbol_defs.iter_colvar(),
+        ]:
+            self._defined[type(symbol), symbol.name] = symbol
+        self._cmts = {cmt.name: cmt for cmt in symbol_defs.iter_cmt()}
+
+    def encode(self, expr: Basic) -> tuple[Basic, tuple[tuple[Dummy, SymbolRef], ...]]:
+        """Swap the symbols of the module in `expr` for picklable references."""
+        placeholders: dict[Basic, Dummy] = {}
+        refs: list[tuple[Dummy, SymbolRef]] = []
+        for symbol in expr.free_symbols:
+            if isinstance(symbol, Symbol) and type(symbol).__module__.startswith(
+                "sympy."
+            ):
+                continue
+            placeholders[symbol] = Dummy()
+            refs.append((placeholders[symbol], self._ref(symbol)))
+        return expr.xreplace(placeholders), tuple(refs)
+
+    def decode(self, payload: tuple[Basic, tuple[tuple[Dummy, SymbolRef], ...]]) -> Any:
+        """Expression encoded by `encode`."""
+        expr, refs = payload
+        return expr.xreplace({dummy: self._resolve(ref) for dummy, ref in refs})
+
+    def _ref(self, value: Any) -> SymbolRef:
+        if isinstance(value, Compartment):
+            return ("cmt", value.name)
+        if not isinstance(value, Symbol):
+            return ("value", value)
+        if (type(value), value.name) in self._defined:
+            return ("defined", type(value), value.name)
+        slots = {
+            slot: self._ref(getattr(value, slot))
+            for cls in type(value).__mro__
+            if not cls.__module__.startswith("sympy.")
+            for slot in _slots(cls)
+            if hasattr(value, slot)
+        }
+        return ("symbol", type(value), value.name, tuple(slots.items()))
+
+    def _resolve(self, ref: SymbolRef) -> Any:
+        kind = ref[0]
+        if kind == "value":
+            return ref[1]
+        if kind == "cmt":
+            return self._cmts[ref[1]]
+        if kind == "defined":
+            return self._defined[ref[1], ref[2]]
+        _, cls, name, slots = ref
+        symbol = Symbol.__xnew__(cls, name)
+        for slot, value in slots:
+            setattr(symbol, slot, self._resolve(value))
+        return symbol
+
+
+def _slots(cls: type) -> tuple[str, ...]:
+    slots = cls.__dict__.get("__slots__", ())
+    return (slots,) if isinstance(slots, str) else tuple(slots)
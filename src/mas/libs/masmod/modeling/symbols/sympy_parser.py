@@ -15,6 +15,7 @@ from sympy import (
     Rational,
     Symbol,
     exp,
+    log,
 )
 from sympy.core.relational import Relational
 
@@ -146,6 +147,14 @@ def parse_sympy_expr(expr: Basic | int | float) -> cst.BaseExpression:
             rpar=[cst.RightParen()],
         )
 
+    if isinstance(expr, log):
+        return cst.Call(
+            func=cst.Name("log"),
+            args=[cst.Arg(value=parse_sympy_expr(expr.args[0]))],
+            lpar=[cst.LeftParen()],
+            rpar=[cst.RightParen()],
+        )
+
     if isinstance(expr, Derivative):
         on_ = expr.expr
         wrt = expr.variables
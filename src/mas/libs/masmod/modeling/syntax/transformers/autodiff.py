@@ -1,7 +1,7 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field, replace
 from keyword import iskeyword
 from token import NAME, OP
-from typing import Any
+from typing import Any, Callable, Iterator, Literal
 
 import libcst as cst
 from libcst.metadata import (
@@ -14,7 +14,8 @@ from sympy import (
     Function,
     Number,
     Symbol,
-    cse,
+    Tuple,
+    count_ops,
     numbered_symbols,
     parse_expr,
 )
@@ -31,6 +32,7 @@ from mas.libs.masmod.modeling.module.closed_form_solutions._args import (
 )
 from mas.libs.masmod.modeling.module.defs.closed_form import (
     ClosedFormSolutionModule,
+    ClosedFormSolutionModuleMeta,
     get_annotated_meta,
 )
 from mas.libs.masmod.modeling.module.defs.module import Module
@@ -48,12 +50,21 @@ from mas.libs.masmod.modeling.symbols._cmt import (
     CmtDosingParamSymbol,
     CmtSolvedA,
     CmtSolvedAWrt,
+    Compartment,
 )
 from mas.libs.masmod.modeling.symbols._ns import SymbolNamespace
 from mas.libs.masmod.modeling.symbols._omega_eta import Eta
 from mas.libs.masmod.modeling.symbols._sigma_eps import Eps
+from mas.libs.masmod.modeling.symbols._theta import Theta
 from mas.libs.masmod.modeling.symbols._x import XWrt
 from mas.libs.masmod.modeling.symbols._y import Y, YType, YValue, YWrt
+from mas.libs.masmod.modeling.symbols.backend import (
+    BackendName,
+    SymbolicBackend,
+    SympyBackend,
+    get_backend,
+)
+from mas.libs.masmod.modeling.symbols.pickling import SymbolTable
 from mas.libs.masmod.modeling.symbols.sympy_parser import parse_sympy_expr
 from mas.libs.masmod.modeling.syntax.metadata.scope_provider import (
     Scope,
@@ -62,8 +73,15 @@ from mas.libs.masmod.modeling.syntax.metadata.scope_provider import (
 from mas.libs.masmod.modeling.syntax.rethrow import rethrow
 from mas.libs.masmod.modeling.syntax.unparse import unparse
 from mas.libs.masmod.modeling.syntax.with_comment import with_trailing_comment
+from mas.libs.masmod.modeling.utils.loggings import logger
+from mas.libs.masmod.modeling.utils.pool import process_pool
+from mas.libs.masmod.modeling.utils.profiling import (
+    is_profiling,
+    profile_count,
+    profile_cse,
+)
 
-__all__ = ["AutoDiffTransformer"]
+__all__ = ["AutoDiffMemo", "AutoDiffOptions", "AutoDiffTransformer", "DiffCache"]
 
 FIRST_ORDER = Symbol("__FIRST_ORDER")
 SECOND_ORDER = Symbol("__SECOND_ORDER")
@@ -133,8 +151,8 @@ def auto_symbol(tokens: list[TOKEN], local_dict: DICT, global_dict: DICT):
 
 
 # tuple[list[cst.BaseStatement], list[tuple[Symbol, Expr]]]
-FirstOrderDerivative = tuple[Eta | Eps | CmtSolvedA, Expr]
-SecondOrderDerivative = tuple[tuple[Eta, Eta | Eps], Expr]
+FirstOrderDerivative = tuple[Eta | Eps | Theta | CmtSolvedA, Expr]
+SecondOrderDerivative = tuple[tuple[Eta | Theta, Eta | Eps], Expr]
 
 
 @dataclass(frozen=True)
@@ -144,6 +162,527 @@ class ReducedDerivatives:
     second_order: list[SecondOrderDerivative]
 
 
+class AutoDiffMemo:
+    """
+    Memo of reduced derivatives shared between compilations of related modules.
+
+    Derivatives of a statement only depend on its evaluated value, the in-scope
+    variables it reads and the symbols differentiated against. Recompiling a module
+    after a small edit, e.g. including a covariate, can therefore reuse the output
+    of every statement that is left unchanged. The memo is bound to the
+    differentiated symbols and is cleared whenever they change.
+    """
+
+    def __init__(self) -> None:
+        self._signature: tuple[Any, ...] | None = None
+        self._entries: dict[tuple[Any, ...], ReducedDerivatives] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def __deepcopy__(self, memo: Any) -> "AutoDiffMemo":
+        # entries are never mutated, copies of a descriptor share the memo
+        return self
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: tuple[Any, ...]) -> bool:
+        return key in self._entries
+
+    def bind(self, signature: tuple[Any, ...]) -> None:
+        if signature != self._signature:
+            self._signature = signature
+            self._entries.clear()
+
+    def get(self, key: tuple[Any, ...]) -> ReducedDerivatives | None:
+        found = self._entries.get(key, None)
+        if found is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return found
+
+    def put(self, key: tuple[Any, ...], derivatives: ReducedDerivatives) -> None:
+        self._entries[key] = derivatives
+
+
+class DiffCache:
+    """
+    Cache of the symbolic derivatives computed while transforming one module.
+
+    The chain rule differentiates the value of a statement w.r.t. the same locals
+    once per eta, eps and amount, and again for the second order terms. Entries
+    are keyed on `(expr, wrt, wrt2nd)`, second order derivatives reuse the
+    cached first order ones.
+    """
+
+    def __init__(self, backend: SymbolicBackend | None = None) -> None:
+        self._backend = backend or SympyBackend()
+        self._entries: dict[tuple[Basic, Basic, Basic | None], Expr] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def diff(self, expr: Expr, wrt: Basic, wrt2nd: Basic | None = None) -> Expr:
+        """`expr.diff(wrt, wrt2nd)`, computed once per cache."""
+        key = (expr, wrt, wrt2nd)
+        found = self._entries.get(key, None)
+        if found is not None:
+            self.hits += 1
+            return found
+        self.misses += 1
+        if wrt2nd is None:
+            found = self._backend.diff(expr, wrt)
+        else:
+            found = self.diff(self.diff(expr, wrt), wrt2nd)
+        self._entries[key] = found
+        return found
+
+
+@dataclass(frozen=True)
+class AutoDiffOptions:
+    """
+    Options of the derivative code generated by `AutoDiffTransformer`.
+
+    Attributes
+    ----------
+    global_cse : bool
+        Eliminate common subexpressions across the derivatives of all statements
+        of a straight-line region of pred instead of per statement. Regions end
+        at if statements, the temporaries hoisted in a region are reused by the
+        following regions and branches until a local they read is assigned again.
+        Only used by the forward mode.
+    mode : Literal["forward", "reverse"]
+        Propagate the derivatives of the locals forward along pred, or sweep the
+        pred statements backwards from the prediction, see
+        `ReverseAutoDiffTransformer`. Reverse mode only supports modules without
+        compartments.
+    theta_gradients : bool
+        Also differentiate w.r.t. the thetas, emitting ∂Y/∂θ and ∂²Y/∂θ∂η on the
+        first order derivatives. Only supported by modules without compartments,
+        the solvers do not provide the sensitivities of the amounts to thetas.
+    order : Literal[0, 1, 2]
+        Highest order of the generated derivatives. 0 only keeps the prediction,
+        e.g. for simulations, 1 drops the `__SECOND_ORDER` blocks and the second
+        order terms including ∂²Y/∂η∂ε and ∂²Y/∂θ∂η, e.g. for FO estimation.
+    backend : BackendName
+        Engine of the differentiation and CSE, see `get_backend`. "symengine"
+        requires the optional `symengine` package.
+    workers : int
+        Processes differentiating the statements of pred in parallel, 1 to
+        differentiate them in the compiling process. Only used by the forward mode
+        without `global_cse`. The workers are not forked from the compiling
+        process, see `process_pool`. They import the `__main__` module of the
+        compiling process again, so a script compiling with more than one
+        worker must do so under an `if __name__ == "__main__":` guard.
+    fold_constants : bool
+        Fold the literals of pred before differentiating it, see `ConstantFolder`.
+    eliminate_dead_code : bool
+        Remove the assignments of locals, derivatives and CSE temporaries nothing
+        depends on after differentiating pred, see `DeadCodeEliminator`.
+    export_locals : tuple[str, ...] | None
+        Locals of pred exported with the prediction, all the locals not starting
+        with `__` if not given. Locals not exported are only computed if the
+        prediction depends on them.
+    op_budget : int | None
+        Most operations of a derivative expression or of a partial derivative it
+        is chained from, e.g. of the ∂²Z/∂ηᵢ∂ηⱼ of a deeply nested `dAdt`. Past
+        the budget the statement is logged and differentiated again through
+        intermediate variables of a few operations each, whose derivatives grow
+        linearly with the nesting. No limit if None, the default. Only used by
+        the forward mode.
+
+        The split bounds the compile time, not the size of the code: the
+        intermediates are not shared with the derivatives by CSE, so the C++ of
+        a split statement can be larger, e.g. 61.8KB instead of 40.6KB for
+        a `dAdt` nested 40 deep with a budget of 5000. It can also be slower
+        than no limit on moderately nested statements, e.g. 2.4s instead of 2.0s
+        at a depth of 20.
+    """
+
+    global_cse: bool = False
+    mode: Literal["forward", "reverse"] = "forward"
+    theta_gradients: bool = False
+    order: Literal[0, 1, 2] = 2
+    backend: BackendName = "sympy"
+    workers: int = 1
+    fold_constants: bool = True
+    eliminate_dead_code: bool = True
+    export_locals: tuple[str, ...] | None = None
+    op_budget: int | None = None
+
+    def __post_init__(self):
+        if self.mode not in ("forward", "reverse"):
+            raise ValueError(f"Unknown autodiff mode '{self.mode}'")
+        if self.order not in (0, 1, 2):
+            raise ValueError(f"Derivative order must be 0, 1 or 2, got {self.order}")
+        if self.backend not in ("sympy", "symengine"):
+            raise ValueError(f"Unknown symbolic backend '{self.backend}'")
+        if self.workers < 1:
+            raise ValueError(f"Workers must be at least 1, got {self.workers}")
+        if self.op_budget is not None and self.op_budget < 1:
+            raise ValueError(f"Op budget must be at least 1, got {self.op_budget}")
+        if self.export_locals is not None:
+            if isinstance(self.export_locals, str) or not all(
+                isinstance(name, str) for name in self.export_locals
+            ):
+                raise TypeError("Locals to export must be a sequence of names")
+            # Hashable and the same after a round trip through `to_dict`
+            object.__setattr__(self, "export_locals", tuple(self.export_locals))
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "global_cse": self.global_cse,
+            "mode": self.mode,
+            "theta_gradients": self.theta_gradients,
+            "order": self.order,
+            "backend": self.backend,
+            "workers": self.workers,
+            "fold_constants": self.fold_constants,
+            "eliminate_dead_code": self.eliminate_dead_code,
+            "export_locals": (
+                None if self.export_locals is None else list(self.export_locals)
+            ),
+            "op_budget": self.op_budget,
+        }
+
+    @classmethod
+    def from_dict(cls, content: dict[str, Any]) -> "AutoDiffOptions":
+        return cls(**content)
+
+
+@dataclass
+class _CSEGroup:
+    # Derivatives of one statement, emitted as `slots` and reduced with the others
+    # of the region, the temporaries are inserted at `marker`
+    target: str
+    marker: str
+    slots: list[Symbol]
+    exprs: list[Expr]
+
+
+def _read_name(symbol: Basic) -> str:
+    """Name of the local holding `symbol`, `__solve__` for solved amounts."""
+    if isinstance(symbol, XWrt):
+        return symbol.xname
+    if isinstance(
+        symbol,
+        ClosedFormSolutionSolvedF
+        | ClosedFormSolutionSolvedFWrt
+        | ClosedFormSolutionSolvedA
+        | ClosedFormSolutionSolvedAWrt,
+    ):
+        return ClosedFormSolveCall.name
+    return str(symbol)
+
+
+def _reads(expr: Basic) -> set[str]:
+    """Names of the locals `expr` reads."""
+    return {_read_name(symbol) for symbol in expr.free_symbols}
+
+
+def _if_suites(if_: cst.If) -> list[cst.BaseSuite]:
+    """Bodies of the branches of an if statement, down its `elif` chain."""
+    suites = [if_.body]
+    orelse = if_.orelse
+    while isinstance(orelse, cst.If):
+        suites.append(orelse.body)
+        orelse = orelse.orelse
+    if orelse is not None:
+        suites.append(orelse.body)
+    return suites
+
+
+def _own_ops(node: Basic) -> int:
+    """Operations of `node` itself, roughly as counted by `count_ops`."""
+    if node.is_Atom:
+        return 0
+    if node.is_Add or node.is_Mul:
+        return len(node.args) - 1
+    return 1
+
+
+# Most operations of an operand left in an intermediate, see `_Intermediates`
+_INTERMEDIATE_OPS = 4
+
+
+def _tree_ops(expr: Basic, ops: dict[Basic, int]) -> int:
+    """
+    Operations of `expr` as printed, with a subexpression counted wherever it
+    occurs but visited once, unlike `count_ops`. `ops` caches the counts.
+    """
+    n = ops.get(expr, None)
+    if n is None:
+        n = _own_ops(expr) + sum(_tree_ops(arg, ops) for arg in expr.args)
+        ops[expr] = n
+    return n
+
+
+class _OpBudgetExceeded(Exception):
+    """A derivative has more operations than `AutoDiffOptions.op_budget`."""
+
+    def __init__(self, wrt: tuple[Symbol, ...], ops: int) -> None:
+        super().__init__(wrt, ops)
+        self.wrt = wrt
+        self.ops = ops
+
+
+class _Intermediates:
+    """
+    A value split into intermediate variables, differentiated by the chain rule.
+
+    Operands of more than `max_ops` operations are assigned to intermediates,
+    the same operand to the same one, and so are the partial derivatives of the
+    intermediates. Differentiating the value then never expands its nested
+    operands, the derivatives are the same written with the intermediates.
+    """
+
+    def __init__(
+        self, diff: Callable[..., Expr], max_ops: int, symbols: Iterator[Symbol]
+    ) -> None:
+        # Intermediates in the order they are assigned
+        self.definitions: list[tuple[Symbol, Expr]] = []
+        self._diff = diff
+        self._max_ops = max_ops
+        self._symbols = symbols
+        self._values: dict[Symbol, Expr] = {}
+        self._names: dict[Expr, Symbol] = {}
+        self._partials: dict[tuple[Symbol, Basic], Expr] = {}
+        self._split: dict[Basic, tuple[Basic, int]] = {}
+
+    def split(self, value: Expr) -> Expr:
+        """`value` with its operands assigned to intermediates."""
+        split, _ = self._split_operands(value)
+        return split  # type: ignore[return-value]
+
+    def diff(self, expr: Expr, wrt: Basic, wrt2nd: Basic | None = None) -> Expr:
+        """Same as `DiffCache.diff`, through the intermediates `expr` reads."""
+        expr = self._diff_through(expr, wrt)
+        if wrt2nd is not None:
+            expr = self._diff_through(expr, wrt2nd)
+        return expr
+
+    def _intermediate(self, expr: Expr) -> Symbol:
+        symbol = self._names.get(expr, None)
+        if symbol is None:
+            symbol = next(self._symbols)
+            self._names[expr] = symbol
+            self._values[symbol] = expr
+            self.definitions.append((symbol, expr))
+        return symbol
+
+    def _split_operands(self, node: Basic) -> tuple[Basic, int]:
+        """`node` with intermediates, and the operations left in it."""
+        split = self._split.get(node, None)
+        if split is not None:
+            return split
+        if node.is_Atom or not node.args:
+            split = (node, 0)
+        else:
+            operands = [self._split_operands(arg) for arg in node.args]
+            ops = _own_ops(node)
+            for i, (operand, n) in enumerate(operands):
+                if n > self._max_ops and isinstance(operand, Expr):
+                    operands[i] = (self._intermediate(operand), 0)
+                else:
+                    ops += n
+            args = [operand for operand, _ in operands]
+            if any(arg is not old for arg, old in zip(args, node.args)):
+                split = (node.func(*args), ops)
+            else:
+                split = (node, ops)
+        self._split[node] = split
+        return split
+
+    def _diff_through(self, expr: Expr, wrt: Basic) -> Expr:
+        # ∂E/∂x + Σₖ ∂E/∂vₖ · ∂vₖ/∂x over the intermediates vₖ
+        result = self._diff(expr, wrt)
+        free_symbols = expr.free_symbols
+        # In the order of the intermediates, the output does not depend on hashing
+        for symbol in [symbol for symbol in self._values if symbol in free_symbols]:
+            partial = self._partial(symbol, wrt)
+            if partial != 0:
+                result += self._diff(expr, symbol) * partial
+        return result
+
+    def _partial(self, symbol: Symbol, wrt: Basic) -> Expr:
+        """∂v/∂x of the intermediate v, an intermediate itself unless an atom."""
+        key = (symbol, wrt)
+        partial = self._partials.get(key, None)
+        if partial is None:
+            partial = self._diff_through(self._values[symbol], wrt)
+            if not partial.is_Atom:
+                partial = self._intermediate(partial)
+            self._partials[key] = partial
+        return partial
+
+
+@dataclass
+class _CSERegion:
+    """
+    Derivatives of a straight-line run of pred statements, reduced together.
+
+    A local assigned again after the region read it gets a new version, the
+    symbols of its previous value are renamed to `<name>@<version>` so that CSE
+    never mixes values of the local read before and after the assignment.
+    """
+
+    groups: list[_CSEGroup] = field(default_factory=list)
+    # Locals read by the derivatives of the region
+    reads: set[str] = field(default_factory=set)
+    versions: dict[str, int] = field(default_factory=dict)
+    # Renamed symbols and the local and version they hold
+    renamed: dict[Symbol, tuple[Basic, str, int]] = field(default_factory=dict)
+
+    def assign(self, writes: set[str]) -> None:
+        for name in writes & self.reads:
+            self.versions[name] = self.versions.get(name, 0) + 1
+
+    def versioned(self, expr: Basic) -> Basic:
+        if not self.versions:
+            return expr
+        mapping: dict[Basic, Basic] = {}
+        for symbol in expr.free_symbols:
+            name = _read_name(symbol)
+            version = self.versions.get(name, 0)
+            if version:
+                renamed = Symbol(f"{symbol}@{version}")
+                self.renamed[renamed] = (symbol, name, version)
+                mapping[symbol] = renamed
+        return expr.xreplace(mapping)
+
+    def is_current(self, expr: Basic) -> bool:
+        """If `expr` only reads the last values of the locals."""
+        for symbol in expr.free_symbols:
+            if symbol in self.renamed:
+                _, name, version = self.renamed[symbol]
+            else:
+                name, version = _read_name(symbol), 0
+            if self.versions.get(name, 0) != version:
+                return False
+        return True
+
+
+class _CSESlotFiller(cst.CSTTransformer):
+    """Fill the derivative slots and temporaries of a reduced region."""
+
+    def __init__(
+        self,
+        slots: dict[str, cst.BaseExpression],
+        temporaries: dict[str, list[cst.BaseStatement]],
+    ) -> None:
+        super().__init__()
+        self._slots = slots
+        self._temporaries = temporaries
+
+    def leave_Name(self, original_node: cst.Name, updated_node: cst.Name):
+        return self._slots.get(original_node.value, updated_node)
+
+    def leave_SimpleStatementLine(
+        self,
+        original_node: cst.SimpleStatementLine,
+        updated_node: cst.SimpleStatementLine,
+    ):
+        stmt = original_node.body[0]
+        if isinstance(stmt, cst.Expr) and isinstance(stmt.value, cst.Name):
+            temporaries = self._temporaries.get(stmt.value.value, None)
+            if temporaries is not None:
+                if not temporaries:
+                    return cst.RemoveFromParent()
+                return cst.FlattenSentinel(temporaries)
+        return updated_node
+
+
+# Value, scope, wrt_etas, wrt_eps, wrt_names and target of
+# `_compute_autodiff_and_cse`
+_WorkItem = tuple[Expr, Scope, bool, bool, frozenset[str] | None, str]
+
+# `_WorkItem` encoded by `SymbolTable`, with the names of the in-scope locals of
+# the value instead of its scope
+_EncodedWorkItem = tuple[Any, frozenset[str], bool, bool, frozenset[str] | None, str]
+
+
+@dataclass(frozen=True)
+class _DiffWorker:
+    """
+    Differentiates work items in the processes of
+    `AutoDiffTransformer._prefetch_derivatives`.
+
+    Symbols do not survive pickling, the worker defines symbols of the same kinds
+    and names in its process, and the items and results are encoded through
+    `SymbolTable`. The module class is replaced by its nearest base defined by
+    this package, user classes may not be importable in the workers.
+    """
+
+    module_cls: type[Module]
+    closed_form_meta: ClosedFormSolutionModuleMeta | None
+    symbols: tuple[tuple[type, str], ...]
+    dependencies: dict[str, frozenset[str]]
+    options: AutoDiffOptions
+
+    @classmethod
+    def of(cls, transformer: "AutoDiffTransformer") -> "_DiffWorker":
+        module_cls = next(
+            base
+            for base in transformer._module_cls.__mro__
+            if base.__module__.startswith("mas.libs.masmod.")
+        )
+        meta = None
+        if issubclass(transformer._module_cls, ClosedFormSolutionModule):
+            meta = get_annotated_meta(transformer._module_cls)
+        return cls(
+            module_cls=module_cls,
+            closed_form_meta=meta,
+            symbols=tuple((type(s), s.name) for s in transformer._symbol_defs),
+            dependencies=transformer._dependencies,
+            options=replace(transformer._options, workers=1),
+        )
+
+    @staticmethod
+    def _compartment(name: str) -> Compartment:
+        cmt = Compartment(name)
+        # Named by the module, which also names its symbols, e.g. `__A_depot`
+        cmt.name = name
+        return cmt
+
+    def __call__(self, items: list[_EncodedWorkItem]) -> list[Any]:
+        module_cls = self.module_cls
+        if self.closed_form_meta is not None:
+            module_cls = self.closed_form_meta(
+                type(module_cls.__name__, (module_cls,), {})
+            )
+        transformer = AutoDiffTransformer(
+            "",
+            locals={},
+            globals={},
+            module_cls=module_cls,
+            symbol_defs=SymbolNamespace(
+                self._compartment(name)
+                if issubclass(kind, Compartment)
+                else Symbol.__xnew__(kind, name)
+                for kind, name in self.symbols
+            ),
+            options=self.options,
+        )
+        transformer._dependencies = self.dependencies
+        table = transformer._symbol_table
+        payloads: list[Any] = []
+        for value, scoped, wrt_etas, wrt_eps, wrt_names, target in items:
+            replacements, first_order, second_order = transformer._reduce_derivatives(
+                table.decode(value), scoped, wrt_etas, wrt_eps, wrt_names, target
+            )
+            payloads.append(
+                table.encode(
+                    Tuple(
+                        Tuple(*replacements), Tuple(*first_order), Tuple(*second_order)
+                    )
+                )
+            )
+        return payloads
+
+
 class AutoDiffTransformer(cst.CSTTransformer):
     """
     A transformer that modifies the AST to support automatic differentiation.
@@ -162,12 +701,71 @@ class AutoDiffTransformer(cst.CSTTransformer):
         globals: dict[str, Any],
         module_cls: type[Module] = Module,
         symbol_defs: SymbolNamespace | None = None,
+        memo: AutoDiffMemo | None = None,
+        options: AutoDiffOptions | None = None,
     ):
         self._source_code = source_code
         self._locals = locals
         self._globals = globals
         self._module_cls = module_cls
         self._symbol_defs = symbol_defs or SymbolNamespace()
+        self._memo = memo
+        self._options = options or AutoDiffOptions()
+        if self._options.theta_gradients and issubclass(
+            module_cls, OdeModule | ClosedFormSolutionModule
+        ):
+            raise ValueError(
+                f"Theta gradients are not supported by {module_cls.__name__}, "
+                "the amounts have no sensitivities to thetas"
+            )
+        # Names of the etas, eps and amounts each local transitively depends on
+        self._dependencies: dict[str, frozenset[str]] = {}
+        self._evaluated: dict[cst.CSTNode, Any] = {}
+        # State of the global CSE, see `AutoDiffOptions.global_cse`
+        self._region: _CSERegion | None = None
+        self._available: dict[Basic, Symbol] = {}
+        self._expansions: dict[Symbol, Basic] = {}
+        self._temporaries = numbered_symbols(prefix="__")
+        # Intermediates of the derivatives over `AutoDiffOptions.op_budget`
+        self._intermediates = numbered_symbols(prefix="__iv")
+        self._n_groups = 0
+        self._backend = get_backend(self._options.backend)
+        self._diff_cache = DiffCache(self._backend)
+        # State of the parallel differentiation, see `AutoDiffOptions.workers`
+        self._symbol_table = SymbolTable(self._symbol_defs)
+        self._pending: dict[tuple[Any, ...], _WorkItem] | None = None
+        self._prefetched: dict[tuple[Any, ...], ReducedDerivatives] = {}
+        if self._memo is not None:
+            self._memo.bind(self._memo_signature())
+
+    def _memo_signature(self) -> tuple[Any, ...]:
+        if issubclass(self._module_cls, OdeModule):
+            kind: tuple[Any, ...] = ("ode",)
+        elif issubclass(self._module_cls, ClosedFormSolutionModule):
+            kind = ("closed_form", get_annotated_meta(self._module_cls).n_cmt)
+        else:
+            kind = ("pred",)
+        return (
+            kind,
+            tuple(eta.name for eta in self._symbol_defs.iter_eta()),
+            tuple(eps.name for eps in self._symbol_defs.iter_eps()),
+            tuple(cmt.name for cmt in self._symbol_defs.iter_cmt()),
+            tuple(theta.name for theta in self._iter_theta()),
+            # Derivatives do not depend on how many processes compute them, nor
+            # on the passes before and after the transformer
+            replace(
+                self._options,
+                workers=1,
+                fold_constants=True,
+                eliminate_dead_code=True,
+                export_locals=None,
+            ),
+        )
+
+    def _iter_theta(self) -> Iterator[Theta]:
+        """Thetas to differentiate against, see `AutoDiffOptions.theta_gradients`."""
+        if self._options.theta_gradients:
+            yield from self._symbol_defs.iter_theta()
 
     def visit_SimpleStatementLine(self, node: cst.SimpleStatementLine):
         if node.trailing_whitespace.comment:
@@ -183,69 +781,483 @@ class AutoDiffTransformer(cst.CSTTransformer):
     def leave_FunctionDef(
         self, original_node: cst.FunctionDef, updated_node: cst.FunctionDef
     ):
+        self._dependencies = self._collect_dependencies(original_node.body)
+        if self._options.workers > 1 and not self._options.global_cse:
+            self._prefetch_derivatives(original_node.body)
         return updated_node.with_changes(body=self._transform_Suite(original_node.body))
 
+    def _prefetch_derivatives(self, suite: cst.BaseSuite) -> None:
+        """
+        Differentiate the statements of `suite` in a process pool.
+
+        A dry run of the transformation collects the derivatives the statements
+        look up, the actual run picks up the results of the workers. The dry run
+        skips the differentiation, the CSE and the unparsing of the derivatives,
+        which dominate the transformation. Work items and results are pickled
+        through `SymbolTable`, see `_DiffWorker`. Profiling counters of the
+        workers are not reported.
+        """
+        self._pending = {}
+        try:
+            self._transform_Suite(suite)
+            pending = self._pending
+        finally:
+            self._pending = None
+        if len(pending) < 2:
+            return
+
+        keys = list(pending)
+        items: list[_EncodedWorkItem] = [
+            (
+                self._symbol_table.encode(value),
+                frozenset(symbol.name for symbol in self._scoped_symbols(value, scope)),
+                wrt_etas,
+                wrt_eps,
+                wrt_names,
+                target,
+            )
+            for value, scope, wrt_etas, wrt_eps, wrt_names, target in pending.values()
+        ]
+        n_chunks = min(self._options.workers, len(items))
+        # Interleaved, so that each worker defines its symbols once
+        chunks = [items[i::n_chunks] for i in range(n_chunks)]
+        with process_pool(n_chunks) as executor:
+            results = list(executor.map(_DiffWorker.of(self), chunks))
+        payloads: list[Any] = [None] * len(items)
+        for i, chunk_payloads in enumerate(results):
+            payloads[i::n_chunks] = chunk_payloads
+
+        for key, payload in zip(keys, payloads):
+            replacements, first_order, second_order = self._symbol_table.decode(payload)
+            # Intermediates are numbered by each worker, number them as the
+            # statements are
+            renamed = {
+                term: next(self._intermediates)
+                for term, _ in replacements
+                if term.name.startswith("__iv")
+            }
+            if renamed:
+                replacements, first_order, second_order = Tuple(
+                    replacements, first_order, second_order
+                ).xreplace(renamed)
+            self._prefetched[key] = self._as_reduced_derivatives(
+                [(term, expr) for term, expr in replacements],
+                [(wrt, expr) for wrt, expr in first_order],
+                [((wrt, wrt2nd), expr) for (wrt, wrt2nd), expr in second_order],
+            )
+
+    def _iter_local_assignments(
+        self, suite: cst.BaseSuite
+    ) -> Iterator[tuple[str, cst.BaseExpression, Scope]]:
+        for stmt in cst.ensure_type(suite, cst.IndentedBlock).body:
+            scope = self.get_metadata(ScopeProvider, stmt, None)
+            if scope is None:
+                continue
+            if isinstance(stmt, cst.SimpleStatementLine):
+                if len(stmt.body) != 1 or not isinstance(stmt.body[0], cst.Assign):
+                    continue
+                assign = stmt.body[0]
+                if len(assign.targets) == 1 and isinstance(
+                    assign.targets[0].target, cst.Name
+                ):
+                    yield assign.targets[0].target.value, assign.value, scope
+            elif isinstance(stmt, cst.If):
+                for branch in _if_suites(stmt):
+                    yield from self._iter_local_assignments(branch)
+
+    def _collect_dependencies(self, suite: cst.BaseSuite) -> dict[str, frozenset[str]]:
+        """
+        Find the etas, eps, compartment amounts and differentiated thetas each
+        local depends on.
+
+        The analysis is flow-insensitive: a local depends on the union of what all
+        its assignments depend on, so every assignment of a local emits the same
+        derivatives and none is left stale on another branch.
+        """
+        eta_names = [eta.name for eta in self._symbol_defs.iter_eta()]
+        theta_names = {theta.name for theta in self._iter_theta()}
+        direct: dict[str, set[str]] = {}
+        refs: dict[str, set[str]] = {}
+        for name, value, scope in self._iter_local_assignments(suite):
+            direct_deps = direct.setdefault(name, set())
+            local_refs = refs.setdefault(name, set())
+            evaluated = self._eval_value(value, scope)
+            if isinstance(evaluated, ClosedFormSolutionSolvedF):
+                direct_deps.update(eta_names)
+            elif isinstance(evaluated, Expr):
+                for symbol in evaluated.free_symbols:
+                    if isinstance(symbol, Eta | Eps) or (
+                        isinstance(symbol, Theta) and symbol.name in theta_names
+                    ):
+                        direct_deps.add(symbol.name)
+                    elif isinstance(symbol, CmtSolvedA):
+                        # Amounts depend on every eta through the ODE system
+                        direct_deps.add(symbol.name)
+                        direct_deps.update(eta_names)
+                    elif isinstance(
+                        symbol, ClosedFormSolutionSolvedF | ClosedFormSolutionSolvedA
+                    ):
+                        direct_deps.update(eta_names)
+                    elif isinstance(symbol, Symbol) and symbol.name in scope:
+                        local_refs.add(symbol.name)
+
+        dependencies = {name: set(deps) for name, deps in direct.items()}
+        changed = True
+        while changed:
+            changed = False
+            for name, local_refs in refs.items():
+                deps = dependencies[name]
+                n = len(deps)
+                for ref in local_refs:
+                    deps |= dependencies.get(ref, set())
+                changed = changed or len(deps) != n
+        return {name: frozenset(deps) for name, deps in dependencies.items()}
+
+    def _x_wrt(self, xname: str, wrt: Symbol, wrt2nd: Symbol | None = None) -> Expr:
+        """`XWrt(xname, wrt, wrt2nd)`, or 0 if `xname` can not depend on them."""
+        deps = self._dependencies.get(xname, None)
+        if deps is not None and (
+            wrt.name not in deps or (wrt2nd is not None and wrt2nd.name not in deps)
+        ):
+            return Number(0)
+        return XWrt(xname, wrt, wrt2nd)
+
+    def _eval_value(self, value: cst.BaseExpression, scope: Scope) -> Any:
+        # Assignments are evaluated by the dependency analysis first
+        if value not in self._evaluated:
+            self._evaluated[value] = self._eval(value, scope=scope)
+        return self._evaluated[value]
+
     def _do_autodiff_and_cse(
         self,
         value: Expr | float | int,
         scope: Scope,
         wrt_etas: bool = True,
         wrt_eps: bool = True,
+        target: str = "",
+        wrt_names: frozenset[str] | None = None,
+    ) -> ReducedDerivatives:
+        if self._region is not None:
+            # Reduced with the other statements of the region once it ends
+            first_order, second_order, intermediates = (
+                self._compute_derivatives_within_budget(
+                    value, scope, wrt_etas, wrt_eps, wrt_names, target
+                )
+            )
+            return self._add_cse_group(target, first_order, second_order, intermediates)
+        derivatives = self._lookup_autodiff_and_cse(
+            value, scope, wrt_etas, wrt_eps, wrt_names, target
+        )
+        if self._pending is None:
+            profile_cse(target, len(derivatives.cse_stmts))
+        return derivatives
+
+    def _lookup_autodiff_and_cse(
+        self,
+        value: Expr | float | int,
+        scope: Scope,
+        wrt_etas: bool,
+        wrt_eps: bool,
+        wrt_names: frozenset[str] | None,
+        target: str,
+    ) -> ReducedDerivatives:
+        if self._memo is None and self._pending is None and not self._prefetched:
+            return self._compute_autodiff_and_cse(
+                value, scope, wrt_etas, wrt_eps, wrt_names, target
+            )
+
+        in_scope: frozenset[tuple[str, frozenset[str] | None]] = frozenset()
+        if isinstance(value, Expr):
+            in_scope = frozenset(
+                (symbol.name, self._dependencies.get(symbol.name, None))
+                for symbol in value.free_symbols
+                if isinstance(symbol, Symbol) and symbol.name in scope
+            )
+        key = (value, in_scope, wrt_etas, wrt_eps, wrt_names)
+        if self._pending is not None:
+            # Dry run of `_prefetch_derivatives`
+            if isinstance(value, Expr) and (
+                self._memo is None or key not in self._memo
+            ):
+                self._pending.setdefault(
+                    key, (value, scope, wrt_etas, wrt_eps, wrt_names, target)
+                )
+            return ReducedDerivatives(cse_stmts=[], first_order=[], second_order=[])
+
+        if self._memo is not None:
+            derivatives = self._memo.get(key)
+            if derivatives is not None:
+                profile_count("memo_hits")
+                return derivatives
+        derivatives = self._prefetched.get(key, None)
+        if derivatives is None:
+            derivatives = self._compute_autodiff_and_cse(
+                value, scope, wrt_etas, wrt_eps, wrt_names, target
+            )
+        if self._memo is not None:
+            self._memo.put(key, derivatives)
+        return derivatives
+
+    def _compute_autodiff_and_cse(
+        self,
+        value: Expr | float | int,
+        scope: Scope,
+        wrt_etas: bool = True,
+        wrt_eps: bool = True,
+        wrt_names: frozenset[str] | None = None,
+        target: str = "",
     ) -> ReducedDerivatives:
+        """Differentiate `value` and reduce the derivatives by CSE."""
+        return self._as_reduced_derivatives(
+            *self._reduce_derivatives(
+                value, scope, wrt_etas, wrt_eps, wrt_names, target
+            )
+        )
+
+    def _reduce_derivatives(
+        self,
+        value: Expr | float | int,
+        scope: Scope | frozenset[str],
+        wrt_etas: bool = True,
+        wrt_eps: bool = True,
+        wrt_names: frozenset[str] | None = None,
+        target: str = "",
+    ) -> tuple[
+        list[tuple[Symbol, Expr]],
+        list[FirstOrderDerivative],
+        list[SecondOrderDerivative],
+    ]:
+        """
+        Derivatives of `value` reduced by CSE, with the intermediates and the
+        common subexpressions they read.
+        """
+        first_order_derivatives, second_order_derivatives, intermediates = (
+            self._compute_derivatives_within_budget(
+                value, scope, wrt_etas, wrt_eps, wrt_names, target
+            )
+        )
+
+        # Perform common subexpression elimination (CSE) on the first order derivatives
+        replacements, reductions = self._backend.cse(
+            [expr for _, expr in [*first_order_derivatives, *second_order_derivatives]],
+            symbols=numbered_symbols(prefix="__"),
+        )
+
+        # Update the derivatives with the reduced expressions
+        i = 0
+        for ii in range(len(first_order_derivatives)):
+            first_order_derivatives[ii] = (
+                first_order_derivatives[ii][0],
+                reductions[i],
+            )
+            i += 1
+        for jj in range(len(second_order_derivatives)):
+            second_order_derivatives[jj] = (
+                second_order_derivatives[jj][0],
+                reductions[i],
+            )
+            i += 1
+
+        return (
+            [*intermediates, *replacements],
+            first_order_derivatives,
+            second_order_derivatives,
+        )
+
+    def _compute_derivatives_within_budget(
+        self,
+        value: Expr | float | int,
+        scope: Scope | frozenset[str],
+        wrt_etas: bool,
+        wrt_eps: bool,
+        wrt_names: frozenset[str] | None,
+        target: str,
+    ) -> tuple[
+        list[FirstOrderDerivative],
+        list[SecondOrderDerivative],
+        list[tuple[Symbol, Expr]],
+    ]:
+        """
+        `_compute_derivatives`, through intermediates if a derivative exceeds
+        `AutoDiffOptions.op_budget`. Returns the intermediates with the
+        derivatives, in the order they are assigned.
+        """
+        try:
+            first_order, second_order = self._compute_derivatives(
+                value, scope, wrt_etas, wrt_eps, wrt_names
+            )
+            return first_order, second_order, []
+        except _OpBudgetExceeded as exceeded:
+            logger.warning(
+                "[MTran::autodiff] Derivative of %s wrt %s has %d ops, over the "
+                "budget of %d, splitting the statement into intermediate variables",
+                target,
+                ", ".join(wrt.name for wrt in exceeded.wrt),
+                exceeded.ops,
+                self._options.op_budget,
+            )
+            profile_count("op_budget_exceeded")
+        split = _Intermediates(
+            self._diff_cache.diff, _INTERMEDIATE_OPS, self._intermediates
+        )
+        first_order, second_order = self._compute_derivatives(
+            value, scope, wrt_etas, wrt_eps, wrt_names, split=split
+        )
+        profile_count("intermediate_variables", len(split.definitions))
+        return first_order, second_order, split.definitions
+
+    def _as_reduced_derivatives(
+        self,
+        replacements: list[tuple[Symbol, Expr]],
+        first_order: list[FirstOrderDerivative],
+        second_order: list[SecondOrderDerivative],
+    ) -> ReducedDerivatives:
+        return ReducedDerivatives(
+            cse_stmts=[
+                self._temporary_assignment(sub_expr_term, sub_expr)
+                for sub_expr_term, sub_expr in replacements
+            ],
+            first_order=first_order,
+            second_order=second_order,
+        )
+
+    @staticmethod
+    def _temporary_assignment(term: Symbol, expr: Expr) -> cst.BaseStatement:
+        return cst.SimpleStatementLine(
+            body=[
+                cst.Assign(
+                    targets=[cst.AssignTarget(target=cst.Name(term.name))],
+                    value=parse_sympy_expr(expr),
+                )
+            ]
+        )
+
+    def _second_order_block(
+        self, body: list[cst.BaseStatement]
+    ) -> list[cst.BaseStatement]:
+        """`if __SECOND_ORDER:` block, left out below `AutoDiffOptions.order` 2."""
+        if self._options.order < 2:
+            return []
+        return [
+            cst.If(
+                test=cst.Name(SECOND_ORDER.name),
+                body=cst.IndentedBlock(body=body),
+            )
+        ]
+
+    @staticmethod
+    def _scoped_symbols(value: Expr, scope: Scope | frozenset[str]) -> list[Symbol]:
+        """Free symbols of `value` naming in-scope variables, or the given names,
+        sorted by name so that the chain rule does not depend on hashing."""
+        return sorted(
+            (
+                symbol
+                for symbol in value.free_symbols
+                if isinstance(symbol, Symbol) and symbol.name in scope
+            ),
+            key=lambda symbol: symbol.name,
+        )
+
+    def _compute_derivatives(
+        self,
+        value: Expr | float | int,
+        scope: Scope | frozenset[str],
+        wrt_etas: bool = True,
+        wrt_eps: bool = True,
+        wrt_names: frozenset[str] | None = None,
+        split: _Intermediates | None = None,
+    ) -> tuple[list[FirstOrderDerivative], list[SecondOrderDerivative]]:
+        """
+        Differentiate `value` w.r.t. etas, eps, compartment amounts and thetas.
+
+        Only derivatives w.r.t. `wrt_names` are computed if given, the other ones
+        are structurally zero. `value` is differentiated through the intermediates
+        of `split` if given, else `_OpBudgetExceeded` is raised once a derivative
+        exceeds `AutoDiffOptions.op_budget`.
+        """
         first_order_derivatives: list[FirstOrderDerivative] = []
         second_order_derivatives: list[SecondOrderDerivative] = []
+        hits, misses = self._diff_cache.hits, self._diff_cache.misses
+        diff = self._diff_cache.diff if split is None else split.diff
+        budget = self._options.op_budget if split is None else None
+        ops: dict[Basic, int] = {}
+
+        def check(wrt: tuple[Symbol, ...], expr: Expr) -> None:
+            if budget is not None and _tree_ops(expr, ops) > budget:
+                raise _OpBudgetExceeded(wrt, _tree_ops(expr, ops))
+
+        if budget is not None:
+            cached_diff = diff
+
+            def diff(expr: Expr, wrt: Basic, wrt2nd: Basic | None = None) -> Expr:
+                # The partials are checked too, before they are chained
+                partial = cached_diff(expr, wrt, wrt2nd)
+                check((wrt,) if wrt2nd is None else (wrt, wrt2nd), partial)
+                return partial
 
         if isinstance(value, Expr):
-            wrt_symbols: list[Eta | Eps] = []
+            # Locals the chain rule goes through
+            scoped = self._scoped_symbols(value, scope)
+            if split is not None:
+                value = split.split(value)
+            wrt_symbols: list[Eta | Eps | Theta] = []
             if wrt_etas:
                 wrt_symbols.extend(self._symbol_defs.iter_eta())
             if wrt_eps:
                 wrt_symbols.extend(self._symbol_defs.iter_eps())
+            if wrt_etas:
+                wrt_symbols.extend(self._iter_theta())
+            cmts = list(self._symbol_defs.iter_cmt())
+            if wrt_names is not None:
+                wrt_symbols = [wrt for wrt in wrt_symbols if wrt.name in wrt_names]
+                cmts = [cmt for cmt in cmts if cmt.A.name in wrt_names]
 
             for i, wrt in enumerate(wrt_symbols):
                 # Z wrt η/ε
-                value_wrt_var = value.diff(wrt)
+                value_wrt_var = diff(value, wrt)
 
                 if isinstance(wrt, Eta):
                     # Only chained when wrt is η
                     if issubclass(self._module_cls, OdeModule):
                         # chained 1a, ∂Z/∂A(i) * ∂A(i)/∂η
                         for cmt in self._symbol_defs.iter_cmt():
-                            value_wrt_var += value.diff(cmt.A) * CmtSolvedAWrt(
+                            value_wrt_var += diff(value, cmt.A) * CmtSolvedAWrt(
                                 cmt=cmt, wrt=wrt
                             )
                     elif issubclass(self._module_cls, ClosedFormSolutionModule):
                         # chained 1b, ∂Z/∂F * ∂F/∂η
-                        value_wrt_var += value.diff(
-                            ClosedFormSolutionSolvedF()
+                        value_wrt_var += diff(
+                            value, ClosedFormSolutionSolvedF()
                         ) * ClosedFormSolutionSolvedFWrt(wrt=wrt)
                         n_cmt = get_annotated_meta(self._module_cls).n_cmt
                         for cmt_index in range(n_cmt):
                             # chained 1c, ∂Z/∂A(i) * ∂A(i)/∂η
-                            value_wrt_var += value.diff(
-                                ClosedFormSolutionSolvedA(index=cmt_index)
+                            value_wrt_var += diff(
+                                value, ClosedFormSolutionSolvedA(index=cmt_index)
                             ) * ClosedFormSolutionSolvedAWrt(index=cmt_index, wrt=wrt)
 
                 # chained arbitrary symbols
-                for symbol in value.free_symbols:
-                    if isinstance(symbol, Symbol) and symbol.name in scope:
-                        # Z wrt x
-                        value_wrt_x = value.diff(symbol)
-                        # chained 2a, ∂Z/∂x * ∂x/∂η(ε)
-                        value_wrt_var += value_wrt_x * XWrt(symbol.name, wrt)
-                        if isinstance(wrt, Eta):
-                            if issubclass(self._module_cls, OdeModule):
-                                for cmt in self._symbol_defs.iter_cmt():
-                                    # chained 2b, ∂Z/∂x * ∂x/∂A(i) * ∂A(i)/∂η
-                                    value_wrt_var += (
-                                        value_wrt_x
-                                        * XWrt(symbol.name, cmt.A)
-                                        * CmtSolvedAWrt(cmt=cmt, wrt=wrt)
-                                    )
+                for symbol in scoped:
+                    # Z wrt x
+                    value_wrt_x = diff(value, symbol)
+                    # chained 2a, ∂Z/∂x * ∂x/∂η(ε)
+                    value_wrt_var += value_wrt_x * self._x_wrt(symbol.name, wrt)
+                    if isinstance(wrt, Eta):
+                        if issubclass(self._module_cls, OdeModule):
+                            for cmt in self._symbol_defs.iter_cmt():
+                                # chained 2b, ∂Z/∂x * ∂x/∂A(i) * ∂A(i)/∂η
+                                value_wrt_var += (
+                                    value_wrt_x
+                                    * self._x_wrt(symbol.name, cmt.A)
+                                    * CmtSolvedAWrt(cmt=cmt, wrt=wrt)
+                                )
 
+                check((wrt,), value_wrt_var)
                 first_order_derivatives.append((wrt, value_wrt_var))
 
-                for j, wrt2nd in enumerate(wrt_symbols):
+                for j, wrt2nd in enumerate(
+                    wrt_symbols if self._options.order > 1 else []
+                ):
                     if isinstance(wrt, Eta):
                         deriv_2nd = None
                         # ∂²Z/∂ηᵢ∂ηⱼ
@@ -259,7 +1271,8 @@ class AutoDiffTransformer(cst.CSTTransformer):
                                         value=value,
                                         wrt=wrt,
                                         wrt2nd=wrt2nd,
-                                        scope=scope,
+                                        scoped=scoped,
+                                        diff=diff,
                                     )
                                 )
                             elif issubclass(self._module_cls, ClosedFormSolutionModule):
@@ -267,92 +1280,236 @@ class AutoDiffTransformer(cst.CSTTransformer):
                                     value=value,
                                     wrt=wrt,
                                     wrt2nd=wrt2nd,
-                                    scope=scope,
+                                    scoped=scoped,
+                                    diff=diff,
                                 )
                         # ∂²Z/∂∂ηᵢ∂εⱼ
                         elif isinstance(wrt2nd, Eps):
-                            deriv_2nd = value_wrt_var.diff(wrt2nd)
-                            for symbol in value.free_symbols:
-                                if isinstance(symbol, Symbol) and symbol.name in scope:
-                                    deriv_2nd += value_wrt_var.diff(symbol) * XWrt(
-                                        symbol.name, wrt2nd
-                                    )
-
-                        if deriv_2nd is not None:
-                            second_order_derivatives.append(
-                                (
-                                    (wrt, wrt2nd),
-                                    deriv_2nd,
+                            deriv_2nd = diff(value_wrt_var, wrt2nd)
+                            for symbol in scoped:
+                                deriv_2nd += diff(value_wrt_var, symbol) * self._x_wrt(
+                                    symbol.name, wrt2nd
                                 )
+
+                    elif isinstance(wrt, Theta) and isinstance(wrt2nd, Eta):
+                        # ∂²Z/∂θᵢ∂ηⱼ, including ∂Z/∂x * ∂²x/∂θᵢ∂ηⱼ
+                        deriv_2nd = diff(value_wrt_var, wrt2nd)
+                        for symbol in scoped:
+                            deriv_2nd += diff(value_wrt_var, symbol) * self._x_wrt(
+                                symbol.name, wrt2nd
+                            ) + diff(value, symbol) * self._x_wrt(
+                                symbol.name, wrt, wrt2nd
+                            )
+                    else:
+                        deriv_2nd = None
+
+                    if deriv_2nd is not None:
+                        check((wrt, wrt2nd), deriv_2nd)
+                        second_order_derivatives.append(
+                            (
+                                (wrt, wrt2nd),
+                                deriv_2nd,
                             )
+                        )
 
             # if Ode, we also need to compute derivatives w.r.t. A(i)
             if issubclass(self._module_cls, OdeModule):
-                for cmt in self._symbol_defs.iter_cmt():
+                for cmt in cmts:
                     # Z wrt A(i)
-                    value_wrt_Ai = value.diff(cmt.A)
-                    for symbol in value.free_symbols:
-                        if isinstance(symbol, Symbol) and symbol.name in scope:
-                            # chained, ∂Z/∂x * ∂x/∂A(i)
-                            value_wrt_Ai += value.diff(symbol) * XWrt(
-                                symbol.name, cmt.A
-                            )
+                    value_wrt_Ai = diff(value, cmt.A)
+                    for symbol in scoped:
+                        # chained, ∂Z/∂x * ∂x/∂A(i)
+                        value_wrt_Ai += diff(value, symbol) * self._x_wrt(
+                            symbol.name, cmt.A
+                        )
+                    check((cmt.A,), value_wrt_Ai)
                     first_order_derivatives.append((cmt.A, value_wrt_Ai))
 
-        # Perform common subexpression elimination (CSE) on the first order derivatives
-        replacements, reductions = cse(
-            exprs=[
-                expr
-                for _, expr in [*first_order_derivatives, *second_order_derivatives]
-            ],
-            symbols=numbered_symbols(prefix="__"),
-            list=True,
-        )
-        if not isinstance(reductions, list):
-            raise NotImplementedError()
-        sub_expr_term: Symbol
-        sub_expr: Expr
-        replacement_assignments: list[cst.BaseStatement] = []
-        for sub_expr_term, sub_expr in replacements:
-            replacement_assignments.append(
-                cst.SimpleStatementLine(
-                    body=[
-                        cst.Assign(
-                            targets=[
-                                cst.AssignTarget(target=cst.Name(sub_expr_term.name))
-                            ],
-                            value=parse_sympy_expr(sub_expr),
-                        )
-                    ]
-                )
+        if is_profiling():
+            profile_count("diff_cache_hits", self._diff_cache.hits - hits)
+            profile_count("diff_cache_misses", self._diff_cache.misses - misses)
+            profile_count("derivatives", len(first_order_derivatives))
+            profile_count("derivatives", len(second_order_derivatives))
+            profile_count(
+                "sympy_ops",
+                sum(
+                    count_ops(expr)
+                    for _, expr in [*first_order_derivatives, *second_order_derivatives]
+                ),
             )
+        return first_order_derivatives, second_order_derivatives
 
-        # Update the derivatives with the reduced expressions
-        i = 0
-        for ii in range(len(first_order_derivatives)):
-            first_order_derivatives[ii] = (
-                first_order_derivatives[ii][0],
-                reductions[i],
-            )
-            i += 1
-        for jj in range(len(second_order_derivatives)):
-            second_order_derivatives[jj] = (
-                second_order_derivatives[jj][0],
-                reductions[i],
-            )
-            i += 1
+    def _add_cse_group(
+        self,
+        target: str,
+        first_order: list[FirstOrderDerivative],
+        second_order: list[SecondOrderDerivative],
+        intermediates: list[tuple[Symbol, Expr]],
+    ) -> ReducedDerivatives:
+        """
+        Defer the CSE of the derivatives of a statement to the end of the region.
 
+        The derivatives are emitted as slots and the temporaries as a marker
+        statement, both are filled by `_reduce_cse_region`. The intermediates of
+        `_compute_derivatives_within_budget` are assigned before the marker.
+        """
+        assert self._region is not None
+        index = self._n_groups
+        self._n_groups += 1
+        group = _CSEGroup(target=target, marker=f"__cse{index}__", slots=[], exprs=[])
+        reduced: list[list[Any]] = [[], []]
+        for derivatives, out in [(first_order, reduced[0]), (second_order, reduced[1])]:
+            for wrt, expr in derivatives:
+                # Temporaries hoisted by previous regions are reused
+                expr = expr.xreplace(self._available)
+                self._region.reads |= _reads(expr)
+                slot = Symbol(f"__cse{index}_{len(group.slots)}__")
+                group.slots.append(slot)
+                group.exprs.append(self._region.versioned(expr))
+                out.append((wrt, slot))
+        self._region.groups.append(group)
         return ReducedDerivatives(
-            cse_stmts=replacement_assignments,
-            first_order=first_order_derivatives,
-            second_order=second_order_derivatives,
+            cse_stmts=[
+                *(
+                    self._temporary_assignment(term, expr)
+                    for term, expr in intermediates
+                ),
+                cst.SimpleStatementLine(body=[cst.Expr(cst.Name(group.marker))]),
+            ],
+            first_order=reduced[0],
+            second_order=reduced[1],
         )
 
+    def _reduce_cse_region(
+        self, region: _CSERegion, body: list[cst.BaseStatement]
+    ) -> list[cst.BaseStatement]:
+        """
+        Reduce the derivatives of a region by CSE and fill them in `body`.
+
+        Each temporary is assigned right before the derivatives of the first
+        statement reading it. Temporaries reading the last values of the locals are
+        made available to the following regions.
+        """
+        if not region.groups:
+            return body
+        restored = {
+            renamed: symbol for renamed, (symbol, _, _) in region.renamed.items()
+        }
+        expansions: dict[Symbol, Basic] = {}
+        replacements, reductions = self._backend.cse(
+            [expr for group in region.groups for expr in group.exprs],
+            symbols=self._temporaries,
+        )
+        # Negated atoms shared across statements cost more than they save
+        negations: dict[Basic, Basic] = {}
+        kept: list[tuple[Symbol, Expr]] = []
+        for term, sub_expr in replacements:
+            sub_expr = sub_expr.xreplace(negations)
+            if (
+                sub_expr.is_Mul
+                and len(sub_expr.args) == 2
+                and sub_expr.args[0] == -1
+                and sub_expr.args[1].is_Atom
+            ):
+                negations[term] = sub_expr
+            else:
+                kept.append((term, sub_expr))
+        if negations:
+            replacements = kept
+            reductions = [expr.xreplace(negations) for expr in reductions]
+        definitions: dict[Symbol, Expr] = dict(replacements)
+
+        slots: dict[str, cst.BaseExpression] = {}
+        temporaries: dict[str, list[cst.BaseStatement]] = {}
+        assigned: set[Symbol] = set()
+        i = 0
+        for group in region.groups:
+            reduced = reductions[i : i + len(group.exprs)]
+            i += len(group.exprs)
+            for slot, expr in zip(group.slots, reduced):
+                slots[slot.name] = parse_sympy_expr(expr.xreplace(restored))
+
+            # Temporaries read by the group, directly or through other ones
+            needed: set[Symbol] = set()
+            stack = [t for expr in reduced for t in expr.free_symbols]
+            while stack:
+                term = stack.pop()
+                if term in definitions and term not in needed | assigned:
+                    needed.add(term)
+                    stack.extend(definitions[term].free_symbols)
+            assigned |= needed
+
+            stmts: list[cst.BaseStatement] = []
+            for term, sub_expr in replacements:
+                if term in needed:
+                    stmts.append(
+                        self._temporary_assignment(term, sub_expr.xreplace(restored))
+                    )
+                    expansion = sub_expr.xreplace(expansions).xreplace(self._expansions)
+                    expansions[term] = expansion
+                    self._expansions[term] = expansion.xreplace(restored)
+                    if region.is_current(expansion):
+                        self._available[self._expansions[term]] = term
+            temporaries[group.marker] = stmts
+            profile_cse(group.target, len(stmts))
+
+        filler = _CSESlotFiller(slots=slots, temporaries=temporaries)
+        filled: list[cst.BaseStatement] = []
+        for stmt in body:
+            updated = stmt.visit(filler)
+            if isinstance(updated, cst.FlattenSentinel):
+                filled.extend(updated)
+            elif isinstance(updated, cst.BaseStatement):
+                filled.append(updated)
+        return filled
+
+    def _invalidate_available(self, writes: set[str]) -> None:
+        """Forget the hoisted temporaries reading any of `writes`."""
+        if not writes:
+            return
+        self._available = {
+            expansion: term
+            for expansion, term in self._available.items()
+            if not _reads(expansion) & writes
+        }
+
+    def _statement_writes(self, stmt: cst.BaseStatement, scope: Scope) -> set[str]:
+        """Locals assigned by `stmt`, `__solve__` if it solves the amounts."""
+        writes: set[str] = set()
+        values: list[tuple[cst.BaseExpression, Scope]] = []
+        if isinstance(stmt, cst.If):
+            for suite in _if_suites(stmt):
+                for name, value, value_scope in self._iter_local_assignments(suite):
+                    writes.add(name)
+                    values.append((value, value_scope))
+        elif isinstance(stmt, cst.SimpleStatementLine) and len(stmt.body) == 1:
+            small_stmt = stmt.body[0]
+            if isinstance(small_stmt, cst.Assign):
+                for target in small_stmt.targets:
+                    if isinstance(target.target, cst.Name):
+                        writes.add(target.target.value)
+                values.append((small_stmt.value, scope))
+            elif isinstance(small_stmt, cst.Return) and small_stmt.value is not None:
+                values.append((small_stmt.value, scope))
+        for value, value_scope in values:
+            if isinstance(
+                self._eval_value(value, value_scope), ClosedFormSolutionSolvedF
+            ):
+                writes.add(ClosedFormSolveCall.name)
+        return writes
+
     def _autodiff_arbitrary_x(
         self, x_name: str, value: Expr, scope: Scope
     ) -> list[cst.BaseStatement]:
         stmts: list[cst.BaseStatement] = []
-        derivatives = self._do_autodiff_and_cse(value=value, scope=scope)
+        wrt_names = self._dependencies.get(x_name, None)
+        if self._options.order == 0 or (wrt_names is not None and not wrt_names):
+            # No derivatives, or depends on no eta, eps or amount so that all
+            # derivatives are zero
+            return stmts
+        derivatives = self._do_autodiff_and_cse(
+            value=value, scope=scope, target=x_name, wrt_names=wrt_names
+        )
         stmts.extend(derivatives.cse_stmts)
         for wrt, expr in derivatives.first_order:
             stmts.append(
@@ -377,8 +1534,10 @@ class AutoDiffTransformer(cst.CSTTransformer):
             )
         second_order_body: list[cst.BaseStatement] = []
         for (wrt, wrt2nd), expr in derivatives.second_order:
-            if isinstance(wrt, Eta) and isinstance(wrt2nd, Eps):
-                # ∂²Z/∂εᵢ∂ηⱼ should be compute on __FIRST_ORDER
+            if isinstance(wrt, Theta) or (
+                isinstance(wrt, Eta) and isinstance(wrt2nd, Eps)
+            ):
+                # ∂²Z/∂εᵢ∂ηⱼ and ∂²Z/∂θᵢ∂ηⱼ should be compute on __FIRST_ORDER
                 parent = stmts
             else:
                 parent = second_order_body
@@ -404,19 +1563,18 @@ class AutoDiffTransformer(cst.CSTTransformer):
                     comment=f"# mtran: {x_name} wrt {wrt.name}, {wrt2nd.name}",
                 )
             )
-        stmts.append(
-            cst.If(
-                test=cst.Name(SECOND_ORDER.name),
-                body=cst.IndentedBlock(body=second_order_body),
-            )
-        )
+        stmts.extend(self._second_order_block(second_order_body))
         return stmts
 
     def _autodiff_dAdt(
         self, dAdt: CmtDADt, value: Expr, scope: Scope
     ) -> list[cst.BaseStatement]:
         stmts: list[cst.BaseStatement] = []
-        derivatives = self._do_autodiff_and_cse(value=value, scope=scope, wrt_eps=False)
+        if self._options.order == 0:
+            return stmts
+        derivatives = self._do_autodiff_and_cse(
+            value=value, scope=scope, wrt_eps=False, target=dAdt.name
+        )
         stmts.extend(derivatives.cse_stmts)
         for wrt, expr in derivatives.first_order:
             stmts.append(
@@ -472,12 +1630,7 @@ class AutoDiffTransformer(cst.CSTTransformer):
                 )
             )
 
-        stmts.append(
-            cst.If(
-                test=cst.Name(SECOND_ORDER.name),
-                body=cst.IndentedBlock(body=second_order_body),
-            )
-        )
+        stmts.extend(self._second_order_block(second_order_body))
         return stmts
 
     def _autodiff_closed_form_solve_args(
@@ -505,9 +1658,11 @@ class AutoDiffTransformer(cst.CSTTransformer):
                     ]
                 )
             )
+            if self._options.order == 0:
+                continue
 
             derivatives = self._do_autodiff_and_cse(
-                value=expr, scope=scope, wrt_eps=False
+                value=expr, scope=scope, wrt_eps=False, target=arg.param_name
             )
 
             stmts.extend(derivatives.cse_stmts)
@@ -562,12 +1717,7 @@ class AutoDiffTransformer(cst.CSTTransformer):
                         comment=f"# mtran: {arg.param_name} wrt {wrt.name}, {wrt2nd.name}",
                     )
                 )
-            first_order_body.append(
-                cst.If(
-                    test=cst.Name(SECOND_ORDER.name),
-                    body=cst.IndentedBlock(body=second_order_body),
-                )
-            )
+            first_order_body.extend(self._second_order_block(second_order_body))
 
             stmts.append(
                 cst.If(
@@ -602,9 +1752,11 @@ class AutoDiffTransformer(cst.CSTTransformer):
                     ]
                 )
             )
+            if self._options.order == 0:
+                continue
 
             derivatives = self._do_autodiff_and_cse(
-                value=expr, scope=scope, wrt_eps=False
+                value=expr, scope=scope, wrt_eps=False, target=arg.param_name
             )
 
             stmts.extend(derivatives.cse_stmts)
@@ -658,12 +1810,7 @@ class AutoDiffTransformer(cst.CSTTransformer):
                         comment=f"# mtran: {arg.param_name} wrt {wrt.name}, {wrt2nd.name}",
                     )
                 )
-            first_order_body.append(
-                cst.If(
-                    test=cst.Name(SECOND_ORDER.name),
-                    body=cst.IndentedBlock(body=second_order_body),
-                )
-            )
+            first_order_body.extend(self._second_order_block(second_order_body))
             stmts.append(
                 cst.If(
                     test=cst.Name(FIRST_ORDER.name),
@@ -689,7 +1836,7 @@ class AutoDiffTransformer(cst.CSTTransformer):
         target = targets[0].target
         # Evaluate the value of the assignment
         value = assign.value
-        evaluated_value = self._eval(value, scope=scope)
+        evaluated_value = self._eval_value(value, scope=scope)
         transformed: list[cst.BaseStatement] = []
         first_order_body: list[cst.BaseStatement] = []
         if isinstance(evaluated_value, ClosedFormSolutionSolvedF):
@@ -826,7 +1973,7 @@ class AutoDiffTransformer(cst.CSTTransformer):
                 return_,
                 source_code=self._source_code,
             )
-        evaluated_value = self._eval(value, scope=scope)
+        evaluated_value = self._eval_value(value, scope=scope)
         transformed: list[cst.BaseStatement] = []
         if isinstance(evaluated_value, ClosedFormSolutionSolvedF):
             transformed.extend(
@@ -840,103 +1987,93 @@ class AutoDiffTransformer(cst.CSTTransformer):
                 )
             )
 
-        y_type = 0
-        if isinstance(evaluated_value, YValue):
-            y_type = evaluated_value.flag
-            evaluated_value = evaluated_value.expr
-
-        transformed.extend(
-            [
-                cst.SimpleStatementLine(
-                    body=[
-                        cst.Assign(
-                            targets=[
-                                cst.AssignTarget(target=YType().as_cst_expression())
-                            ],
-                            value=cst.Integer(value=str(y_type)),
-                        )
-                    ]
-                ),
-                cst.SimpleStatementLine(
-                    body=[
-                        cst.Assign(
-                            targets=[cst.AssignTarget(target=Y().as_cst_expression())],
-                            value=parse_sympy_expr(evaluated_value),
-                        )
-                    ]
-                ),
-            ]
-        )
+        y_stmts, evaluated_value = self._assign_y(evaluated_value)
+        transformed.extend(y_stmts)
 
         first_order_body: list[cst.BaseStatement] = []
-        if isinstance(evaluated_value, Expr):
-            derivatives = self._do_autodiff_and_cse(value=evaluated_value, scope=scope)
+        if isinstance(evaluated_value, Expr) and self._options.order > 0:
+            derivatives = self._do_autodiff_and_cse(
+                value=evaluated_value, scope=scope, target="__Y__"
+            )
             first_order_body.extend(derivatives.cse_stmts)
             for wrt, expr in derivatives.first_order:
-                first_order_body.append(
-                    with_trailing_comment(
-                        cst.SimpleStatementLine(
-                            body=[
-                                cst.Assign(
-                                    targets=[
-                                        cst.AssignTarget(
-                                            target=cst.ensure_type(
-                                                YWrt(wrt).as_cst_expression(),
-                                                cst.BaseAssignTargetExpression,
-                                            )
-                                        )
-                                    ],
-                                    value=parse_sympy_expr(expr),
-                                )
-                            ],
-                        ),
-                        comment=f"# mtran: __Y__ wrt {wrt.name}",
-                    )
-                )
+                first_order_body.append(self._assign_y_wrt(expr, wrt))
             second_order_body: list[cst.BaseStatement] = []
             for (wrt, wrt2nd), expr in derivatives.second_order:
-                if isinstance(wrt, Eta) and isinstance(wrt2nd, Eps):
-                    # ∂²Z/∂εᵢ∂ηⱼ should be compute on __FIRST_ORDER
+                if isinstance(wrt, Theta) or (
+                    isinstance(wrt, Eta) and isinstance(wrt2nd, Eps)
+                ):
+                    # ∂²Z/∂εᵢ∂ηⱼ and ∂²Z/∂θᵢ∂ηⱼ should be compute on __FIRST_ORDER
                     parent = first_order_body
                 else:
                     parent = second_order_body
 
-                parent.append(
-                    with_trailing_comment(
-                        cst.SimpleStatementLine(
-                            body=[
-                                cst.Assign(
-                                    targets=[
-                                        cst.AssignTarget(
-                                            target=cst.ensure_type(
-                                                YWrt(wrt, wrt2nd).as_cst_expression(),
-                                                cst.BaseAssignTargetExpression,
-                                            )
-                                        )
-                                    ],
-                                    value=parse_sympy_expr(expr),
-                                )
-                            ],
-                        ),
-                        comment=f"# mtran: __Y__ wrt {wrt.name}, {wrt2nd.name}",
-                    )
-                )
-            first_order_body.append(
+                parent.append(self._assign_y_wrt(expr, wrt, wrt2nd))
+            first_order_body.extend(self._second_order_block(second_order_body))
+
+        if self._options.order > 0:
+            transformed.append(
                 cst.If(
-                    test=cst.Name(SECOND_ORDER.name),
-                    body=cst.IndentedBlock(body=second_order_body),
+                    test=cst.Name(FIRST_ORDER.name),
+                    body=cst.IndentedBlock(body=first_order_body),
                 )
             )
-
-        transformed.append(
-            cst.If(
-                test=cst.Name(FIRST_ORDER.name),
-                body=cst.IndentedBlock(body=first_order_body),
-            )
-        )
         transformed.append(cst.SimpleStatementLine(body=[cst.Return()]))
         return transformed
 
+    @staticmethod
+    def _assign_y(evaluated_value: Any) -> tuple[list[cst.BaseStatement], Any]:
+        """Assign the type and value of the prediction, unwrapping `YValue`."""
+        y_type = 0
+        if isinstance(evaluated_value, YValue):
+            y_type = evaluated_value.flag
+            evaluated_value = evaluated_value.expr
+
+        return [
+            cst.SimpleStatementLine(
+                body=[
+                    cst.Assign(
+                        targets=[cst.AssignTarget(target=YType().as_cst_expression())],
+                        value=cst.Integer(value=str(y_type)),
+                    )
+                ]
+            ),
+            cst.SimpleStatementLine(
+                body=[
+                    cst.Assign(
+                        targets=[cst.AssignTarget(target=Y().as_cst_expression())],
+                        value=parse_sympy_expr(evaluated_value),
+                    )
+                ]
+            ),
+        ], evaluated_value
+
+    @staticmethod
+    def _assign_y_wrt(
+        expr: Expr, wrt: Symbol, wrt2nd: Symbol | None = None
+    ) -> cst.BaseStatement:
+        comment = f"# mtran: __Y__ wrt {wrt.name}"
+        if wrt2nd is not None:
+            comment += f", {wrt2nd.name}"
+        return with_trailing_comment(
+            cst.SimpleStatementLine(
+                body=[
+                    cst.Assign(
+                        targets=[
+                            cst.AssignTarget(
+                                target=cst.ensure_type(
+                                    YWrt(wrt, wrt2nd).as_cst_expression(),
+                                    cst.BaseAssignTargetExpression,
+                                )
+                            )
+                        ],
+                        value=parse_sympy_expr(expr),
+                    )
+                ],
+            ),
+            comment=comment,
+        )
+
     def _autodiff_transform_If(
         self, if_: cst.If, scope: Scope
     ) -> list[cst.BaseStatement]:
@@ -944,33 +2081,58 @@ class AutoDiffTransformer(cst.CSTTransformer):
         Handle the if statement for automatic differentiation.
         This method is called when an if statement is encountered.
         """
-        transformed: list[cst.BaseStatement] = []
+        return [self._transform_if_chain(if_)]
+
+    def _transform_if_chain(self, if_: cst.If) -> cst.If:
+        """Differentiate the branches of `if_`, down its `elif` chain."""
+        # Temporaries hoisted in a branch are not available in the other one
+        available = self._available
+        self._available = dict(available)
         updated_stmt = if_.with_changes(
             body=self._transform_Suite(if_.body),
         )
 
-        if if_.orelse:
+        if isinstance(if_.orelse, cst.If):
+            self._available = dict(available)
+            updated_stmt = updated_stmt.with_changes(
+                orelse=self._transform_if_chain(if_.orelse)
+            )
+        elif if_.orelse:
+            self._available = dict(available)
             updated_stmt = updated_stmt.with_changes(
                 orelse=if_.orelse.with_changes(
                     body=self._transform_Suite(if_.orelse.body),
                 )
             )
-            transformed.append(updated_stmt)
-        else:
-            transformed.append(updated_stmt)
-
-        return transformed
+        self._available = available
+        return updated_stmt
 
     def _transform_Suite(self, suite: cst.BaseSuite) -> cst.BaseSuite:
         """
         Leave a suite node and return the updated node.
         """
         new_body: list[cst.BaseStatement] = []
+        outer_region = self._region
+        region_start = 0
+        if self._options.global_cse:
+            self._region = _CSERegion()
         for stmt in cst.ensure_type(suite, cst.IndentedBlock).body:
             scope = self.get_metadata(ScopeProvider, stmt, None)
             if scope is None:
                 new_body.append(stmt)
                 continue
+            if self._region is not None:
+                writes = self._statement_writes(stmt, scope)
+                if isinstance(stmt, cst.If):
+                    # End of the straight-line region
+                    new_body[region_start:] = self._reduce_cse_region(
+                        self._region, new_body[region_start:]
+                    )
+                    region_start = len(new_body)
+                    self._region = _CSERegion()
+                else:
+                    self._region.assign(writes)
+                self._invalidate_available(writes)
             if isinstance(stmt, cst.SimpleStatementLine):
                 if len(stmt.body) != 1:
                     rethrow(
@@ -999,6 +2161,11 @@ class AutoDiffTransformer(cst.CSTTransformer):
                     )
             elif isinstance(stmt, cst.If):
                 new_body.extend(self._autodiff_transform_If(stmt, scope))
+        if self._region is not None:
+            new_body[region_start:] = self._reduce_cse_region(
+                self._region, new_body[region_start:]
+            )
+        self._region = outer_region
         return suite.with_changes(body=new_body)
 
     def _compute_ode_value_2nd_mixed_partial_deriv(
@@ -1006,7 +2173,8 @@ class AutoDiffTransformer(cst.CSTTransformer):
         value: Expr,
         wrt: Eta,
         wrt2nd: Eta,
-        scope: Scope,
+        scoped: list[Symbol],
+        diff: Callable[..., Expr] | None = None,
     ) -> Expr:
         """
 
@@ -1024,30 +2192,29 @@ class AutoDiffTransformer(cst.CSTTransformer):
         """
         if not issubclass(self._module_cls, OdeModule):
             return Number(0)
-        yuv = value.diff(wrt, wrt2nd)
+        diff = diff or self._diff_cache.diff
+        yuv = diff(value, wrt, wrt2nd)
         zuv = yuv
         for cmt1 in self._symbol_defs.iter_cmt():
-            yuAi = value.diff(wrt, cmt1.A)
-            yvAi = value.diff(wrt2nd, cmt1.A)
+            yuAi = diff(value, wrt, cmt1.A)
+            yvAi = diff(value, wrt2nd, cmt1.A)
             Aiu = CmtSolvedAWrt(cmt=cmt1, wrt=wrt)
             Aiv = CmtSolvedAWrt(cmt=cmt1, wrt=wrt2nd)
-            yAi = value.diff(cmt1.A)
+            yAi = diff(value, cmt1.A)
             Aiuv = CmtSolvedAWrt(cmt=cmt1, wrt=wrt, wrt2nd=wrt2nd)
 
             zuv += yuAi * Aiv + yvAi * Aiu
 
             for cmt2 in self._symbol_defs.iter_cmt():
-                yAiAj = value.diff(cmt1.A, cmt2.A)
+                yAiAj = diff(value, cmt1.A, cmt2.A)
                 Aju = CmtSolvedAWrt(cmt=cmt2, wrt=wrt)
                 zuv += yAiAj * Aju * Aiv
 
             zuv += yAi * Aiuv
 
-        for symbol in value.free_symbols:
-            if isinstance(symbol, Symbol) and symbol.name in scope:
-                zuv += value.diff(wrt, symbol) * XWrt(symbol.name, wrt2nd) + value.diff(
-                    symbol
-                ) * XWrt(symbol.name, wrt, wrt2nd)
+        for symbol in scoped:
+            zuv += diff(value, wrt, symbol) * self._x_wrt(symbol.name, wrt2nd)
+            zuv += diff(value, symbol) * self._x_wrt(symbol.name, wrt, wrt2nd)
 
         return zuv
 
@@ -1056,7 +2223,8 @@ class AutoDiffTransformer(cst.CSTTransformer):
         value: Expr,
         wrt: Eta,
         wrt2nd: Eta,
-        scope: Scope,
+        scoped: list[Symbol],
+        diff: Callable[..., Expr] | None = None,
     ) -> Expr:
         """
         Formula:
@@ -1082,14 +2250,15 @@ class AutoDiffTransformer(cst.CSTTransformer):
         if not issubclass(self._module_cls, ClosedFormSolutionModule):
             return Number(0)
         n_cmt = get_annotated_meta(self._module_cls).n_cmt
+        diff = diff or self._diff_cache.diff
         F = ClosedFormSolutionSolvedF()
-        yF = value.diff(F)
-        yu = value.diff(wrt)
-        yv = value.diff(wrt2nd)
-        yuv = yu.diff(wrt2nd)
-        yuF = yu.diff(F)
-        yvF = yv.diff(F)
-        yFF = yF.diff(F)
+        yF = diff(value, F)
+        yu = diff(value, wrt)
+        yv = diff(value, wrt2nd)
+        yuv = diff(yu, wrt2nd)
+        yuF = diff(yu, F)
+        yvF = diff(yv, F)
+        yFF = diff(yF, F)
         Fu = ClosedFormSolutionSolvedFWrt(wrt=wrt)
         Fv = ClosedFormSolutionSolvedFWrt(wrt=wrt2nd)
         Fuv = ClosedFormSolutionSolvedFWrt(wrt=wrt, wrt2nd=wrt2nd)
@@ -1097,17 +2266,18 @@ class AutoDiffTransformer(cst.CSTTransformer):
 
         for cmt_index in range(n_cmt):
             __sln_Ai = ClosedFormSolutionSolvedA(index=cmt_index)
-            yuAi = yu.diff(__sln_Ai)
+            yuAi = diff(yu, __sln_Ai)
             Aiv = ClosedFormSolutionSolvedAWrt(index=cmt_index, wrt=wrt2nd)
-            yvAi = yv.diff(__sln_Ai)
+            yvAi = diff(yv, __sln_Ai)
             Aiu = ClosedFormSolutionSolvedAWrt(index=cmt_index, wrt=wrt)
-            yFAi = yF.diff(__sln_Ai)
-            yAi = value.diff(__sln_Ai)
+            yFAi = diff(yF, __sln_Ai)
+            yAi = diff(value, __sln_Ai)
             Aiuv = ClosedFormSolutionSolvedAWrt(index=cmt_index, wrt=wrt, wrt2nd=wrt2nd)
 
             zuv += yuAi * Aiv + yvAi * Aiu + yFAi * (Fu * Aiv + Fv * Aiu)
             for cmt2_index in range(n_cmt):
-                yAiAj = yAi.diff(
+                yAiAj = diff(
+                    yAi,
                     ClosedFormSolutionSolvedA(index=cmt2_index),
                 )
                 Aju = ClosedFormSolutionSolvedAWrt(index=cmt2_index, wrt=wrt)
@@ -1115,11 +2285,9 @@ class AutoDiffTransformer(cst.CSTTransformer):
 
             zuv += yAi * Aiuv
 
-        for symbol in value.free_symbols:
-            if isinstance(symbol, Symbol) and symbol.name in scope:
-                zuv += value.diff(wrt, symbol) * XWrt(symbol.name, wrt2nd) + value.diff(
-                    symbol
-                ) * XWrt(symbol.name, wrt, wrt2nd)
+        for symbol in scoped:
+            zuv += diff(value, wrt, symbol) * self._x_wrt(symbol.name, wrt2nd)
+            zuv += diff(value, symbol) * self._x_wrt(symbol.name, wrt, wrt2nd)
 
         return zuv
 
@@ -0,0 +1,287 @@
+from __future__ import annotations
+
+import math
+
+import libcst as cst
+import libcst.matchers as m
+
+from mas.libs.masmod.modeling.utils.profiling import profile_count
+
+__all__ = ["ConstantFolder"]
+
+Number = int | float
+
+_BINARY_OPERATIONS = {
+    cst.Add: lambda a, b: a + b,
+    cst.Subtract: lambda a, b: a - b,
+    cst.Multiply: lambda a, b: a * b,
+    cst.Divide: lambda a, b: a / b,
+    cst.Power: lambda a, b: a**b,
+}
+
+# Bound of the folded integers, larger powers are left to the evaluation of pred
+_MAX_INT_BITS = 64
+
+
+def _literal_value(node: cst.BaseExpression) -> Number | None:
+    """Value of a numeric literal, optionally signed, or None."""
+    if isinstance(node, cst.Integer | cst.Float):
+        return node.evaluated_value
+    if isinstance(node, cst.UnaryOperation) and isinstance(
+        node.operator, cst.Minus | cst.Plus
+    ):
+        value = _literal_value(node.expression)
+        if value is None:
+            return None
+        return -value if isinstance(node.operator, cst.Minus) else value
+    return None
+
+
+def _is_large_power(operator: cst.BaseBinaryOp, left: Number, right: Number) -> bool:
+    """Whether the integer power `left ** right` exceeds `_MAX_INT_BITS`."""
+    return (
+        isinstance(operator, cst.Power)
+        and isinstance(left, int)
+        and isinstance(right, int)
+        and abs(left).bit_length() * right > _MAX_INT_BITS
+    )
+
+
+def _literal(value: Number, like: cst.BaseExpression) -> cst.BaseExpression | None:
+    """Literal of `value` in place of `like`, None if it can not be written."""
+    if isinstance(value, bool) or not isinstance(value, int | float):
+        return None
+    if isinstance(value, float) and not math.isfinite(value):
+        return None
+    if isinstance(value, int) and value.bit_length() > _MAX_INT_BITS:
+        return None
+    magnitude = abs(value)
+    node: cst.BaseExpression = (
+        cst.Integer(value=str(magnitude))
+        if isinstance(magnitude, int)
+        else cst.Float(value=repr(magnitude))
+    )
+    if value < 0 or (isinstance(value, float) and math.copysign(1.0, value) < 0):
+        node = cst.UnaryOperation(
+            operator=cst.Minus(), expression=node, lpar=like.lpar, rpar=like.rpar
+        )
+    return node
+
+
+def _is_exact(node: cst.BaseExpression) -> bool:
+    """
+    Whether `node` is a literal sympy prints without rounding.
+
+    Derivatives are printed with the 15 significant digits of `sympy.Float`, a
+    local holding e.g. `0.3989422804014327` keeps its precision only as a local.
+    """
+    value = _literal_value(node)
+    return value is not None and float(f"{value:.15g}") == value
+
+
+def _is_pure(node: cst.BaseExpression) -> bool:
+    """Whether `node` only calls plain functions, e.g. `exp`, not `self.solve`."""
+    return not m.findall(node, m.Call(func=~m.Name()))
+
+
+def _replace_with(
+    node: cst.BinaryOperation, operand: cst.BaseExpression
+) -> cst.BaseExpression:
+    """`operand` in place of `node`, keeping the parentheses of `node`."""
+    if operand.lpar or not node.lpar:
+        return operand
+    return operand.with_changes(lpar=node.lpar, rpar=node.rpar)
+
+
+class _StoreCounter(cst.CSTVisitor):
+    """Count how many times each local name is assigned."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.stores: dict[str, int] = {}
+
+    def _store(self, target: cst.BaseExpression) -> None:
+        if isinstance(target, cst.Name):
+            self.stores[target.value] = self.stores.get(target.value, 0) + 1
+        elif isinstance(target, cst.Tuple | cst.List):
+            for element in target.elements:
+                self._store(element.value)
+        elif isinstance(target, cst.StarredElement):
+            self._store(target.value)
+
+    def visit_Param(self, node: cst.Param) -> None:
+        self._store(node.name)
+
+    def visit_AssignTarget(self, node: cst.AssignTarget) -> None:
+        self._store(node.target)
+
+    def visit_AugAssign(self, node: cst.AugAssign) -> None:
+        self._store(node.target)
+
+    def visit_AnnAssign(self, node: cst.AnnAssign) -> None:
+        self._store(node.target)
+
+    def visit_For(self, node: cst.For) -> None:
+        self._store(node.target)
+
+    def visit_NamedExpr(self, node: cst.NamedExpr) -> None:
+        self._store(node.target)
+
+    def visit_AsName(self, node: cst.AsName) -> None:
+        self._store(node.name)
+
+
+class ConstantFolder(cst.CSTTransformer):
+    """
+    Simplify the literals of pred before the automatic differentiation.
+
+    - Arithmetic on numeric literals is evaluated, e.g. `(70 / 2) ** 2` to `1225.0`,
+      with the same python arithmetic the pred function is evaluated with.
+    - Locals assigned a literal once, at the top level of pred, are replaced by
+      the literal where they are read, e.g. the coefficients of an inlined
+      `normal_cdf`. Literals with more than 15 significant digits are kept in
+      their locals.
+    - Identity operations are dropped, e.g. `x * 1`, `x + 0` or `x ** 1`, and
+      products with a literal zero are replaced by the zero, e.g. `0 * self.eps`.
+
+    The assignments of the propagated locals are kept. The number of folded
+    literals, propagated locals and dropped operations are counted on the
+    current profiling stage.
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._stores: dict[str, int] = {}
+        self._constants: dict[str, cst.BaseExpression] = {}
+        self._depth = 0
+
+    def visit_Module(self, node: cst.Module) -> None:
+        counter = _StoreCounter()
+        node.visit(counter)
+        self._stores = counter.stores
+
+    # region: Nesting
+    def _enter(self, node: cst.CSTNode) -> None:
+        self._depth += 1
+
+    def _leave(self, original_node: cst.CSTNode, updated_node: cst.CSTNode):
+        self._depth -= 1
+        return updated_node
+
+    visit_FunctionDef = visit_If = visit_For = visit_While = _enter  # type: ignore[assignment]
+    visit_With = visit_Try = _enter  # type: ignore[assignment]
+    leave_FunctionDef = leave_If = leave_For = leave_While = _leave  # type: ignore[assignment]
+    leave_With = leave_Try = _leave  # type: ignore[assignment]
+    # endregion
+
+    def leave_Assign(
+        self, original_node: cst.Assign, updated_node: cst.Assign
+    ) -> cst.Assign:
+        if (
+            self._depth == 1
+            and len(updated_node.targets) == 1
+            and isinstance(target := updated_node.targets[0].target, cst.Name)
+            and self._stores.get(target.value) == 1
+            and _is_exact(updated_node.value)
+        ):
+            self._constants[target.value] = updated_node.value
+        return updated_node
+
+    def leave_Name(
+        self, original_node: cst.Name, updated_node: cst.Name
+    ) -> cst.BaseExpression:
+        literal = self._constants.get(updated_node.value)
+        if literal is None:
+            return updated_node
+        profile_count("propagated_literals")
+        return literal.with_changes(lpar=updated_node.lpar, rpar=updated_node.rpar)
+
+    def leave_Attribute(
+        self, original_node: cst.Attribute, updated_node: cst.Attribute
+    ) -> cst.Attribute:
+        # `self.A1` is not the local `A1`
+        return updated_node.with_changes(attr=original_node.attr)
+
+    def leave_Arg(self, original_node: cst.Arg, updated_node: cst.Arg) -> cst.Arg:
+        return updated_node.with_changes(keyword=original_node.keyword)
+
+    def leave_UnaryOperation(
+        self, original_node: cst.UnaryOperation, updated_node: cst.UnaryOperation
+    ) -> cst.BaseExpression:
+        if _literal_value(updated_node.expression) is None or isinstance(
+            updated_node.expression, cst.Integer | cst.Float
+        ):
+            return updated_node
+        value = _literal_value(updated_node)
+        folded = None if value is None else _literal(value, updated_node)
+        if folded is None:
+            return updated_node
+        profile_count("folded_constants")
+        return folded
+
+    def leave_BinaryOperation(
+        self, original_node: cst.BinaryOperation, updated_node: cst.BinaryOperation
+    ) -> cst.BaseExpression:
+        operation = _BINARY_OPERATIONS.get(type(updated_node.operator))
+        if operation is None:
+            return updated_node
+        left = _literal_value(updated_node.left)
+        right = _literal_value(updated_node.right)
+
+        if (
+            left is not None
+            and right is not None
+            and not _is_large_power(updated_node.operator, left, right)
+        ):
+            try:
+                folded = _literal(operation(left, right), updated_node)
+            except (ArithmeticError, ValueError):
+                folded = None
+            if folded is not None:
+                profile_count("folded_constants")
+                return folded
+
+        simplified = self._drop_identity(updated_node, left, right)
+        if simplified is not None:
+            profile_count("dropped_identities")
+            return simplified
+
+        if (
+            isinstance(updated_node.operator, cst.Power)
+            and isinstance(updated_node.left, cst.UnaryOperation)
+            and not updated_node.left.lpar
+        ):
+            # A propagated negative literal, `(-a) ** b` and not `-a ** b`
+            return updated_node.with_changes(
+                left=updated_node.left.with_changes(
+                    lpar=[cst.LeftParen()], rpar=[cst.RightParen()]
+                )
+            )
+        return updated_node
+
+    @staticmethod
+    def _drop_identity(
+        node: cst.BinaryOperation, left: Number | None, right: Number | None
+    ) -> cst.BaseExpression | None:
+        operator = node.operator
+        if isinstance(operator, cst.Add):
+            if right == 0:
+                return _replace_with(node, node.left)
+            if left == 0:
+                return _replace_with(node, node.right)
+        elif isinstance(operator, cst.Subtract):
+            if right == 0:
+                return _replace_with(node, node.left)
+        elif isinstance(operator, cst.Multiply):
+            if right == 1:
+                return _replace_with(node, node.left)
+            if left == 1:
+                return _replace_with(node, node.right)
+            if right == 0 and _is_pure(node.left):
+                return _replace_with(node, node.right)
+            if left == 0 and _is_pure(node.right):
+                return _replace_with(node, node.left)
+        elif isinstance(operator, cst.Divide | cst.Power):
+            if right == 1:
+                return _replace_with(node, node.left)
+        return None
@@ -0,0 +1,257 @@
+from __future__ import annotations
+
+from typing import Sequence
+
+import libcst as cst
+
+from mas.libs.masmod.modeling.symbols._x import XTransRack
+from mas.libs.masmod.modeling.utils.profiling import profile_count
+
+__all__ = ["DeadCodeEliminator"]
+
+_EMPTY_MODULE = cst.Module(body=[])
+
+
+def _x_key(node: cst.Subscript) -> str:
+    """Key of a derivative `__X__[...]`, the same for its assignment and reads."""
+    parts: list[str] = []
+    for element in node.slice:
+        value = cst.ensure_type(element.slice, cst.Index).value
+        if isinstance(value, cst.Tuple):
+            parts.extend(_x_key_part(e.value) for e in value.elements)
+        else:
+            parts.append(_x_key_part(value))
+    return f"{XTransRack.name}[{','.join(parts)}]"
+
+
+def _x_key_part(node: cst.BaseExpression) -> str:
+    # The local name and the symbols are written the same way by the transformers
+    if isinstance(node, cst.SimpleString):
+        return node.value
+    if isinstance(node, cst.Attribute):
+        return node.attr.value
+    return "".join(_EMPTY_MODULE.code_for_node(node).split())
+
+
+def _target_key(target: cst.BaseAssignTargetExpression) -> str | None:
+    """Key of an assignment target that can be removed, None for the others."""
+    if isinstance(target, cst.Name) and target.value != "self":
+        return target.value
+    if (
+        isinstance(target, cst.Subscript)
+        and isinstance(target.value, cst.Name)
+        and target.value.value == XTransRack.name
+    ):
+        return _x_key(target)
+    return None
+
+
+def _is_pass(block: cst.BaseSuite) -> bool:
+    body = cst.ensure_type(block, cst.IndentedBlock).body
+    return all(
+        isinstance(stmt, cst.SimpleStatementLine)
+        and all(isinstance(small_stmt, cst.Pass) for small_stmt in stmt.body)
+        for stmt in body
+    )
+
+
+class _Reads(cst.CSTVisitor):
+    """Locals and derivatives read by a node."""
+
+    def __init__(self, reads: set[str]) -> None:
+        super().__init__()
+        self.reads = reads
+
+    def visit_Name(self, node: cst.Name) -> None:
+        self.reads.add(node.value)
+
+    def visit_Attribute(self, node: cst.Attribute) -> bool:
+        # `self.tv_cl` reads `self`, not a local `tv_cl`
+        node.value.visit(self)
+        return False
+
+    def visit_Subscript(self, node: cst.Subscript) -> bool:
+        if isinstance(node.value, cst.Name) and node.value.value == XTransRack.name:
+            self.reads.add(_x_key(node))
+            return False
+        return True
+
+
+def _collect_reads(node: cst.CSTNode, reads: set[str]) -> None:
+    """Add the reads of `node` to `reads`, see `_Reads`."""
+    # The derivative code is mostly made of these nodes, walked without the
+    # dispatch of a visitor
+    if isinstance(node, cst.Name):
+        reads.add(node.value)
+    elif isinstance(node, cst.BinaryOperation):
+        _collect_reads(node.left, reads)
+        _collect_reads(node.right, reads)
+    elif isinstance(node, cst.Subscript) and (
+        isinstance(node.value, cst.Name) and node.value.value == XTransRack.name
+    ):
+        reads.add(_x_key(node))
+    elif isinstance(node, cst.Attribute):
+        _collect_reads(node.value, reads)
+    elif isinstance(node, cst.UnaryOperation):
+        _collect_reads(node.expression, reads)
+    elif isinstance(node, cst.Call):
+        _collect_reads(node.func, reads)
+        for arg in node.args:
+            _collect_reads(arg.value, reads)
+    elif not isinstance(node, cst.Integer | cst.Float | cst.SimpleString):
+        node.visit(_Reads(reads))
+
+
+class _AssignedNames(cst.CSTVisitor):
+    """Locals assigned by a suite, without visiting the expressions."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.names: set[str] = set()
+
+    def visit_SimpleStatementLine(self, node: cst.SimpleStatementLine) -> bool:
+        for small_stmt in node.body:
+            if isinstance(small_stmt, cst.Assign):
+                for target in small_stmt.targets:
+                    if isinstance(target.target, cst.Name):
+                        self.names.add(target.target.value)
+        return False
+
+
+def _reads(node: cst.CSTNode) -> set[str]:
+    reads: set[str] = set()
+    _collect_reads(node, reads)
+    return reads
+
+
+class DeadCodeEliminator(cst.CSTTransformer):
+    """
+    Remove the assignments of the differentiated pred that nothing depends on.
+
+    pred is swept backwards from its end and each `return`, where the exported
+    locals are live. An assignment of a local or of a derivative `__X__[...]`,
+    including the CSE temporaries, is removed if it is not read before the
+    local is assigned again. The other statements, e.g. the assignments of the
+    prediction, of the `dAdt` or of the arguments of a solver, are always kept.
+    If statements left without a body are removed.
+
+    Parameters
+    ----------
+    export_locals : Sequence[str] | None
+        Locals exported by pred, see `AutoDiffOptions.export_locals`. All the
+        locals not starting with `__` if not given.
+    """
+
+    def __init__(self, export_locals: Sequence[str] | None = None) -> None:
+        super().__init__()
+        self._export_locals = export_locals
+        self._exported: set[str] = set()
+
+    def visit_FunctionDef(self, node: cst.FunctionDef) -> bool:
+        collector = _AssignedNames()
+        node.body.visit(collector)
+        assigned = collector.names
+        if self._export_locals is None:
+            self._exported = {name for name in assigned if not name.startswith("__")}
+        else:
+            unknown = sorted(set(self._export_locals) - assigned)
+            if unknown:
+                raise ValueError(
+                    f"Locals to export are not assigned in pred: {unknown}"
+                )
+            self._exported = set(self._export_locals)
+        # pred is swept as a whole when leaving
+        return False
+
+    def leave_FunctionDef(
+        self, original_node: cst.FunctionDef, updated_node: cst.FunctionDef
+    ) -> cst.FunctionDef:
+        body = cst.ensure_type(updated_node.body, cst.IndentedBlock)
+        stmts, _ = self._sweep(body.body, set(self._exported))
+        return updated_node.with_changes(body=body.with_changes(body=stmts))
+
+    def _sweep(
+        self, stmts: Sequence[cst.BaseStatement], live: set[str]
+    ) -> tuple[list[cst.BaseStatement], set[str]]:
+        """
+        Remove the dead assignments of `stmts`, sweeping them backwards.
+
+        Returns the statements kept and the locals and derivatives live before
+        `stmts`.
+        """
+        kept: list[cst.BaseStatement] = []
+        for stmt in reversed(stmts):
+            if isinstance(stmt, cst.SimpleStatementLine):
+                small_stmts: list[cst.BaseSmallStatement] = []
+                for small_stmt in reversed(stmt.body):
+                    if self._sweep_small_statement(small_stmt, live):
+                        small_stmts.insert(0, small_stmt)
+                if small_stmts:
+                    kept.append(stmt.with_changes(body=small_stmts))
+                else:
+                    profile_count("removed_statements")
+            elif isinstance(stmt, cst.If):
+                if_stmt = self._sweep_if(stmt, live)
+                if if_stmt is not None:
+                    kept.append(if_stmt)
+            else:
+                # Loops and the like are kept as a whole
+                live |= _reads(stmt)
+                kept.append(stmt)
+        kept.reverse()
+        return kept, live
+
+    def _sweep_small_statement(
+        self, small_stmt: cst.BaseSmallStatement, live: set[str]
+    ) -> bool:
+        """Update `live` backwards across `small_stmt`, whether it is kept."""
+        if isinstance(small_stmt, cst.Return):
+            live.clear()
+            live |= self._exported
+            if small_stmt.value is not None:
+                live |= _reads(small_stmt.value)
+            return True
+        if isinstance(small_stmt, cst.Assign) and len(small_stmt.targets) == 1:
+            key = _target_key(small_stmt.targets[0].target)
+            if key is not None:
+                if key not in live:
+                    return False
+                live.discard(key)
+                live |= _reads(small_stmt.value)
+                return True
+        if isinstance(small_stmt, cst.AugAssign):
+            key = _target_key(small_stmt.target)
+            if key is not None and key not in live:
+                return False
+        live |= _reads(small_stmt)
+        return True
+
+    def _sweep_if(self, stmt: cst.If, live: set[str]) -> cst.If | None:
+        """Sweep the branches of `stmt`, None if nothing is left of it."""
+        live_out = set(live)
+        body, live_body = self._sweep(
+            cst.ensure_type(stmt.body, cst.IndentedBlock).body, set(live_out)
+        )
+        orelse = stmt.orelse
+        live_else = live_out
+        if isinstance(orelse, cst.If):
+            live_else = set(live_out)
+            orelse = self._sweep_if(orelse, live_else)
+        elif isinstance(orelse, cst.Else):
+            else_body, live_else = self._sweep(
+                cst.ensure_type(orelse.body, cst.IndentedBlock).body, set(live_out)
+            )
+            orelse = orelse.with_changes(body=orelse.body.with_changes(body=else_body))
+            if not else_body or _is_pass(orelse.body):
+                orelse = None
+
+        if not body:
+            body = [cst.SimpleStatementLine(body=[cst.Pass()])]
+        block = stmt.body.with_changes(body=body)
+        if orelse is None and _is_pass(block):
+            profile_count("removed_statements")
+            return None
+
+        live.clear()
+        live |= live_body | live_else | _reads(stmt.test)
+        return stmt.with_changes(body=block, orelse=orelse)
@@ -0,0 +1,534 @@
+from dataclasses import dataclass
+from typing import Any
+
+import libcst as cst
+from libcst.metadata import ParentNodeProvider
+from sympy import Expr, Number, Symbol, numbered_symbols
+
+from mas.libs.masmod.modeling.module.defs.closed_form import ClosedFormSolutionModule
+from mas.libs.masmod.modeling.module.defs.module import Module
+from mas.libs.masmod.modeling.module.defs.ode import OdeModule
+from mas.libs.masmod.modeling.symbols._ns import SymbolNamespace
+from mas.libs.masmod.modeling.symbols._omega_eta import Eta
+from mas.libs.masmod.modeling.symbols._sigma_eps import Eps
+from mas.libs.masmod.modeling.symbols._theta import Theta
+from mas.libs.masmod.modeling.symbols._x import XWrt
+from mas.libs.masmod.modeling.symbols._y import YValue
+from mas.libs.masmod.modeling.symbols.sympy_parser import parse_sympy_expr
+from mas.libs.masmod.modeling.syntax.metadata.scope_provider import (
+    Scope,
+    ScopeProvider,
+)
+from mas.libs.masmod.modeling.syntax.rethrow import rethrow
+from mas.libs.masmod.modeling.syntax.transformers.autodiff import (
+    FIRST_ORDER,
+    AutoDiffMemo,
+    AutoDiffOptions,
+    AutoDiffTransformer,
+)
+from mas.libs.masmod.modeling.syntax.with_comment import with_trailing_comment
+from mas.libs.masmod.modeling.utils.profiling import profile_cse
+
+__all__ = ["ReverseAutoDiffTransformer"]
+
+
+@dataclass
+class _TapeEntry:
+    # Partials of an assignment stored by the forward pass, keyed by the symbols
+    # it reads, and their tangents along each direction
+    target: Symbol
+    partials: dict[Symbol, Expr]
+    tangents: dict[tuple[Symbol, int], Expr]
+
+
+def _adjoint(symbol: Symbol) -> Symbol:
+    """Adjoint of a local, or the gradient of the prediction for the inputs."""
+    if isinstance(symbol, Eta | Eps | Theta):
+        return Symbol(f"__g_{symbol.name}")
+    return Symbol(f"__a_{symbol.name}")
+
+
+def _adjoint_tangent(symbol: Symbol, j: int) -> Symbol:
+    """Derivative of the adjoint of `symbol` along the j-th direction."""
+    if isinstance(symbol, Eta | Eps | Theta):
+        return Symbol(f"__gd{j}_{symbol.name}")
+    return Symbol(f"__ad{j}_{symbol.name}")
+
+
+class ReverseAutoDiffTransformer(AutoDiffTransformer):
+    """
+    Reverse mode variant of `AutoDiffTransformer`.
+
+    The forward pass stores the partials of every assignment w.r.t. the locals,
+    etas and eps it reads, and the derivatives of the locals w.r.t. each eps. At
+    the return, the adjoints of the locals are swept backwards through the stored
+    partials, giving the gradient of the prediction in a single pass whatever the
+    number of etas. ∂²Y/∂η∂ε, and ∂²Y/∂θ∂η with theta gradients, are the
+    derivatives of the sweep along each eps and theta (forward over reverse).
+
+    Branches taken are recorded by the forward pass and replayed by the sweep.
+    Compartments have no adjoint, ODE and closed form solution modules must use
+    the forward mode.
+    """
+
+    def __init__(
+        self,
+        source_code: str,
+        locals: dict[str, Any],
+        globals: dict[str, Any],
+        module_cls: type[Module] = Module,
+        symbol_defs: SymbolNamespace | None = None,
+        memo: AutoDiffMemo | None = None,
+        options: AutoDiffOptions | None = None,
+    ):
+        if issubclass(module_cls, OdeModule | ClosedFormSolutionModule):
+            raise ValueError(
+                f"Reverse mode autodiff does not support {module_cls.__name__}, "
+                "use the forward mode for modules with compartments"
+            )
+        # Partials are not memoized, each run builds its own tape
+        super().__init__(
+            source_code=source_code,
+            locals=locals,
+            globals=globals,
+            module_cls=module_cls,
+            symbol_defs=symbol_defs,
+            options=options,
+        )
+        self._pred_body: cst.BaseSuite | None = None
+        # Assignments whose value the prediction depends on
+        self._live: set[cst.Assign] = set()
+        self._active_ifs: set[cst.If] = set()
+        self._tape: dict[cst.Assign, _TapeEntry] = {}
+        self._flags: dict[cst.If, str] = {}
+        self._n_assignments: dict[str, int] = {}
+        # Symbols the sweep is differentiated along, for the second order terms
+        self._directions: list[Eps | Theta] = (
+            [*self._symbol_defs.iter_eps(), *self._iter_theta()]
+            if self._options.order > 1
+            else []
+        )
+
+    def leave_FunctionDef(
+        self, original_node: cst.FunctionDef, updated_node: cst.FunctionDef
+    ):
+        self._dependencies = self._collect_dependencies(original_node.body)
+        self._pred_body = original_node.body
+        for name, _, _ in self._iter_local_assignments(original_node.body):
+            self._n_assignments[name] = self._n_assignments.get(name, 0) + 1
+        if self._options.order > 0:
+            self._collect_live(
+                cst.ensure_type(original_node.body, cst.IndentedBlock).body
+            )
+        return updated_node.with_changes(body=self._transform_Suite(original_node.body))
+
+    def _active_reads(self, value: Any, scope: Scope) -> list[Symbol]:
+        """Etas, eps, differentiated thetas and the locals depending on them."""
+        if not isinstance(value, Expr):
+            return []
+        reads = [
+            symbol
+            for symbol in value.free_symbols
+            if isinstance(symbol, Eta | Eps)
+            or (isinstance(symbol, Theta) and self._options.theta_gradients)
+            or (
+                isinstance(symbol, Symbol)
+                and symbol.name in scope
+                and self._dependencies.get(symbol.name)
+            )
+        ]
+        return sorted(reads, key=lambda symbol: symbol.name)
+
+    def _collect_live(
+        self, stmts: list[cst.BaseStatement], live: set[str] | None = None
+    ) -> set[str]:
+        """
+        Find the assignments the prediction depends on, sweeping `stmts` backwards.
+
+        Returns the locals live before `stmts`.
+        """
+        live = set() if live is None else live
+        for stmt in reversed(stmts):
+            scope = self.get_metadata(ScopeProvider, stmt, None)
+            if scope is None:
+                continue
+            if isinstance(stmt, cst.If):
+                n_live = len(self._live)
+                live_then = self._collect_live(
+                    cst.ensure_type(stmt.body, cst.IndentedBlock).body, set(live)
+                )
+                if isinstance(stmt.orelse, cst.If):
+                    # An `elif` is an if statement in the else branch
+                    live = self._collect_live([stmt.orelse], live)
+                elif stmt.orelse:
+                    live = self._collect_live(
+                        cst.ensure_type(stmt.orelse.body, cst.IndentedBlock).body,
+                        live,
+                    )
+                live |= live_then
+                if len(self._live) != n_live:
+                    self._active_ifs.add(stmt)
+            elif isinstance(stmt, cst.SimpleStatementLine) and len(stmt.body) == 1:
+                small_stmt = stmt.body[0]
+                if isinstance(small_stmt, cst.Return) and small_stmt.value is not None:
+                    live = {
+                        symbol.name
+                        for symbol in self._active_reads(
+                            self._eval_value(small_stmt.value, scope), scope
+                        )
+                        if not isinstance(symbol, Eta | Eps | Theta)
+                    }
+                elif (
+                    isinstance(small_stmt, cst.Assign)
+                    and len(small_stmt.targets) == 1
+                    and isinstance(small_stmt.targets[0].target, cst.Name)
+                ):
+                    name = small_stmt.targets[0].target.value
+                    if name not in live or not self._dependencies.get(name):
+                        continue
+                    self._live.add(small_stmt)
+                    live.discard(name)
+                    live |= {
+                        symbol.name
+                        for symbol in self._active_reads(
+                            self._eval_value(small_stmt.value, scope), scope
+                        )
+                        if not isinstance(symbol, Eta | Eps | Theta)
+                    }
+        return live
+
+    def _tangent(self, symbol: Symbol, j: int) -> Expr:
+        """Derivative of an active read along the j-th direction."""
+        direction = self._directions[j]
+        if isinstance(symbol, Eta | Eps | Theta):
+            return Number(int(symbol == direction))
+        return self._x_wrt(symbol.name, direction)
+
+    def _record(
+        self, assign: cst.Assign, x_name: str, value: Expr, scope: Scope
+    ) -> list[cst.BaseStatement]:
+        """Store the partials of `x_name = value` on the tape."""
+        k = len(self._tape)
+        reads = self._active_reads(value, scope)
+        deps = self._dependencies.get(x_name, frozenset())
+
+        diff = self._diff_cache.diff
+        exprs: list[tuple[Symbol | XWrt, Expr]] = []
+        entry = _TapeEntry(target=Symbol(x_name), partials={}, tangents={})
+        for i, read in enumerate(reads):
+            partial = diff(value, read)
+            if isinstance(partial, Number):
+                entry.partials[read] = partial
+            else:
+                entry.partials[read] = Symbol(f"__p{k}_{i}")
+                exprs.append((entry.partials[read], partial))
+            for j in range(len(self._directions)):
+                partial_tangent = sum(
+                    (diff(value, read, u) * self._tangent(u, j) for u in reads),
+                    Number(0),
+                )
+                if isinstance(partial_tangent, Number):
+                    entry.tangents[read, j] = partial_tangent
+                else:
+                    entry.tangents[read, j] = Symbol(f"__pd{k}_{i}_{j}")
+                    exprs.append((entry.tangents[read, j], partial_tangent))
+        for j, direction in enumerate(self._directions):
+            if direction.name in deps:
+                tangent = sum(
+                    (diff(value, u) * self._tangent(u, j) for u in reads),
+                    Number(0),
+                )
+                exprs.append((XWrt(x_name, direction), tangent))
+        self._tape[assign] = entry
+
+        replacements, reductions = self._backend.cse(
+            [expr for _, expr in exprs], symbols=numbered_symbols(prefix="__")
+        )
+        profile_cse(x_name, len(replacements))
+        stmts = [
+            self._temporary_assignment(term, sub_expr)
+            for term, sub_expr in replacements
+        ]
+        for (lhs, _), expr in zip(exprs, reductions):
+            if isinstance(lhs, XWrt):
+                stmts.append(
+                    with_trailing_comment(
+                        cst.SimpleStatementLine(
+                            body=[
+                                cst.Assign(
+                                    targets=[
+                                        cst.AssignTarget(
+                                            target=cst.ensure_type(
+                                                lhs.as_cst_expression(),
+                                                cst.BaseAssignTargetExpression,
+                                            )
+                                        )
+                                    ],
+                                    value=parse_sympy_expr(expr),
+                                )
+                            ]
+                        ),
+                        comment=f"# mtran: {x_name} wrt {lhs.wrt.name}",
+                    )
+                )
+            else:
+                stmts.append(self._temporary_assignment(lhs, expr))
+        return stmts
+
+    def _autodiff_transform_assign(
+        self, assign: cst.Assign, scope: Scope
+    ) -> list[cst.BaseStatement]:
+        if len(assign.targets) != 1:
+            return super()._autodiff_transform_assign(assign, scope)
+        target = assign.targets[0].target
+        evaluated_value = self._eval_value(assign.value, scope=scope)
+        if isinstance(evaluated_value, YValue):
+            return super()._autodiff_transform_assign(assign, scope)
+        if not isinstance(target, cst.Name):
+            rethrow(
+                NotImplementedError(
+                    "Reverse mode autodiff only supports assignments to locals"
+                ),
+                assign,
+                source_code=self._source_code,
+            )
+        transformed: list[cst.BaseStatement] = []
+        if assign in self._live and isinstance(evaluated_value, Expr):
+            # Partials read the values before the assignment
+            transformed.append(
+                cst.If(
+                    test=cst.Name(FIRST_ORDER.name),
+                    body=cst.IndentedBlock(
+                        body=self._record(assign, target.value, evaluated_value, scope)
+                    ),
+                )
+            )
+        transformed.append(cst.SimpleStatementLine(body=[assign]))
+        return transformed
+
+    def _autodiff_transform_If(
+        self, if_: cst.If, scope: Scope
+    ) -> list[cst.BaseStatement]:
+        if if_ not in self._active_ifs:
+            return super()._autodiff_transform_If(if_, scope)
+        transformed = super()._autodiff_transform_If(if_, scope)
+        # Each branch of the `elif` chain with taped assignments sets its flag
+        flags: list[cst.BaseStatement] = []
+
+        def set_flags(original: cst.If, updated: cst.If) -> cst.If:
+            if original in self._active_ifs:
+                flag = Symbol(f"__b{len(self._flags)}")
+                self._flags[original] = flag.name
+                flags.append(self._temporary_assignment(flag, Number(0)))
+                body = cst.ensure_type(updated.body, cst.IndentedBlock)
+                updated = updated.with_changes(
+                    body=body.with_changes(
+                        body=[self._temporary_assignment(flag, Number(1)), *body.body]
+                    )
+                )
+            if isinstance(original.orelse, cst.If):
+                updated = updated.with_changes(
+                    orelse=set_flags(
+                        original.orelse, cst.ensure_type(updated.orelse, cst.If)
+                    )
+                )
+            return updated
+
+        updated = set_flags(if_, cst.ensure_type(transformed[0], cst.If))
+        return [*flags, updated]
+
+    def _sweep(
+        self, stmts: list[cst.BaseStatement], nonzero: set[Symbol]
+    ) -> list[cst.BaseStatement]:
+        """
+        Propagate the adjoints backwards through the taped assignments of `stmts`.
+
+        `nonzero` holds the adjoints that may be nonzero, the other ones are known
+        to be zero and are folded away.
+        """
+        swept: list[cst.BaseStatement] = []
+
+        def current(symbol: Symbol) -> Expr:
+            return symbol if symbol in nonzero else Number(0)
+
+        def update(lhs: Symbol, expr: Expr) -> None:
+            if expr == 0:
+                if lhs in nonzero:
+                    swept.append(self._temporary_assignment(lhs, Number(0)))
+                    nonzero.discard(lhs)
+            elif expr != lhs:
+                swept.append(self._temporary_assignment(lhs, expr))
+                nonzero.add(lhs)
+
+        n_directions = len(self._directions)
+        for stmt in reversed(stmts):
+            if isinstance(stmt, cst.If) and stmt in self._flags:
+                nonzero_then = set(nonzero)
+                swept_then = self._sweep(
+                    cst.ensure_type(stmt.body, cst.IndentedBlock).body, nonzero_then
+                )
+                nonzero_else = set(nonzero)
+                swept_else: list[cst.BaseStatement] = []
+                if isinstance(stmt.orelse, cst.If):
+                    swept_else = self._sweep([stmt.orelse], nonzero_else)
+                elif stmt.orelse:
+                    swept_else = self._sweep(
+                        cst.ensure_type(stmt.orelse.body, cst.IndentedBlock).body,
+                        nonzero_else,
+                    )
+                # Adjoints nonzero after either branch are assigned on both
+                joined = nonzero_then | nonzero_else
+                for symbol in sorted(joined - nonzero_then, key=str):
+                    swept_then.append(self._temporary_assignment(symbol, Number(0)))
+                for symbol in sorted(joined - nonzero_else, key=str):
+                    swept_else.append(self._temporary_assignment(symbol, Number(0)))
+                nonzero.clear()
+                nonzero.update(joined)
+                orelse: cst.If | cst.Else | None = None
+                if len(swept_else) == 1 and isinstance(swept_else[0], cst.If):
+                    # The sweep of an `elif` stays an `elif`
+                    orelse = swept_else[0]
+                elif swept_else:
+                    orelse = cst.Else(body=cst.IndentedBlock(body=swept_else))
+                if swept_then or swept_else:
+                    swept.append(
+                        cst.If(
+                            test=cst.Name(self._flags[stmt]),
+                            body=cst.IndentedBlock(
+                                body=swept_then
+                                or [cst.SimpleStatementLine(body=[cst.Pass()])]
+                            ),
+                            orelse=orelse,
+                        )
+                    )
+            elif isinstance(stmt, cst.SimpleStatementLine) and stmt.body[0] in (
+                self._tape
+            ):
+                entry = self._tape[cst.ensure_type(stmt.body[0], cst.Assign)]
+                x = entry.target
+                a_x = current(_adjoint(x))
+                for read, partial in entry.partials.items():
+                    if read == x:
+                        continue
+                    for j in range(n_directions):
+                        update(
+                            _adjoint_tangent(read, j),
+                            current(_adjoint_tangent(read, j))
+                            + current(_adjoint_tangent(x, j)) * partial
+                            + a_x * entry.tangents[read, j],
+                        )
+                    update(_adjoint(read), current(_adjoint(read)) + a_x * partial)
+                # The value of x before the assignment only flows through its reads
+                partial = entry.partials.get(x, Number(0))
+                if self._n_assignments.get(x.name, 0) == 1:
+                    # No previous value, the adjoints are never read again
+                    nonzero.discard(_adjoint(x))
+                    nonzero.difference_update(
+                        _adjoint_tangent(x, j) for j in range(n_directions)
+                    )
+                    continue
+                for j in range(n_directions):
+                    update(
+                        _adjoint_tangent(x, j),
+                        current(_adjoint_tangent(x, j)) * partial
+                        + a_x * entry.tangents.get((x, j), Number(0)),
+                    )
+                update(_adjoint(x), a_x * partial)
+        return swept
+
+    def _autodiff_transform_return(
+        self, return_: cst.Return, scope: Scope
+    ) -> list[cst.BaseStatement]:
+        assert self._pred_body is not None
+        body = cst.ensure_type(self._pred_body, cst.IndentedBlock).body
+        if self.get_metadata(ParentNodeProvider, return_, None) is not body[-1]:
+            rethrow(
+                NotImplementedError(
+                    "Reverse mode autodiff needs a single return at the end of pred"
+                ),
+                return_,
+                source_code=self._source_code,
+            )
+        if return_.value is None:
+            return super()._autodiff_transform_return(return_, scope)
+        transformed, evaluated_value = self._assign_y(
+            self._eval_value(return_.value, scope=scope)
+        )
+
+        if self._options.order == 0:
+            transformed.append(cst.SimpleStatementLine(body=[cst.Return()]))
+            return transformed
+
+        first_order_body: list[cst.BaseStatement] = []
+        if isinstance(evaluated_value, Expr):
+            etas = list(self._symbol_defs.iter_eta())
+            eps = list(self._symbol_defs.iter_eps())
+            thetas = list(self._iter_theta())
+            reads = self._active_reads(evaluated_value, scope)
+
+            # Seed the adjoints with the partials of the prediction
+            diff = self._diff_cache.diff
+            seeds: list[tuple[Symbol, Expr]] = []
+            for read in reads:
+                partial = diff(evaluated_value, read)
+                seeds.append((_adjoint(read), partial))
+                for j in range(len(self._directions)):
+                    seeds.append(
+                        (
+                            _adjoint_tangent(read, j),
+                            sum(
+                                (
+                                    diff(evaluated_value, read, u) * self._tangent(u, j)
+                                    for u in reads
+                                ),
+                                Number(0),
+                            ),
+                        )
+                    )
+            replacements, reductions = self._backend.cse(
+                [expr for _, expr in seeds], symbols=numbered_symbols(prefix="__")
+            )
+            profile_cse("__Y__", len(replacements))
+            first_order_body.extend(
+                self._temporary_assignment(term, sub_expr)
+                for term, sub_expr in replacements
+            )
+            nonzero: set[Symbol] = set()
+            for (adjoint, _), expr in zip(seeds, reductions):
+                if expr != 0:
+                    first_order_body.append(self._temporary_assignment(adjoint, expr))
+                    nonzero.add(adjoint)
+
+            first_order_body.extend(self._sweep(body[:-1], nonzero))
+
+            def gradient(symbol: Symbol) -> Expr:
+                return symbol if symbol in nonzero else Number(0)
+
+            for wrt in [*etas, *eps, *thetas]:
+                first_order_body.append(
+                    self._assign_y_wrt(gradient(_adjoint(wrt)), wrt)
+                )
+            for eta in etas if self._directions else []:
+                for j, wrt2nd in enumerate(eps):
+                    first_order_body.append(
+                        self._assign_y_wrt(
+                            gradient(_adjoint_tangent(eta, j)), eta, wrt2nd
+                        )
+                    )
+            for i, theta in enumerate(thetas if self._directions else []):
+                for eta in etas:
+                    first_order_body.append(
+                        self._assign_y_wrt(
+                            gradient(_adjoint_tangent(eta, len(eps) + i)), theta, eta
+                        )
+                    )
+            first_order_body.extend(self._second_order_block([]))
+
+        transformed.append(
+            cst.If(
+                test=cst.Name(FIRST_ORDER.name),
+                body=cst.IndentedBlock(body=first_order_body),
+            )
+        )
+        transformed.append(cst.SimpleStatementLine(body=[cst.Return()]))
+        return transformed
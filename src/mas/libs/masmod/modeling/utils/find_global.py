@@ -1,4 +1,5 @@
 import pathlib
+import sys
 import types
 import typing
 
@@ -32,17 +33,52 @@ def is_ipynb() -> bool:
         return False  # Normal Python
 
 
+def class_globals(cls: type) -> dict[str, typing.Any] | None:
+    """Globals of the module defining `cls`, without inspecting call stacks.
+
+    Functions defined in the class body hold the globals they were defined with,
+    which also covers classes defined by `exec` or in notebook cells. Otherwise
+    the module named by `cls.__module__` is used.
+    """
+    for member in vars(cls).values():
+        if isinstance(member, staticmethod | classmethod):
+            member = member.__func__
+        if isinstance(member, types.FunctionType):
+            return member.__globals__
+    module = sys.modules.get(cls.__module__)
+    if module is not None:
+        return vars(module)
+    return None
+
+
+def frame_globals(filename: str) -> dict[str, typing.Any] | None:
+    """Globals of the innermost frame executing `filename`.
+
+    Unlike `inspect.stack`, frames are walked without loading their source context.
+    """
+    path = pathlib.Path(filename)
+    frame: types.FrameType | None = sys._getframe(1)
+    while frame is not None:
+        if pathlib.Path(frame.f_code.co_filename) == path:
+            return frame.f_globals
+        frame = frame.f_back
+    return None
+
+
 def find_global_context(o: object) -> dict[str, typing.Any]:
     _global_context: dict[str, typing.Any] | None = getattr(o, "_m__globals__", None)
 
     if _global_context:
         return _global_context
 
-    call_stacks = inspect.stack()
+    _global_context = class_globals(o.__class__)
+    if _global_context is not None:
+        return {**_global_context}
+
     if is_ipynb():
         import IPython.utils.frame
 
-        for depth in range(len(call_stacks)):
+        for depth in range(len(inspect.stack(context=0))):
             _mod: types.ModuleType
             ipython_ctx: dict[str, typing.Any]
             _mod, ipython_ctx = IPython.utils.frame.extract_module_locals(depth)
@@ -54,13 +90,9 @@ def find_global_context(o: object) -> dict[str, typing.Any]:
         cls_source_file = inspect.getsourcefile(o.__class__)
         if not cls_source_file:
             raise ValueError("Failed to locate source file for `Module` definition")
-        for frame in call_stacks:
-            if pathlib.Path(frame.filename) == pathlib.Path(cls_source_file):
-                f_globals = frame[0].f_globals
-                _global_context = {}
-                for f_global_name, f_global_val in f_globals.items():
-                    _global_context[f_global_name] = f_global_val
-                break
+        f_globals = frame_globals(cls_source_file)
+        if f_globals is not None:
+            _global_context = {**f_globals}
 
     if _global_context is None:
         logger.warning(
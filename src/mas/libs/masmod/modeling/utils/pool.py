@@ -0,0 +1,27 @@
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+__all__ = ["process_pool"]
+
+# Imported once by the fork server rather than by every worker, the workers of
+# the package run the compile pipeline
+_PRELOAD = "mas.libs.masmod.modeling.module.descriptor.descriptor"
+
+
+def process_pool(max_workers: int) -> ProcessPoolExecutor:
+    """
+    Process pool whose workers are not forked from the current process.
+
+    The current process may run threads, e.g. of NumPy or of the caller, which
+    a forked worker would inherit in an unknown state. The workers are forked
+    from a server process where available and spawned otherwise, so the jobs
+    and their callables are pickled and must be importable by name. Either way
+    the workers import the `__main__` module again, a script starting the pool
+    must do so under an `if __name__ == "__main__":` guard.
+    """
+    if "forkserver" in multiprocessing.get_all_start_methods():
+        context = multiprocessing.get_context("forkserver")
+        context.set_forkserver_preload([_PRELOAD])
+    else:
+        context = multiprocessing.get_context("spawn")
+    return ProcessPoolExecutor(max_workers=max_workers, mp_context=context)
@@ -0,0 +1,230 @@
+from __future__ import annotations
+
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import asdict, dataclass, field
+from typing import Any, Callable, Iterator
+
+import libcst as cst
+
+__all__ = [
+    "CompileProfile",
+    "StageProfile",
+    "is_profiling",
+    "profile_compile",
+    "profile_count",
+    "profile_cse",
+    "profile_stage",
+]
+
+
+@dataclass
+class StageProfile:
+    """Measurements of one stage of the compile pipeline.
+
+    Attributes
+    ----------
+    name : str
+        Name of the stage.
+    calls : int
+        Number of times the stage ran.
+    wall_time : float
+        Accumulated wall time in seconds.
+    nodes_in : int
+        CST nodes of the stage input.
+    nodes_out : int
+        CST nodes of the stage output.
+    statements_in : int
+        Statements of the stage input.
+    statements_out : int
+        Statements of the stage output, or lines emitted by the C++ translation.
+    counters : dict[str, int]
+        Stage specific counters, e.g. `sympy_ops` for the sympy operations of the
+        derivatives computed by autodiff.
+    """
+
+    name: str
+    calls: int = 0
+    wall_time: float = 0.0
+    nodes_in: int = 0
+    nodes_out: int = 0
+    statements_in: int = 0
+    statements_out: int = 0
+    counters: dict[str, int] = field(default_factory=dict)
+
+    @property
+    def statements_emitted(self) -> int:
+        """int: Statements added by the stage."""
+        return self.statements_out - self.statements_in
+
+
+@dataclass
+class CompileProfile:
+    """Report collected by `profile_compile`.
+
+    Attributes
+    ----------
+    stages : dict[str, StageProfile]
+        Stages in order of first execution.
+    cse_replacements : list[tuple[str, int]]
+        Number of common subexpressions extracted for each differentiated
+        assignment, in order of differentiation.
+    """
+
+    stages: dict[str, StageProfile] = field(default_factory=dict)
+    cse_replacements: list[tuple[str, int]] = field(default_factory=list)
+
+    @property
+    def wall_time(self) -> float:
+        """float: Total wall time of all stages in seconds."""
+        return sum(stage.wall_time for stage in self.stages.values())
+
+    def stage(self, name: str) -> StageProfile:
+        if name not in self.stages:
+            self.stages[name] = StageProfile(name=name)
+        return self.stages[name]
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "stages": [
+                {**asdict(stage), "statements_emitted": stage.statements_emitted}
+                for stage in self.stages.values()
+            ],
+            "cse_replacements": [list(x) for x in self.cse_replacements],
+        }
+
+    def __str__(self) -> str:
+        lines = [
+            f"{'stage':<24}{'calls':>6}{'time [ms]':>12}{'nodes':>10}"
+            f"{'stmts +':>10}{'sympy ops':>12}"
+        ]
+        for stage in self.stages.values():
+            lines.append(
+                f"{stage.name:<24}{stage.calls:>6}{stage.wall_time * 1e3:>12.2f}"
+                f"{stage.nodes_out:>10}{stage.statements_emitted:>10}"
+                f"{stage.counters.get('sympy_ops', 0):>12}"
+            )
+        return "\n".join(lines)
+
+
+_profile: ContextVar[CompileProfile | None] = ContextVar("_profile", default=None)
+_stage: ContextVar[StageProfile | None] = ContextVar("_stage", default=None)
+
+
+class _NodeCounter(cst.CSTVisitor):
+    def __init__(self) -> None:
+        self.nodes = 0
+        self.statements = 0
+
+    def on_visit(self, node: cst.CSTNode) -> bool:
+        self.nodes += 1
+        if isinstance(node, cst.BaseSmallStatement | cst.BaseCompoundStatement):
+            self.statements += 1
+        return True
+
+
+def _count(node: cst.CSTNode) -> tuple[int, int]:
+    counter = _NodeCounter()
+    node.visit(counter)
+    return counter.nodes, counter.statements
+
+
+def is_profiling() -> bool:
+    """Whether a `profile_compile` context is active."""
+    return _profile.get() is not None
+
+
+@contextmanager
+def profile_compile(
+    callback: Callable[[CompileProfile], None] | None = None,
+) -> Iterator[CompileProfile]:
+    """Collect a `CompileProfile` of everything compiled within the context.
+
+    Parameters
+    ----------
+    callback : Callable[[CompileProfile], None] | None
+        Called with the report when the context exits.
+
+    Examples
+    --------
+    >>> with profile_compile() as report:
+    ...     descriptor = ModuleDescriptor.from_module(MyModel())
+    ...     cc = CCTranslator(descriptor=descriptor).translate()
+    >>> print(report)
+    >>> report.stages["autodiff"].counters["sympy_ops"]
+    """
+    report = CompileProfile()
+    token = _profile.set(report)
+    try:
+        yield report
+    finally:
+        _profile.reset(token)
+        if callback is not None:
+            callback(report)
+
+
+def _ignore_output(node: cst.CSTNode | None = None, statements: int = 0) -> None:
+    pass
+
+
+@contextmanager
+def profile_stage(
+    name: str, node: cst.CSTNode | None = None
+) -> Iterator[Callable[..., None]]:
+    """Time a stage and count the nodes of its input, if profiling.
+
+    Yields a callback recording the output of the stage, either a CST or a
+    statement count. The output is counted once the stage is timed, so the
+    counting is not part of its wall time.
+
+    Examples
+    --------
+    >>> with profile_stage("constant_fold", pred.cst) as record_output:
+    ...     pred = pred.apply_transform(ConstantFolder())
+    ...     record_output(pred.cst)
+    """
+    report = _profile.get()
+    if report is None:
+        yield _ignore_output
+        return
+
+    stage = report.stage(name)
+    stage.calls += 1
+    if node is not None:
+        nodes, statements = _count(node)
+        stage.nodes_in += nodes
+        stage.statements_in += statements
+    outputs: list[tuple[cst.CSTNode | None, int]] = []
+
+    def record_output(node: cst.CSTNode | None = None, statements: int = 0) -> None:
+        outputs.append((node, statements))
+
+    token = _stage.set(stage)
+    start = time.perf_counter()
+    try:
+        yield record_output
+    finally:
+        stage.wall_time += time.perf_counter() - start
+        _stage.reset(token)
+        for output, statements in outputs:
+            if output is not None:
+                nodes, statements = _count(output)
+                stage.nodes_out += nodes
+            stage.statements_out += statements
+
+
+def profile_count(counter: str, n: int = 1) -> None:
+    """Add to a counter of the current stage."""
+    stage = _stage.get()
+    if stage is None:
+        return
+    stage.counters[counter] = stage.counters.get(counter, 0) + n
+
+
+def profile_cse(target: str, n: int) -> None:
+    """Record the common subexpressions extracted for an assignment."""
+    report = _profile.get()
+    if report is None:
+        return
+    report.cse_replacements.append((target, n))
@@ -0,0 +1,49 @@
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+SRC = Path(__file__).parents[2] / "src"
+
+# Cold import of the api in a fresh interpreter, in seconds. Heavy dependencies
+# are only loaded once an attribute is used, which leaves plenty of headroom.
+IMPORT_TIME_BUDGET = 0.1
+
+HEAVY_MODULES = ["sympy", "libcst", "numpy", "pydantic", "polars", "pandas"]
+
+
+def _run(script: str) -> dict:
+    out = subprocess.run(
+        [sys.executable, "-c", script],
+        env={**os.environ, "PYTHONPATH": str(SRC)},
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def test_cold_import_budget():
+    result = _run(
+        "import json, sys, time\n"
+        "start = time.perf_counter()\n"
+        "import mas.libs.masmod.modeling.api as api\n"
+        "elapsed = time.perf_counter() - start\n"
+        f"loaded = [m for m in {HEAVY_MODULES!r} if m in sys.modules]\n"
+        "api.theta\n"
+        "print(json.dumps([elapsed, loaded, 'sympy' in sys.modules]))\n"
+    )
+    elapsed, loaded, loaded_on_access = result
+    assert loaded == []
+    assert elapsed < IMPORT_TIME_BUDGET
+    assert loaded_on_access
+
+
+def test_descriptor_import_skips_polars():
+    result = _run(
+        "import json, sys\n"
+        "import mas.libs.masmod.modeling.module.descriptor.descriptor\n"
+        "print(json.dumps('polars' in sys.modules))\n"
+    )
+    assert result is False
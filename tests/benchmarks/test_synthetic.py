@@ -0,0 +1,35 @@
+import pytest
+
+from benchmarks.compile import run
+from benchmarks.synthetic import ModelSpec, generate_source, load_model
+from mas.libs.masmod.modeling.module.descriptor.descriptor import ModuleDescriptor
+
+
+@pytest.mark.parametrize("kind", ["module", "ode", "physio"])
+def test_synthetic_models_compile(kind, tmp_path):
+    spec = ModelSpec(kind=kind, n_etas=3, n_eps=2, n_branches=1, n_inline_calls=1)
+    descriptor = ModuleDescriptor.from_module(load_model(spec, tmp_path)())
+
+    assert descriptor.eta_names() == ["iiv_0", "iiv_1", "iiv_2"]
+    assert descriptor.eps_names() == ["eps_0", "eps_1"]
+    assert "scaled(" not in descriptor.postprocessed_pred.src
+    assert load_model(spec, tmp_path) is load_model(spec, tmp_path)
+
+
+def test_generated_shape():
+    src = generate_source(ModelSpec(kind="ode", n_cmts=3, n_statements=4))
+    assert src.count("compartment(") == 3
+    assert src.count(".dAdt = ") == 3
+    assert "x_3 = " in src and "x_4 = " not in src
+    with pytest.raises(ValueError):
+        ModelSpec(kind="physio", n_etas=2)
+
+
+def test_benchmark_result(tmp_path):
+    spec = ModelSpec(n_etas=1, n_statements=1)
+    result = run(spec, repeat=1, directory=str(tmp_path)).to_dict()
+    assert result["name"] == spec.name
+    assert result["from_module"] > 0 and result["translate"] > 0
+    assert result["peak_memory"] > 0
+    assert result["cc_lines"] > 0
+    assert 0 < result["cc_ops"] < result["cc_size"]
@@ -0,0 +1,44 @@
+import polars as pl
+
+from mas.libs.masmod.modeling.api import Module, column, exp, omega, sigma, theta
+from mas.libs.masmod.modeling.module.descriptor.descriptor import ModuleDescriptor
+from mas.libs.masmod.modeling.syntax.unparse import unparse
+
+
+class Base(Module):
+    def __init__(self):
+        super().__init__()
+        self.tv_cl = theta(1.0)
+        self.tv_v = theta(10.0)
+        self.iiv_cl = omega(0.1)
+        self.iiv_v = omega(0.1)
+        self.eps = sigma(0.1)
+        self.wt = column("WT")
+        self.time = column("TIME")
+
+    def pred(self):
+        cl = self.tv_cl * exp(self.iiv_cl)
+        v = self.tv_v * exp(self.iiv_v)
+        k = cl / v
+        ipred = exp(-k * self.time) / v
+        return ipred * (1 + self.eps)
+
+
+def test_add_covariate_reuses_unaffected_statements():
+    data = pl.DataFrame({"WT": [60.0, 70.0, 80.0], "TIME": [0.0, 1.0, 2.0]})
+    base = ModuleDescriptor.from_module(Base())
+    memo = base._autodiff_memo
+    assert memo is not None
+    n_statements = len(memo)
+
+    with_cov = base.add_covariate(
+        covariate=base.colvars[0], on=base.thetas[0], data=data, relation="power"
+    )
+    assert with_cov._autodiff_memo is memo
+    # Statements not reading `tv_cl` are served from the memo
+    assert memo.hits >= n_statements - 1
+
+    from_scratch = ModuleDescriptor.from_module(
+        with_cov.mod, src=unparse(with_cov._code_gen()).strip()
+    )
+    assert with_cov.postprocessed_pred.src == from_scratch.postprocessed_pred.src
@@ -0,0 +1,94 @@
+import polars as pl
+
+from mas.libs.masmod.modeling.api import Module, column, exp, omega, sigma, theta
+from mas.libs.masmod.modeling.covariate.scm import CovariateRelation, ScmDriver
+from mas.libs.masmod.modeling.covariate.stats import CovariateStatistics
+from mas.libs.masmod.modeling.module.descriptor.descriptor import ModuleDescriptor
+from mas.libs.masmod.modeling.syntax.transformers.autodiff import AutoDiffOptions
+
+
+class ScmBase(Module):
+    def __init__(self):
+        super().__init__()
+        self.tv_cl = theta(1.0)
+        self.tv_v = theta(10.0)
+        self.iiv_cl = omega(0.1)
+        self.eps = sigma(0.1)
+        self.wt = column("WT")
+        self.sex = column("SEX", is_categorical=True)
+
+    def pred(self):
+        cl = self.tv_cl * exp(self.iiv_cl)
+        return cl / self.tv_v + self.eps
+
+
+DATA = pl.DataFrame({"WT": [50.0, 60.0, 70.0, None, 90.0], "SEX": [1, 0, 1, 1, 0]})
+
+
+def test_statistics():
+    stats = CovariateStatistics.of(DATA["WT"])
+    assert (stats.median, stats.min, stats.max) == (65.0, 50.0, 90.0)
+    assert CovariateStatistics.of(DATA["SEX"], categorical=True).levels == (1, 0)
+
+
+def test_grid_and_candidates():
+    base = ModuleDescriptor.from_module(ScmBase())
+    driver = ScmDriver(base, DATA, workers=1)
+    assert set(driver.statistics) == {"WT", "SEX"}
+
+    grid = driver.grid(thetas=["tv_cl"])
+    assert [str(relation) for relation in grid] == [
+        "tv_cl ~ wt @ linear",
+        "tv_cl ~ wt @ piecewise",
+        "tv_cl ~ wt @ exp",
+        "tv_cl ~ wt @ power",
+        "tv_cl ~ sex @ linear",
+    ]
+
+    candidates = driver.candidates(grid)
+    assert all(candidate.ok for candidate in candidates)
+    power = candidates[3].descriptor()
+    assert "wt__tv_cl_1" in power.theta_names()
+    assert "(self.wt / 65.0)" in power.preprocessed_pred.src
+
+    # Same candidates as compiling each inclusion on its own
+    expected = base.add_covariate(
+        covariate=base.colvars[0], on=base.thetas[0], data=DATA, relation="power"
+    )
+    assert candidates[3].result.postprocessed_pred == expected.postprocessed_pred.src
+
+
+def test_candidates_on_pool_with_included():
+    base = ModuleDescriptor.from_module(ScmBase())
+    included = [CovariateRelation(covariate="sex", on="tv_cl", state="linear")]
+    grid = [
+        CovariateRelation(covariate="wt", on="tv_v", state="power"),
+        CovariateRelation(covariate="wt", on="not_a_theta", state="power"),
+    ]
+
+    in_process = ScmDriver(base, DATA, workers=1).candidates(grid, included=included)
+    on_pool = ScmDriver(base, DATA, workers=2).candidates(grid, included=included)
+
+    assert on_pool[0].ok and not on_pool[1].ok
+    assert on_pool[0].relations == (*included, grid[0])
+    assert on_pool[0].cc == in_process[0].cc
+
+
+def test_candidates_keep_autodiff_options():
+    options = AutoDiffOptions(order=1, theta_gradients=True)
+    base = ModuleDescriptor.from_module(ScmBase(), options=options)
+    grid = [
+        CovariateRelation(covariate="wt", on="tv_v", state="power"),
+        CovariateRelation(covariate="sex", on="tv_cl", state="linear"),
+    ]
+
+    in_process = ScmDriver(base, DATA, workers=1).candidates(grid)
+    on_pool = ScmDriver(base, DATA, workers=2).candidates(grid)
+
+    for candidate, expected in zip(on_pool, in_process):
+        assert candidate.cc == expected.cc
+        assert candidate.result.autodiff_options == options.to_dict()
+        descriptor = candidate.descriptor()
+        assert descriptor.autodiff_options == options
+        rediffed = descriptor.rediff().postprocessed_pred.src
+        assert rediffed == expected.result.postprocessed_pred
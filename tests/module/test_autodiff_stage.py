@@ -0,0 +1,50 @@
+import json
+
+import numpy as np
+
+from mas.libs.masmod.modeling.api import Module, exp, omega, sigma, theta
+from mas.libs.masmod.modeling.module.descriptor.cache import CompileCache
+from mas.libs.masmod.modeling.module.descriptor.descriptor import ModuleDescriptor
+from mas.libs.masmod.modeling.module.descriptor.stage import AutoDiffStage
+from mas.libs.masmod.modeling.symbols._sigma_eps import Eps, Sigma
+
+
+class StagedModel(Module):
+    def __init__(self):
+        super().__init__()
+        self.tv_cl = theta(1.0)
+        self.iiv_cl = omega(0.1)
+        self.eps = sigma(0.1)
+
+    def pred(self):
+        cl = self.tv_cl * exp(self.iiv_cl)
+        return cl + self.eps
+
+
+def test_stage_round_trip(tmp_path):
+    descriptor = ModuleDescriptor.from_module(StagedModel())
+    stage = descriptor.autodiff_stage
+    assert stage.preprocessed_pred == descriptor.preprocessed_pred.src
+    assert AutoDiffStage.from_dict(json.loads(json.dumps(stage.to_dict()))) == stage
+
+    cache = CompileCache(tmp_path)
+    ModuleDescriptor.from_module(StagedModel(), cache=cache)
+    cached = ModuleDescriptor.from_module(StagedModel(), cache=cache)
+    assert cache.hits == 1
+    assert cached.autodiff_stage == stage
+
+
+def test_rediff_with_new_eps():
+    descriptor = ModuleDescriptor.from_module(StagedModel())
+    same = descriptor.rediff()
+    assert same.postprocessed_pred.src == descriptor.postprocessed_pred.src
+
+    eps_add = Eps(name="eps_add", nocache=True)
+    eps_add.sigma = Sigma(els=[eps_add], values=np.array([[0.2]]), fixed=False)
+    extended = descriptor.copy()
+    extended.epsilons = [*extended.epsilons, eps_add]
+    extended = extended.rediff()
+
+    assert extended.eps_names() == ["eps", "eps_add"]
+    assert "wrt eps_add" in extended.postprocessed_pred.src
+    assert "wrt eps_add" not in descriptor.postprocessed_pred.src
@@ -0,0 +1,70 @@
+import os
+
+from mas.libs.masmod.modeling.api import Module, exp, omega, sigma, theta
+from mas.libs.masmod.modeling.module.descriptor.cache import (
+    CompileCache,
+    CompileCacheEntry,
+)
+from mas.libs.masmod.modeling.module.descriptor.descriptor import ModuleDescriptor
+
+
+class CachedModel(Module):
+    def __init__(self):
+        super().__init__()
+        self.tv_cl = theta(1.0)
+        self.iiv_cl = omega(0.1)
+        self.eps = sigma(0.1)
+
+    def pred(self):
+        cl = self.tv_cl * exp(self.iiv_cl)
+        return cl + self.eps
+
+
+def test_hit_reuses_postprocessed_pred(tmp_path):
+    cache = CompileCache(tmp_path)
+
+    first = ModuleDescriptor.from_module(CachedModel(), cache=cache)
+    assert (cache.hits, cache.misses) == (0, 1)
+    assert len(cache) == 1
+
+    second = ModuleDescriptor.from_module(CachedModel(), cache=cache)
+    assert (cache.hits, cache.misses) == (1, 1)
+    assert second.preprocessed_pred.src == first.preprocessed_pred.src
+    assert second.postprocessed_pred.src == first.postprocessed_pred.src
+    assert second.theta_names() == first.theta_names()
+
+
+def test_key_depends_on_symbols():
+    common = dict(class_src="class A: ...", pred_src="def pred(self): ...")
+    key = CompileCache.key(
+        **common, symbols=[("Theta", "a"), ("Theta", "b")], configuration={}
+    )
+    assert key == CompileCache.key(
+        **common, symbols=[("Theta", "a"), ("Theta", "b")], configuration={}
+    )
+    assert key != CompileCache.key(
+        **common, symbols=[("Theta", "b"), ("Theta", "a")], configuration={}
+    )
+    assert key != CompileCache.key(
+        **common,
+        symbols=[("Theta", "a"), ("Theta", "b")],
+        configuration={"odeint.solver": "lsoda"},
+    )
+
+
+def test_lru_eviction(tmp_path):
+    cache = CompileCache(tmp_path, max_entries=2)
+    entry = CompileCacheEntry(
+        preprocessed_pred="def pred(self):\n    return 1\n",
+        postprocessed_pred="def pred(self):\n    return 1\n",
+    )
+    cache.put("a", entry)
+    cache.put("b", entry)
+    # Make "b" the least recently used entry
+    os.utime(tmp_path / "b.json", (0, 0))
+    assert cache.get("a") is not None
+    cache.put("c", entry)
+
+    assert len(cache) == 2
+    assert cache.get("b") is None
+    assert cache.get("c") is not None
@@ -0,0 +1,77 @@
+from mas.libs.masmod.modeling.api import Module, exp, omega, sigma, theta
+from mas.libs.masmod.modeling.module.descriptor.batch import compile_many
+
+
+class BatchModelA(Module):
+    def __init__(self):
+        super().__init__()
+        self.tv_cl = theta(1.0)
+        self.iiv_cl = omega(0.1)
+        self.eps = sigma(0.1)
+
+    def pred(self):
+        cl = self.tv_cl * exp(self.iiv_cl)
+        return cl + self.eps
+
+
+class BatchModelB(Module):
+    def __init__(self):
+        super().__init__()
+        self.tv_v = theta(10.0)
+        self.iiv_v = omega(0.2)
+        self.eps = sigma(0.1)
+
+    def pred(self):
+        v = self.tv_v * exp(self.iiv_v)
+        return v * (1 + self.eps)
+
+
+class ScaledModel(Module):
+    def __init__(self, tv_v: float = 10.0):
+        super().__init__()
+        self.tv_v = theta(tv_v)
+        self.iiv_v = omega(0.2)
+        self.eps = sigma(0.1)
+
+    def pred(self):
+        v = self.tv_v * exp(self.iiv_v)
+        return v * (1 + self.eps)
+
+
+class BrokenModel(Module):
+    def __init__(self):
+        super().__init__()
+        self.tv_cl = theta(1.0)
+
+    def pred(self):
+        return self.tv_cl * undefined_name  # noqa: F821
+
+
+def test_compile_many_reports_failures():
+    results = compile_many([BatchModelA, BrokenModel, BatchModelB()], workers=2)
+
+    assert [r.name.split(".")[-1] for r in results] == [
+        "BatchModelA",
+        "BrokenModel",
+        "BatchModelB",
+    ]
+    assert results[0].ok and results[2].ok
+    assert not results[1].ok
+    assert "undefined_name" in (results[1].error or "")
+    assert "class __Module" in (results[0].cc or "")
+
+    descriptor = results[2].descriptor()
+    assert descriptor.theta_names() == ["tv_v"]
+    assert descriptor.postprocessed_pred.src == results[2].postprocessed_pred
+
+
+def test_compile_many_keeps_instances():
+    model = ScaledModel(tv_v=20.0)
+    model.iiv_v.omega.fixed = True
+    on_pool = compile_many([BatchModelA, model], workers=2)
+    in_process = compile_many([BatchModelA, model], workers=1)
+
+    assert on_pool == in_process
+    descriptor = on_pool[1].descriptor()
+    assert descriptor.theta_inits().tolist() == [20.0]
+    assert [omega_.fixed for omega_ in descriptor.omegas] == [True]
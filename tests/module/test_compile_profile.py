@@ -0,0 +1,92 @@
+import time
+
+import libcst as cst
+import sympy
+
+from mas.libs.masmod.modeling.api import Module, exp, omega, sigma, theta
+from mas.libs.masmod.modeling.module.descriptor.cc import CCTranslator
+from mas.libs.masmod.modeling.module.descriptor.descriptor import ModuleDescriptor
+from mas.libs.masmod.modeling.syntax.transformers.autodiff import DiffCache
+from mas.libs.masmod.modeling.utils import profiling
+from mas.libs.masmod.modeling.utils.profiling import (
+    CompileProfile,
+    profile_compile,
+    profile_stage,
+)
+
+
+class ProfiledModel(Module):
+    def __init__(self):
+        super().__init__()
+        self.tv_cl = theta(1.0)
+        self.iiv_cl = omega(0.1)
+        self.eps = sigma(0.1)
+
+    def pred(self):
+        cl = self.tv_cl * exp(self.iiv_cl)
+        return cl * exp(cl) + self.eps
+
+
+def test_profile_reports_every_stage():
+    reports: list[CompileProfile] = []
+    with profile_compile(callback=reports.append) as report:
+        descriptor = ModuleDescriptor.from_module(ProfiledModel())
+        cc = CCTranslator(descriptor=descriptor).translate()
+
+    assert reports == [report]
+    assert list(report.stages) == [
+        "parse",
+        "no_private",
+        "super_call_fixer",
+        "inline_preprocess",
+        "inline_postprocess",
+        "constant_fold",
+        "autodiff",
+        "dead_code",
+        "cc_translator",
+    ]
+    autodiff = report.stages["autodiff"]
+    assert autodiff.calls == 1
+    assert autodiff.wall_time > 0
+    assert autodiff.nodes_out > autodiff.nodes_in
+    assert autodiff.statements_emitted > 0
+    assert autodiff.counters["sympy_ops"] > 0
+    # ∂Y/∂cl is shared by the derivatives w.r.t. the eta and eps
+    assert autodiff.counters["diff_cache_hits"] > 0
+    assert report.stages["cc_translator"].statements_out <= len(cc)
+    assert [target for target, _ in report.cse_replacements] == ["cl", "__Y__"]
+    assert report.to_dict()["stages"][0]["name"] == "parse"
+
+
+def test_no_report_outside_context():
+    with profile_compile() as report:
+        pass
+    ModuleDescriptor.from_module(ProfiledModel())
+    assert report.stages == {}
+
+
+def test_output_counted_after_timing(monkeypatch):
+    def slow_count(node: cst.CSTNode) -> tuple[int, int]:
+        time.sleep(0.05)
+        return 3, 1
+
+    module = cst.parse_module("x = 1\n")
+    with profile_compile() as report:
+        with profile_stage("parse") as record_output:
+            monkeypatch.setattr(profiling, "_count", slow_count)
+            record_output(module)
+            record_output(statements=2)
+    stage = report.stages["parse"]
+    assert (stage.nodes_out, stage.statements_out) == (3, 3)
+    assert stage.wall_time < 0.05
+
+
+def test_diff_cache():
+    x, y = sympy.symbols("x y")
+    expr = x**2 * sympy.exp(y)
+    cache = DiffCache()
+    assert cache.diff(expr, x, y) == expr.diff(x, y)
+    assert (cache.hits, cache.misses) == (0, 3)
+    assert cache.diff(expr, x) == 2 * x * sympy.exp(y)
+    assert (cache.hits, cache.misses) == (1, 3)
+    assert len(cache) == 3
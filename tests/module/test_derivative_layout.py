@@ -0,0 +1,126 @@
+import re
+
+import numpy as np
+import pytest
+
+from mas.libs.masmod.modeling.api import Module, column, exp, omega, sigma, theta
+from mas.libs.masmod.modeling.module.descriptor.cc import CCTranslator
+from mas.libs.masmod.modeling.module.descriptor.descriptor import ModuleDescriptor
+from mas.libs.masmod.modeling.module.descriptor.layout import DerivativeLayout
+from mas.libs.masmod.modeling.syntax.transformers.autodiff import AutoDiffOptions
+
+
+class LayoutModel(Module):
+    def __init__(self):
+        super().__init__()
+        self.tv_cl = theta(1.0)
+        self.tv_v = theta(2.0)
+        self.iiv_cl = omega(0.1)
+        self.iiv_v = omega(0.1)
+        self.iiv_ka = omega(0.1)
+        self.prop = sigma(0.1)
+        self.add = sigma(0.1)
+        self.time = column("TIME")
+
+    def pred(self):
+        cl = self.tv_cl * exp(self.iiv_cl)
+        v = self.tv_v * exp(self.iiv_v + self.iiv_ka)
+        ipred = exp(-cl / v * self.time) / v
+        return ipred * (1 + self.prop) + self.add * exp(self.iiv_ka)
+
+
+LAYOUT = DerivativeLayout(
+    thetas=("tv_cl", "tv_v"),
+    etas=("iiv_cl", "iiv_v", "iiv_ka"),
+    epsilons=("prop", "add"),
+    cmts=(),
+    theta_gradients=True,
+)
+
+
+def test_y_index():
+    # Y, 3 etas, 2 eps, 3 x 2 eta-eps, 6 eta-eta, 2 thetas, 2 x 3 theta-eta
+    assert LAYOUT.y_size == 1 + 3 + 2 + 6 + 6 + 2 + 6
+    assert LAYOUT.y_index("iiv_v") == 2
+    assert LAYOUT.y_index("add") == 5
+    assert LAYOUT.y_index("iiv_v", "add") == 6 + 3
+    assert LAYOUT.y_index("iiv_ka", "iiv_v") == LAYOUT.y_index("iiv_v", "iiv_ka")
+    assert LAYOUT.y_index("iiv_ka", "iiv_v") == 12 + 4
+    assert LAYOUT.y_index("tv_v") == 19
+    assert LAYOUT.y_index("tv_v", "iiv_cl") == 20 + 3
+    assert LAYOUT.y_index("time") is None
+    with pytest.raises(IndexError, match="invalid second order"):
+        LAYOUT.y_index("prop", "iiv_cl")
+
+    # Every entry of Y is indexed exactly once
+    arrays = [
+        np.zeros(1, dtype=np.intp),
+        LAYOUT.y_eta,
+        LAYOUT.y_eps,
+        LAYOUT.y_eta_eps.ravel(),
+        LAYOUT.y_eta_eta[np.tril_indices(3)],
+        LAYOUT.y_theta,
+        LAYOUT.y_theta_eta.ravel(),
+    ]
+    assert np.array_equal(np.sort(np.concatenate(arrays)), np.arange(LAYOUT.y_size))
+
+    layout = DerivativeLayout(("tv_cl",), ("iiv_cl",), ("prop",), ())
+    assert layout.y_size == 5
+    assert layout.y_theta.shape == (0,)
+    assert layout.y_index("tv_cl") is None
+
+
+def test_y_blocks():
+    y = np.arange(2 * LAYOUT.y_size, dtype=float).reshape(2, LAYOUT.y_size)
+    blocks = LAYOUT.y_blocks(y)
+    assert blocks["value"].shape == (2,)
+    assert blocks["eta_eps"].shape == (2, 3, 2)
+    assert blocks["eta_eta"].shape == (2, 3, 3)
+    assert blocks["theta_eta"].shape == (2, 2, 3)
+    assert blocks["eta_eps"][1, 1, 1] == y[1, LAYOUT.y_index("iiv_v", "add")]
+    assert blocks["eta_eta"][0, 0, 2] == y[0, LAYOUT.y_index("iiv_ka", "iiv_cl")]
+    assert np.array_equal(blocks["eta_eta"], blocks["eta_eta"].swapaxes(1, 2))
+
+    # The contiguous blocks are views of the buffer
+    blocks["theta"][1, 0] = -1.0
+    assert y[1, LAYOUT.y_index("tv_cl")] == -1.0
+
+    with pytest.raises(ValueError, match="Y buffer"):
+        LAYOUT.y_blocks(np.zeros(3))
+
+
+def test_ode_and_solution_index():
+    layout = DerivativeLayout((), ("iiv_cl", "iiv_v"), (), ("depot", "central"))
+    assert layout.dadt_index("central") == 1
+    assert layout.dadt_index("central", "iiv_v") == 2 + 2 + 1
+    assert layout.dadt_index("central", "iiv_v", "iiv_cl") == 2 + 4 + 1 * 2 + 1
+    assert layout.dadt_index("central", "tv_cl") is None
+    assert layout.dadt_eta[1, 1] == layout.dadt_index("central", "iiv_v")
+    assert layout.dadt_eta_eta[0, 1, 1] == layout.dadt_index(
+        "central", "iiv_v", "iiv_cl"
+    )
+    assert layout.da_index("central", "depot") == 2
+    assert layout.solution_index() == 0
+    assert layout.solution_index("iiv_v") == 2
+    assert layout.solution_index("iiv_v", "iiv_v") == 3 + 2
+
+
+def test_descriptor_layout():
+    descriptor = ModuleDescriptor.from_module(
+        LayoutModel(), options=AutoDiffOptions(theta_gradients=True)
+    )
+    layout = descriptor.derivative_layout
+    assert layout == LAYOUT
+    assert descriptor.derivative_layout is layout
+
+    cc = "\n".join(CCTranslator(descriptor=descriptor).translate())
+    written = {int(i) for i in re.findall(r"->Y\[(\d+)\] = ", cc)}
+    sparsity = descriptor.derivative_sparsity
+    assert written == {
+        0,
+        *(layout.y_index(wrt) for wrt in sparsity.first_order["__Y__"]),
+        *(layout.y_index(*wrts) for wrts in sparsity.second_order["__Y__"]),
+    }
+
+    descriptor.epsilons = descriptor.epsilons[:1]
+    assert descriptor.derivative_layout.epsilons == ("prop",)
@@ -0,0 +1,73 @@
+import json
+
+import pytest
+
+from mas.libs.masmod.modeling.api import Module, exp, omega, sigma, theta
+from mas.libs.masmod.modeling.module.descriptor import descriptor as descriptor_module
+from mas.libs.masmod.modeling.module.descriptor.cc import CCTranslator
+from mas.libs.masmod.modeling.module.descriptor.descriptor import ModuleDescriptor
+
+
+class SerializedModel(Module):
+    def __init__(self):
+        super().__init__()
+        self.tv_cl = theta(1.0, bounds=(0.1, 10.0))
+        self.tv_v = theta(5.0)
+        self.iiv_cl, self.iiv_v = omega([[0.1, 0.01], [0.01, 0.2]])
+        self.eps = sigma(0.1, fixed=True)
+
+    def pred(self):
+        cl = self.tv_cl * exp(self.iiv_cl)
+        v = self.tv_v * exp(self.iiv_v)
+        return cl / v + self.eps
+
+
+def test_round_trip():
+    descriptor = ModuleDescriptor.from_module(SerializedModel()).with_theta(
+        {"tv_cl": 2.0}, theta_bounds={"tv_cl": (0.5, 20.0)}
+    )
+    loaded = ModuleDescriptor.from_bytes(descriptor.to_bytes())
+
+    assert loaded.preprocessed_pred.src == descriptor.preprocessed_pred.src
+    assert loaded.postprocessed_pred.src == descriptor.postprocessed_pred.src
+    assert loaded.theta_names() == ["tv_cl", "tv_v"]
+    assert loaded.eta_names() == ["iiv_cl", "iiv_v"]
+    assert loaded.theta_inits().tolist() == [2.0, 5.0]
+    assert loaded.theta_bounds() == descriptor.theta_bounds()
+    assert loaded.eta_inits().tolist() == descriptor.eta_inits().tolist()
+    assert loaded.sigmas[0].fixed
+    assert loaded.to_dict() == descriptor.to_dict()
+
+
+def test_load_does_not_compile(monkeypatch):
+    data = ModuleDescriptor.from_module(SerializedModel()).to_bytes()
+
+    def fail(*args, **kwargs):
+        raise AssertionError("unexpected compilation")
+
+    monkeypatch.setattr(descriptor_module, "interpret_cls_def", fail)
+    monkeypatch.setattr(descriptor_module.AutoDiffStage, "differentiate", fail)
+    loaded = ModuleDescriptor.from_bytes(data)
+    assert loaded.autodiff_stage.pred
+    assert loaded.with_omega({"iiv_cl": 0.3}).eta_inits()[0, 0] == 0.3
+
+
+def _translate(descriptor: ModuleDescriptor) -> list[str]:
+    # Source comments differ, the loaded pred holds `pass` where autodiff left an
+    # empty block
+    cc = CCTranslator(descriptor=descriptor).translate()
+    return [line for line in cc if not line.lstrip().startswith("//")]
+
+
+def test_translate_loaded():
+    descriptor = ModuleDescriptor.from_module(SerializedModel())
+    loaded = ModuleDescriptor.from_bytes(descriptor.to_bytes())
+    assert _translate(loaded) == _translate(descriptor)
+
+
+def test_reject_unknown_schema():
+    content = ModuleDescriptor.from_module(SerializedModel()).to_dict()
+    with pytest.raises(ValueError):
+        ModuleDescriptor.from_bytes(json.dumps({**content, "schema": 0}).encode())
+    with pytest.raises(ValueError):
+        ModuleDescriptor.from_bytes(b"[]")
@@ -0,0 +1,36 @@
+import inspect
+
+from mas.libs.masmod.modeling.api import Module, exp, omega, sigma, theta
+from mas.libs.masmod.modeling.module.descriptor.descriptor import ModuleDescriptor
+from mas.libs.masmod.modeling.utils.find_global import find_global_context
+
+
+def scale(x):
+    return 2 * x
+
+
+class GlobalsModel(Module):
+    def __init__(self):
+        super().__init__()
+        self.tv_cl = theta(1.0)
+        self.iiv_cl = omega(0.1)
+        self.eps = sigma(0.1)
+
+    def pred(self):
+        cl = scale(self.tv_cl) * exp(self.iiv_cl)
+        return cl + self.eps
+
+
+def test_globals_without_call_stacks(monkeypatch):
+    def fail(*args, **kwargs):
+        raise AssertionError("unexpected call stack inspection")
+
+    monkeypatch.setattr(inspect, "stack", fail)
+    mod = GlobalsModel()
+    assert mod._m__globals__["scale"] is scale
+    assert "__name__" not in mod._m__globals__
+    assert find_global_context(mod)["GlobalsModel"] is GlobalsModel
+
+    descriptor = ModuleDescriptor.from_module(mod)
+    assert "scale(" not in descriptor.postprocessed_pred.src
+    assert descriptor.copy().mod.tv_cl.init_value == 1.0
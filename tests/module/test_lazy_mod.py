@@ -0,0 +1,41 @@
+from mas.libs.masmod.modeling.api import Module, exp, omega, sigma, theta
+from mas.libs.masmod.modeling.module.descriptor import descriptor as descriptor_module
+from mas.libs.masmod.modeling.module.descriptor.descriptor import ModuleDescriptor
+
+
+class LazyModel(Module):
+    def __init__(self):
+        super().__init__()
+        self.tv_cl = theta(1.0)
+        self.iiv_cl = omega(0.1)
+        self.eps = sigma(0.1)
+
+    def pred(self):
+        cl = self.tv_cl * exp(self.iiv_cl)
+        return cl + self.eps
+
+
+def test_mod_is_interpreted_lazily(monkeypatch):
+    calls: list[str] = []
+    interpret_cls_def = descriptor_module.interpret_cls_def
+
+    def counting(cls_def):
+        calls.append(cls_def.name.value)
+        return interpret_cls_def(cls_def)
+
+    monkeypatch.setattr(descriptor_module, "interpret_cls_def", counting)
+
+    mod = LazyModel()
+    descriptor = ModuleDescriptor.from_module(mod)
+    assert descriptor.mod is mod
+
+    updated = descriptor.with_theta(2.0).with_omega(0.2).copy()
+    assert calls == []
+
+    assert updated.mod.tv_cl.init_value == 2.0
+    assert updated.mod is updated.mod
+    assert calls == ["LazyModel"]
+
+    updated.thetas = updated.thetas[:]
+    assert updated.mod is not None
+    assert calls == ["LazyModel", "LazyModel"]
@@ -0,0 +1,85 @@
+import pytest
+
+from mas.libs.masmod.modeling.api import Module, exp, omega, sigma, theta
+from mas.libs.masmod.modeling.module.descriptor.descriptor import ModuleDescriptor
+
+
+class ParameterizedModel(Module):
+    def __init__(self):
+        super().__init__()
+        self.tv_cl = theta(1.0)
+        self.tv_v = theta(10.0, bounds=(1, 100))
+        self.iiv_cl = omega(0.1)
+        self.eps = sigma(0.1)
+
+    def pred(self):
+        cl = self.tv_cl * exp(self.iiv_cl)
+        return cl / self.tv_v + self.eps
+
+
+def test_with_parameters_does_not_touch_original():
+    descriptor = ModuleDescriptor.from_module(ParameterizedModel())
+    updated = (
+        descriptor.with_theta({"tv_cl": 2.0}, theta_fixed={"tv_v": True})
+        .with_omega(0.3)
+        .with_sigma(0.5, sigma_fixed=True)
+    )
+
+    assert list(descriptor.theta_inits()) == [1.0, 10.0]
+    assert descriptor.theta_fixed() == [False, False]
+    assert descriptor.eta_inits().tolist() == [[0.1]]
+    assert descriptor.eps_inits().tolist() == [[0.1]]
+
+    assert updated.theta_inits(named=True) == {"tv_cl": 2.0, "tv_v": 10.0}
+    assert updated.theta_fixed() == [False, True]
+    assert updated.theta_bounds()[1] == (1.0, 100.0)
+    assert updated.eta_inits().tolist() == [[0.3]]
+    assert [s.fixed for s in updated.sigmas] == [True]
+
+
+def test_with_parameters_shares_sources():
+    descriptor = ModuleDescriptor.from_module(ParameterizedModel())
+    updated = descriptor.with_theta([3.0, 30.0])
+
+    assert updated.preprocessed_pred is descriptor.preprocessed_pred
+    assert updated.postprocessed_pred is descriptor.postprocessed_pred
+    assert updated.parameters.omegas is descriptor.parameters.omegas
+    # The module is interpreted again with the new initial estimates
+    assert updated.mod.tv_v.init_value == 30.0
+    assert updated.copy().theta_inits().tolist() == [3.0, 30.0]
+
+
+def test_symbols_are_read_only():
+    descriptor = ModuleDescriptor.from_module(ParameterizedModel())
+    updated = descriptor.with_theta({"tv_cl": 5.0}).with_omega(0.4)
+
+    with pytest.raises(AttributeError, match="with_theta"):
+        updated.thetas[0].init_value = 9.0
+    with pytest.raises(AttributeError, match="with_theta"):
+        updated.thetas[1].bounds = (0, 1)
+    eta = updated.etas[0]
+    with pytest.raises(ValueError, match="with_omega"):
+        eta.omega[eta, eta] = 0.9
+
+    # The symbols hold the estimates of their own descriptor
+    assert [theta.init_value for theta in updated.thetas] == [5.0, 10.0]
+    assert eta.omega.values.tolist() == [[0.4]]
+    assert [theta.init_value for theta in descriptor.thetas] == [1.0, 10.0]
+    assert descriptor.etas[0].omega.values.tolist() == [[0.1]]
+    assert list(descriptor.theta_inits()) == [1.0, 10.0]
+    # Still equal to the symbols of the module
+    assert descriptor.thetas[0] == descriptor.mod.tv_cl
+    assert descriptor.etas[0] == descriptor.mod.iiv_cl
+
+
+def test_blocks_are_read_only():
+    descriptor = ModuleDescriptor.from_module(ParameterizedModel())
+    omega_ = descriptor.omegas[0]
+    with pytest.raises(ValueError, match="read-only"):
+        omega_.values[0, 0] = 0.5
+    with pytest.raises(ValueError, match="with_omega"):
+        omega_[descriptor.etas[0], descriptor.etas[0]] = 0.5
+    with pytest.raises(AttributeError, match="with_sigma"):
+        descriptor.sigmas[0].fixed = True
+    assert descriptor.eta_inits().tolist() == [[0.1]]
+    assert not descriptor.sigmas[0].fixed
@@ -0,0 +1,67 @@
+import math
+import random
+from types import SimpleNamespace
+from typing import Callable
+
+import pytest
+
+from mas.libs.masmod.modeling.module.descriptor.descriptor import ModuleDescriptor
+
+
+class PredBuffer(dict):
+    """A buffer of the pred function, e.g. `__Y__`, keyed by the repr of the keys.
+
+    Unknown keys, e.g. the amounts read from `__A__`, are read as random values
+    seeded by the key if `random_reads`.
+    """
+
+    def __init__(self, random_reads: bool = False):
+        super().__init__()
+        self._random_reads = random_reads
+
+    def __setitem__(self, key, value):
+        super().__setitem__(repr(key), value)
+
+    def __getitem__(self, key):
+        if self._random_reads and repr(key) not in self:
+            self[key] = random.Random(repr(key)).uniform(0.5, 1.5)
+        return super().__getitem__(repr(key))
+
+
+def _run_pred(
+    descriptor: ModuleDescriptor,
+    values: dict[str, float],
+    *,
+    amounts: dict[str, float] | None = None,
+    random_reads: bool = False,
+) -> dict[str, dict[str, float]]:
+    """
+    Execute the postprocessed pred function of a descriptor.
+
+    `values` are the attributes of `self`, and `amounts` the amounts of its
+    compartments. Returns the buffers written by the function, e.g. `__Y__`.
+    """
+    buffers = {
+        name: PredBuffer(random_reads)
+        for name in ["__A__", "__DADT__", "__X__", "__Y__"]
+    }
+    namespace = {
+        **values,
+        "exp": math.exp,
+        "log": math.log,
+        "__FIRST_ORDER": True,
+        "__SECOND_ORDER": True,
+        **buffers,
+    }
+    cmts = {
+        name: SimpleNamespace(name=name, A=a) for name, a in (amounts or {}).items()
+    }
+    exec(descriptor.postprocessed_pred.src, namespace)
+    namespace["pred"](SimpleNamespace(**values, **cmts))
+    return {name: dict(buffer) for name, buffer in buffers.items()}
+
+
+@pytest.fixture
+def run_pred() -> Callable[..., dict[str, dict[str, float]]]:
+    """Runs the postprocessed pred function of a descriptor, see `_run_pred`."""
+    return _run_pred
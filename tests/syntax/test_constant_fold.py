@@ -0,0 +1,109 @@
+import math
+
+import libcst as cst
+import pytest
+
+from mas.libs.masmod.modeling.api import Module, column, exp, omega, sigma, theta
+from mas.libs.masmod.modeling.functions.stats import normal_cdf
+from mas.libs.masmod.modeling.module.descriptor.cc import CCTranslator
+from mas.libs.masmod.modeling.module.descriptor.common import SrcEncapsulation
+from mas.libs.masmod.modeling.module.descriptor.descriptor import ModuleDescriptor
+from mas.libs.masmod.modeling.syntax.transformers.autodiff import AutoDiffOptions
+from mas.libs.masmod.modeling.syntax.transformers.constant_fold import (
+    ConstantFolder,
+)
+from mas.libs.masmod.modeling.utils.profiling import profile_compile
+
+
+def _fold(src: str) -> str:
+    pred: SrcEncapsulation[cst.FunctionDef] = SrcEncapsulation.from_src(src)
+    return pred.apply_transform(ConstantFolder()).src
+
+
+@pytest.mark.parametrize(
+    "expr, expected",
+    [
+        ("2 * 3 + x", "6 + x"),
+        ("(70 / 2) ** 2", "1225.0"),
+        ("x ** (1 / 2)", "x ** 0.5"),
+        ("1 - 3", "-2"),
+        ("x ** (1 - 3)", "x ** (-2)"),
+        ("-(-2.5)", "2.5"),
+        ("x * 1", "x"),
+        ("1.0 * x", "x"),
+        ("x + 0 - 0", "x"),
+        ("x / 1", "x"),
+        ("x ** 1", "x"),
+        ("1 + 0 * x", "1"),
+        ("a - (b - c + 0)", "a - (b - c)"),
+        ("0 * self.solve(k=x)", "0 * self.solve(k=x)"),
+        ("2 ** 1000", "2 ** 1000"),
+        ("1 / 0", "1 / 0"),
+        ("x % 2 * 1", "x % 2"),
+    ],
+)
+def test_fold_expression(expr, expected):
+    folded = _fold(f"def pred(self, x, a, b, c):\n    return {expr}\n")
+    assert folded.splitlines()[1].strip() == f"return {expected}"
+
+
+def test_propagate_literals():
+    src = """
+def pred(self):
+    A1 = 0.5
+    A2 = -0.25
+    PI = 3.141592653589793
+    k = 1
+    if self.time > 1:
+        k = 2
+    y = self.A1 + A1 * A2 ** 2 + A2 ** self.time + PI * k
+    return f(A1=y)
+"""
+    folded = _fold(src.strip()).splitlines()
+    # The assignments are kept, more than 15 digits stay in the local
+    assert folded[1:4] == [
+        "    A1 = 0.5",
+        "    A2 = -0.25",
+        "    PI = 3.141592653589793",
+    ]
+    assert folded[-2] == "    y = self.A1 + 0.03125 + (-0.25) ** self.time + PI * k"
+    assert folded[-1] == "    return f(A1=y)"
+
+
+class FoldModel(Module):
+    def __init__(self):
+        super().__init__()
+        self.tv_cl = theta(1.0)
+        self.iiv_cl = omega(0.1)
+        self.eps = sigma(0.1)
+        self.wt = column("WT")
+
+    def pred(self):
+        wt_eff = (self.wt / 70) ** 0.75
+        cl = self.tv_cl * exp(self.iiv_cl) * wt_eff * 1
+        p = normal_cdf(cl - 0.5)
+        return p * (1 + 0 * self.eps) + self.eps
+
+
+def test_fold_constants_model(run_pred):
+    with profile_compile() as report:
+        folded = ModuleDescriptor.from_module(FoldModel())
+    stage = report.stages["constant_fold"]
+    assert stage.nodes_out < stage.nodes_in
+    assert stage.counters["propagated_literals"] == 5
+    assert stage.counters["dropped_identities"] == 3
+
+    unfolded = ModuleDescriptor.from_module(
+        FoldModel(), options=AutoDiffOptions(fold_constants=False)
+    )
+    for wt in [50.0, 70.0, 90.0]:
+        values = dict(tv_cl=1.3, iiv_cl=0.11, eps=0.05, wt=wt)
+        expected = run_pred(unfolded, values)["__Y__"]
+        actual = run_pred(folded, values)["__Y__"]
+        assert actual.keys() == expected.keys()
+        for key, value in expected.items():
+            assert math.isclose(actual[key], value, rel_tol=1e-14), key
+
+    assert len(CCTranslator(descriptor=folded).translate()) <= len(
+        CCTranslator(descriptor=unfolded).translate()
+    )
@@ -0,0 +1,130 @@
+import libcst as cst
+import pytest
+
+from mas.libs.masmod.modeling.api import Module, column, exp, omega, sigma, theta
+from mas.libs.masmod.modeling.module.descriptor.cc import CCTranslator
+from mas.libs.masmod.modeling.module.descriptor.common import SrcEncapsulation
+from mas.libs.masmod.modeling.module.descriptor.descriptor import ModuleDescriptor
+from mas.libs.masmod.modeling.syntax.transformers.autodiff import AutoDiffOptions
+from mas.libs.masmod.modeling.syntax.transformers.dead_code import (
+    DeadCodeEliminator,
+)
+from mas.libs.masmod.modeling.utils.profiling import profile_compile
+
+
+def _eliminate(src: str, export_locals=None) -> str:
+    pred: SrcEncapsulation[cst.FunctionDef] = SrcEncapsulation.from_src(src.strip())
+    return pred.apply_transform(DeadCodeEliminator(export_locals)).src
+
+
+def test_eliminate_dead_assignments():
+    src = """
+def pred(self):
+    __a = self.x
+    __b = 1
+    __b = 2
+    if __FIRST_ORDER:
+        __0 = exp(self.x)
+        __X__["__a", self.eta] = __0
+        __X__["__b", self.eta] = 0
+    __c = __a
+    if self.x > 1:
+        __c = __b
+    if __FIRST_ORDER:
+        __1 = exp(self.x)
+        __X__["__c", self.eta] = __1
+        if __SECOND_ORDER:
+            pass
+    __Y__[:] = __c
+    return
+"""
+    expected = """
+def pred(self):
+    __a = self.x
+    __b = 2
+    __c = __a
+    if self.x > 1:
+        __c = __b
+    __Y__[:] = __c
+    return
+"""
+    assert _eliminate(src).strip() == expected.strip()
+
+
+def test_eliminate_keeps_exported_locals():
+    src = """
+def pred(self):
+    debug = self.x * 2
+    __tmp = self.x * 3
+    if self.x > 1:
+        __Y__[:] = self.x
+        return
+    __Y__[:] = 0
+    return
+"""
+    assert "    debug = self.x * 2\n" in _eliminate(src)
+    assert "__tmp" not in _eliminate(src)
+    assert "debug" not in _eliminate(src, export_locals=())
+
+    with pytest.raises(ValueError, match="not assigned in pred"):
+        _eliminate(src, export_locals=("ipred",))
+
+
+class DeadCodeModel(Module):
+    def __init__(self):
+        super().__init__()
+        self.tv_cl = theta(1.0)
+        self.tv_v = theta(2.0)
+        self.iiv_cl = omega(0.1)
+        self.iiv_v = omega(0.1)
+        self.eps = sigma(0.1)
+        self.time = column("TIME")
+
+    def pred(self):
+        cl = self.tv_cl * exp(self.iiv_cl)
+        v = self.tv_v * exp(self.iiv_v)
+        half_life = 0.693 * v / cl  # noqa: F841
+        k = cl / v
+        if self.time > 1:
+            k = cl / (v + self.time)
+        ipred = exp(-k * self.time) / v
+        return ipred * (1 + self.eps)
+
+
+@pytest.mark.parametrize("mode", ["forward", "reverse"])
+def test_eliminate_dead_code_model(mode, run_pred):
+    with profile_compile() as report:
+        eliminated = ModuleDescriptor.from_module(
+            DeadCodeModel(), options=AutoDiffOptions(mode=mode)
+        )
+    stage = report.stages["dead_code"]
+    assert stage.counters["removed_statements"] > 0
+    assert stage.nodes_out < stage.nodes_in
+
+    kept = ModuleDescriptor.from_module(
+        DeadCodeModel(), options=AutoDiffOptions(mode=mode, eliminate_dead_code=False)
+    )
+    for time in [0.5, 2.0]:
+        values = dict(tv_cl=1.3, tv_v=2.1, iiv_cl=0.11, iiv_v=0.23, eps=0.05, time=time)
+        assert run_pred(eliminated, values)["__Y__"] == run_pred(kept, values)["__Y__"]
+
+    src = eliminated.postprocessed_pred.src
+    assert "half_life = " in src
+    assert '__X__["half_life"' not in src
+
+
+def test_export_locals():
+    options = AutoDiffOptions(export_locals=["ipred"])
+    assert options.export_locals == ("ipred",)
+    descriptor = ModuleDescriptor.from_module(DeadCodeModel(), options=options)
+    assert "half_life" not in descriptor.postprocessed_pred.src
+
+    cc = "\n".join(CCTranslator(descriptor=descriptor).translate())
+    assert '->dlocals)["ipred"]' in cc
+    assert '->dlocals)["cl"]' not in cc
+
+    loaded = ModuleDescriptor.from_bytes(descriptor.to_bytes())
+    assert loaded.autodiff_options == options
+
+    with pytest.raises(TypeError, match="sequence of names"):
+        AutoDiffOptions(export_locals="ipred")  # type: ignore[arg-type]
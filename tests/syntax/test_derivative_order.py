@@ -0,0 +1,117 @@
+import math
+
+import pytest
+
+from mas.libs.masmod.modeling.api import (
+    Module,
+    OdeModule,
+    column,
+    compartment,
+    exp,
+    odeint,
+    omega,
+    sigma,
+    theta,
+)
+from mas.libs.masmod.modeling.module.descriptor.cc import CCTranslator
+from mas.libs.masmod.modeling.module.descriptor.descriptor import ModuleDescriptor
+from mas.libs.masmod.modeling.syntax.transformers.autodiff import AutoDiffOptions
+
+
+class OrderModel(Module):
+    def __init__(self):
+        super().__init__()
+        self.tv_cl = theta(1.0)
+        self.tv_v = theta(2.0)
+        self.iiv_cl = omega(0.1)
+        self.iiv_v = omega(0.1)
+        self.eps = sigma(0.1)
+        self.time = column("TIME")
+
+    def pred(self):
+        cl = self.tv_cl * exp(self.iiv_cl)
+        v = self.tv_v * exp(self.iiv_v)
+        if self.time > 1:
+            k = cl / v
+        else:
+            k = cl / (v + self.time)
+        ipred = exp(-k * self.time) / v
+        return ipred * (1 + self.eps)
+
+
+class OneCmtOrderModel(OdeModule):
+    def __init__(self):
+        super().__init__(solver=odeint.DVERK())
+        self.tv_k = theta(0.1)
+        self.iiv_k = omega(0.1)
+        self.eps = sigma(0.1)
+        self.central = compartment(default_dose=True, default_obs=True)
+
+    def pred(self):
+        k = self.tv_k * exp(self.iiv_k)
+        self.central.dAdt = -k * self.central.A
+        return self.central.A * (1 + self.eps)
+
+
+VALUES = dict(tv_cl=1.3, tv_v=2.1, iiv_cl=0.11, iiv_v=0.23, eps=0.05)
+
+
+@pytest.mark.parametrize("mode", ["forward", "reverse"])
+def test_derivative_order(mode, run_pred):
+    descriptors = {
+        order: ModuleDescriptor.from_module(
+            OrderModel(), options=AutoDiffOptions(mode=mode, order=order)
+        )
+        for order in [0, 1, 2]
+    }
+
+    src = descriptors[0].postprocessed_pred.src
+    assert "__FIRST_ORDER" not in src and "__X__" not in src
+    assert descriptors[0].derivative_sparsity.nnz == 0
+
+    src = descriptors[1].postprocessed_pred.src
+    assert "__FIRST_ORDER" in src and "__SECOND_ORDER" not in src
+    sparsity = descriptors[1].derivative_sparsity
+    assert sparsity.second_order == {}
+    assert (
+        sparsity.first_order["__Y__"]
+        == (descriptors[2].derivative_sparsity.first_order["__Y__"])
+    )
+
+    for time in [0.5, 2.0]:
+        values = {**VALUES, "time": time}
+        full = run_pred(descriptors[2], values)["__Y__"]
+        first = run_pred(descriptors[1], values)["__Y__"]
+        y = run_pred(descriptors[0], values)["__Y__"]
+        assert y.keys() == {repr("type"), repr(slice(None))}
+        assert y[repr(slice(None))] == full[repr(slice(None))]
+        assert first.keys() < full.keys()
+        for key, value in first.items():
+            assert math.isclose(full[key], value, rel_tol=1e-12), key
+
+    # Lower orders are smaller and carry over through serialization
+    sizes = [len(d.postprocessed_pred.src) for d in descriptors.values()]
+    assert sizes == sorted(sizes)
+    loaded = ModuleDescriptor.from_bytes(descriptors[1].to_bytes())
+    assert (
+        loaded.rediff().postprocessed_pred.src == descriptors[1].postprocessed_pred.src
+    )
+
+
+def test_derivative_order_ode():
+    descriptor = ModuleDescriptor.from_module(
+        OneCmtOrderModel(), options=AutoDiffOptions(order=0)
+    )
+    assert "__FIRST_ORDER" not in descriptor.postprocessed_pred.src
+    assert len(CCTranslator(descriptor=descriptor).translate()) > 0
+
+    descriptor = ModuleDescriptor.from_module(
+        OneCmtOrderModel(), options=AutoDiffOptions(order=1)
+    )
+    assert "__SECOND_ORDER" not in descriptor.postprocessed_pred.src
+    assert "__FIRST_ORDER" in descriptor.postprocessed_pred.src
+
+
+def test_invalid_derivative_order():
+    with pytest.raises(ValueError, match="Derivative order"):
+        AutoDiffOptions(order=3)  # type: ignore[arg-type]
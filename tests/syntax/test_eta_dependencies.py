@@ -0,0 +1,49 @@
+from mas.libs.masmod.modeling.api import Module, column, exp, omega, sigma, theta
+from mas.libs.masmod.modeling.module.descriptor.cc import CCTranslator
+from mas.libs.masmod.modeling.module.descriptor.descriptor import ModuleDescriptor
+
+
+class SparseModel(Module):
+    def __init__(self):
+        super().__init__()
+        self.tv_cl = theta(1.0)
+        self.tv_v = theta(2.0)
+        self.iiv_cl = omega(0.1)
+        self.iiv_v = omega(0.1)
+        self.eps = sigma(0.1)
+        self.wt = column("WT")
+
+    def pred(self):
+        wt = self.wt / 70
+        cl = self.tv_cl * wt * exp(self.iiv_cl)
+        v = self.tv_v * exp(self.iiv_v)
+        k = cl / v
+        if self.wt > 70:
+            k = k * wt
+        return k * (1 + self.eps)
+
+
+def test_skip_structurally_zero_derivatives():
+    descriptor = ModuleDescriptor.from_module(SparseModel())
+    src = descriptor.postprocessed_pred.src
+
+    assert '__X__["wt"' not in src
+    assert '__X__["cl", self.iiv_v]' not in src
+    assert '__X__["v", self.iiv_cl]' not in src
+    assert '__X__["k", self.iiv_cl]' in src
+    assert '__X__["k", self.iiv_v]' in src
+
+    sparsity = descriptor.derivative_sparsity
+    assert sparsity.first_order["cl"] == ("iiv_cl",)
+    assert sparsity.first_order["v"] == ("iiv_v",)
+    assert set(sparsity.first_order["k"]) == {"iiv_cl", "iiv_v"}
+    assert "wt" not in sparsity.first_order
+    assert sparsity.is_nonzero("__Y__", "eps")
+    assert sparsity.is_nonzero("__Y__", "iiv_cl", "eps")
+    assert not sparsity.is_nonzero("cl", "iiv_v")
+    assert sparsity.nnz == sum(map(len, sparsity.first_order.values())) + sum(
+        map(len, sparsity.second_order.values())
+    )
+
+    cc = "\n".join(CCTranslator(descriptor=descriptor).translate())
+    assert "wt" in cc
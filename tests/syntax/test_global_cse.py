@@ -0,0 +1,74 @@
+import math
+
+from mas.libs.masmod.modeling.api import Module, column, exp, omega, sigma, theta
+from mas.libs.masmod.modeling.module.descriptor.cc import CCTranslator
+from mas.libs.masmod.modeling.module.descriptor.descriptor import ModuleDescriptor
+from mas.libs.masmod.modeling.syntax.transformers.autodiff import AutoDiffOptions
+
+
+class SharedTermsModel(Module):
+    def __init__(self):
+        super().__init__()
+        self.tv_cl = theta(1.0)
+        self.tv_v = theta(2.0)
+        self.iiv_cl = omega(0.1)
+        self.iiv_v = omega(0.1)
+        self.eps = sigma(0.1)
+        self.time = column("TIME")
+
+    def pred(self):
+        cl = self.tv_cl * exp(self.iiv_cl)
+        v = self.tv_v * exp(self.iiv_v)
+        k = cl / v
+        c0 = 1 / v
+        a = k * exp(-k * self.time)
+        k = k * c0
+        b = k * exp(-k * self.time)
+        if self.time > 1:
+            ipred = c0 * a
+        else:
+            ipred = c0 * b
+        ipred = ipred * k / v
+        return ipred * (1 + self.eps)
+
+
+VALUES = dict(tv_cl=1.3, tv_v=2.1, iiv_cl=0.11, iiv_v=0.23, eps=0.05)
+
+
+def test_global_cse_reuses_temporaries(run_pred):
+    local = ModuleDescriptor.from_module(SharedTermsModel())
+    descriptor = ModuleDescriptor.from_module(
+        SharedTermsModel(), options=AutoDiffOptions(global_cse=True)
+    )
+    src = descriptor.postprocessed_pred.src
+
+    # Temporaries are numbered once per function and assigned once per branch
+    assignments = [
+        line.split("=")[0].strip()
+        for line in src.splitlines()
+        if line.strip().startswith("__") and not line.strip().startswith("__X__")
+    ]
+    assignments = [name for name in assignments if name[2:].isdigit()]
+    assert len(assignments) == len(set(assignments))
+    assert "__cse" not in src
+
+    for time in [0.5, 2.0]:
+        values = {**VALUES, "time": time}
+        expected = run_pred(local, values)["__Y__"]
+        actual = run_pred(descriptor, values)["__Y__"]
+        assert expected.keys() == actual.keys()
+        for key, value in expected.items():
+            assert math.isclose(actual[key], value, rel_tol=1e-12), key
+
+    cc = CCTranslator(descriptor=descriptor).translate()
+    assert len(cc) > 0
+
+
+def test_global_cse_is_kept_by_rediff():
+    descriptor = ModuleDescriptor.from_module(
+        SharedTermsModel(), options=AutoDiffOptions(global_cse=True)
+    )
+    rediffed = descriptor.rediff()
+    assert rediffed.postprocessed_pred.src == descriptor.postprocessed_pred.src
+    loaded = ModuleDescriptor.from_bytes(descriptor.to_bytes())
+    assert loaded.rediff().postprocessed_pred.src == descriptor.postprocessed_pred.src
@@ -0,0 +1,105 @@
+import logging
+import math
+
+import pytest
+
+from mas.libs.masmod.modeling.api import (
+    OdeModule,
+    compartment,
+    exp,
+    odeint,
+    omega,
+    sigma,
+    theta,
+)
+from mas.libs.masmod.modeling.module.descriptor.descriptor import ModuleDescriptor
+from mas.libs.masmod.modeling.syntax.transformers.autodiff import AutoDiffOptions
+from mas.libs.masmod.modeling.utils.loggings import logger
+from mas.libs.masmod.modeling.utils.profiling import profile_compile
+
+
+class NestedModel(OdeModule):
+    def __init__(self):
+        super().__init__(solver=odeint.DVERK())
+        self.tv_k = theta(0.1)
+        self.tv_km = theta(1.0)
+        self.tv_q = theta(0.5)
+        self.iiv_k = omega(0.1)
+        self.iiv_km = omega(0.1)
+        self.iiv_q = omega(0.1)
+        self.eps = sigma(0.1)
+        self.depot = compartment(default_dose=True)
+        self.central = compartment(default_obs=True)
+        self.periph = compartment()
+
+    def pred(self):
+        k = self.tv_k * exp(self.iiv_k)
+        km = self.tv_km * exp(self.iiv_km)
+        q = self.tv_q * exp(self.iiv_q)
+        c = self.central.A
+        p = self.periph.A
+        self.depot.dAdt = -k * self.depot.A
+        self.central.dAdt = k * self.depot.A - k * c / (
+            km + p / (km + c / (km + p * exp(q * c)))
+        )
+        self.periph.dAdt = q * (c - p)
+        return self.central.A * (1 + self.eps)
+
+
+VALUES = dict(
+    tv_k=0.13, tv_km=1.1, tv_q=0.4, iiv_k=0.11, iiv_km=0.23, iiv_q=0.31, eps=0.05
+)
+AMOUNTS = dict(depot=3.0, central=2.0, periph=1.0)
+
+
+class _Records(logging.Handler):
+    def __init__(self):
+        super().__init__(logging.WARNING)
+        self.messages: list[str] = []
+
+    def emit(self, record):
+        self.messages.append(record.getMessage())
+
+
+@pytest.mark.parametrize("global_cse", [False, True])
+def test_op_budget_splits_derivatives(global_cse, run_pred):
+    records = _Records()
+    logger.addHandler(records)
+    try:
+        with profile_compile() as report:
+            split = ModuleDescriptor.from_module(
+                NestedModel(),
+                options=AutoDiffOptions(global_cse=global_cse, op_budget=20),
+            )
+    finally:
+        logger.removeHandler(records)
+    counters = report.stages["autodiff"].counters
+    assert counters["op_budget_exceeded"] == 1
+    assert counters["intermediate_variables"] > 0
+    assert len(records.messages) == 1
+    assert "Derivative of __dA_centraldt wrt" in records.messages[0]
+    assert "over the budget of 20" in records.messages[0]
+    assert " __iv0 = " in split.postprocessed_pred.src
+
+    unsplit = ModuleDescriptor.from_module(
+        NestedModel(),
+        options=AutoDiffOptions(global_cse=global_cse, op_budget=None),
+    )
+    assert "__iv" not in unsplit.postprocessed_pred.src
+    # The amounts and their derivatives are read as random values
+    expected = run_pred(unsplit, VALUES, amounts=AMOUNTS, random_reads=True)
+    actual = run_pred(split, VALUES, amounts=AMOUNTS, random_reads=True)
+    expected, actual = expected["__DADT__"], actual["__DADT__"]
+    assert actual.keys() == expected.keys()
+    for key, value in expected.items():
+        assert math.isclose(actual[key], value, rel_tol=1e-12), key
+
+
+def test_op_budget_option():
+    # Splitting can make the C++ larger, it is opt-in
+    assert AutoDiffOptions().op_budget is None
+    assert AutoDiffOptions.from_dict(AutoDiffOptions(op_budget=50).to_dict()) == (
+        AutoDiffOptions(op_budget=50)
+    )
+    with pytest.raises(ValueError, match="at least 1"):
+        AutoDiffOptions(op_budget=0)
@@ -0,0 +1,178 @@
+import pickle
+from dataclasses import replace
+
+import pytest
+from sympy import Tuple
+
+from mas.libs.masmod.modeling.api import (
+    Module,
+    OdeModule,
+    column,
+    compartment,
+    exp,
+    odeint,
+    omega,
+    sigma,
+    theta,
+)
+from mas.libs.masmod.modeling.module.closed_form_solutions.ev_one_cmt import (
+    EvOneCmtLinear,
+)
+from mas.libs.masmod.modeling.module.descriptor.descriptor import ModuleDescriptor
+from mas.libs.masmod.modeling.symbols._cmt import CmtSolvedAWrt
+from mas.libs.masmod.modeling.symbols._ns import SymbolNamespace
+from mas.libs.masmod.modeling.symbols._x import XWrt
+from mas.libs.masmod.modeling.symbols.pickling import SymbolTable
+from mas.libs.masmod.modeling.syntax.transformers.autodiff import (
+    AutoDiffMemo,
+    AutoDiffOptions,
+)
+
+PARALLEL = AutoDiffOptions(workers=2)
+
+
+class ParallelModel(Module):
+    def __init__(self):
+        super().__init__()
+        self.tv_cl = theta(1.0)
+        self.tv_v = theta(2.0)
+        self.iiv_cl = omega(0.1)
+        self.iiv_v = omega(0.1)
+        self.eps = sigma(0.1)
+        self.time = column("TIME")
+
+    def pred(self):
+        cl = self.tv_cl * exp(self.iiv_cl)
+        v = self.tv_v * exp(self.iiv_v)
+        if self.time > 1:
+            k = cl / v
+        else:
+            k = cl / (v + self.time)
+        return exp(-k * self.time) / v * (1 + self.eps)
+
+
+class TwoCmtModel(OdeModule):
+    def __init__(self):
+        super().__init__(solver=odeint.DVERK())
+        self.tv_ka = theta(1.0)
+        self.tv_k = theta(0.1)
+        self.iiv_ka = omega(0.1)
+        self.iiv_k = omega(0.1)
+        self.eps = sigma(0.1)
+        self.depot = compartment(default_dose=True)
+        self.central = compartment(default_obs=True)
+
+    def pred(self):
+        ka = self.tv_ka * exp(self.iiv_ka)
+        k = self.tv_k * exp(self.iiv_k)
+        self.depot.dAdt = -ka * self.depot.A
+        self.central.dAdt = ka * self.depot.A - k * self.central.A
+        return self.central.A * (1 + self.eps)
+
+
+class ClosedFormModel(EvOneCmtLinear.Micro):
+    def __init__(self):
+        super().__init__()
+        self.tv_k = theta(0.1)
+        self.tv_ka = theta(1.0)
+        self.iiv_k = omega(0.1)
+        self.iiv_ka = omega(0.1)
+        self.eps = sigma(0.1)
+
+    def pred(self):
+        k = self.tv_k * exp(self.iiv_k)
+        ka = self.tv_ka * exp(self.iiv_ka)
+        f = self.solve(k=k, ka=ka)
+        return f * (1 + self.eps)
+
+
+class NestedModel(OdeModule):
+    def __init__(self):
+        super().__init__(solver=odeint.DVERK())
+        self.tv_k = theta(0.1)
+        self.tv_km = theta(1.0)
+        self.iiv_k = omega(0.1)
+        self.iiv_km = omega(0.1)
+        self.eps = sigma(0.1)
+        self.central = compartment(default_dose=True, default_obs=True)
+        self.periph = compartment()
+
+    def pred(self):
+        k = self.tv_k * exp(self.iiv_k)
+        km = self.tv_km * exp(self.iiv_km)
+        c = self.central.A
+        p = self.periph.A
+        self.central.dAdt = -k * c / (km + p / (km + c / (km + p * exp(k * c))))
+        self.periph.dAdt = k * c / (km + c / (km + p / (km + c * exp(k * p))))
+        return self.central.A * (1 + self.eps)
+
+
+@pytest.mark.parametrize("model", [ParallelModel, TwoCmtModel, ClosedFormModel])
+def test_parallel_matches_serial(model):
+    serial = ModuleDescriptor.from_module(model())
+    parallel = ModuleDescriptor.from_module(model(), options=PARALLEL)
+    assert parallel.postprocessed_pred.src == serial.postprocessed_pred.src
+
+
+def test_parallel_numbers_intermediates():
+    options = AutoDiffOptions(op_budget=20)
+    serial = ModuleDescriptor.from_module(NestedModel(), options=options)
+    parallel = ModuleDescriptor.from_module(
+        NestedModel(), options=replace(options, workers=2)
+    )
+    # Both statements are split, by different workers numbering from 0
+    assert "__iv10 = " in serial.postprocessed_pred.src
+    assert parallel.postprocessed_pred.src == serial.postprocessed_pred.src
+
+
+def test_parallel_reuses_memo():
+    memo = AutoDiffMemo()
+    serial = ModuleDescriptor.from_module(TwoCmtModel(), memo=memo)
+    n_entries = len(memo)
+    parallel = ModuleDescriptor.from_module(TwoCmtModel(), options=PARALLEL, memo=memo)
+    assert parallel.postprocessed_pred.src == serial.postprocessed_pred.src
+    # Nothing left to dispatch
+    assert memo.hits >= n_entries
+    assert len(memo) == n_entries
+
+
+def test_symbol_table_pickle():
+    memo = AutoDiffMemo()
+    descriptor = ModuleDescriptor.from_module(TwoCmtModel(), memo=memo)
+    table = SymbolTable(
+        SymbolNamespace(
+            [
+                *descriptor.thetas,
+                *descriptor.etas,
+                *descriptor.epsilons,
+                *descriptor.cmts,
+            ]
+        )
+    )
+
+    derivatives = [
+        Tuple(wrt, expr)
+        for reduced in memo._entries.values()
+        for wrt, expr in [*reduced.first_order, *reduced.second_order]
+    ]
+    expr = Tuple(*derivatives)
+    decoded = table.decode(pickle.loads(pickle.dumps(table.encode(expr))))
+    assert decoded == expr
+
+    originals = {s.name: s for s in expr.free_symbols}
+    for symbol in decoded.free_symbols:
+        original = originals[symbol.name]
+        assert type(symbol) is type(original)
+        if isinstance(symbol, XWrt):
+            assert (symbol.xname, symbol.wrt, symbol.wrt2nd) == (
+                original.xname,
+                original.wrt,
+                original.wrt2nd,
+            )
+        if isinstance(symbol, CmtSolvedAWrt):
+            assert symbol.cmt.name == original.cmt.name
+
+
+def test_invalid_workers():
+    with pytest.raises(ValueError, match="Workers"):
+        AutoDiffOptions(workers=0)
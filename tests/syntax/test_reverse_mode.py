@@ -0,0 +1,202 @@
+import math
+
+import pytest
+
+from mas.libs.masmod.modeling.api import (
+    Module,
+    OdeModule,
+    column,
+    compartment,
+    exp,
+    odeint,
+    omega,
+    sigma,
+    theta,
+)
+from mas.libs.masmod.modeling.module.descriptor.cc import CCTranslator
+from mas.libs.masmod.modeling.module.descriptor.descriptor import ModuleDescriptor
+from mas.libs.masmod.modeling.syntax.transformers.autodiff import AutoDiffOptions
+
+REVERSE = AutoDiffOptions(mode="reverse")
+
+
+class BranchModel(Module):
+    def __init__(self):
+        super().__init__()
+        self.tv_cl = theta(1.0)
+        self.tv_v = theta(2.0)
+        self.iiv_cl = omega(0.1)
+        self.iiv_v = omega(0.1)
+        self.eps_prop = sigma(0.1)
+        self.eps_add = sigma(0.1)
+        self.time = column("TIME")
+
+    def pred(self):
+        cl = self.tv_cl * exp(self.iiv_cl)
+        v = self.tv_v * exp(self.iiv_v)
+        k = cl / v
+        if self.time > 1:
+            conc = exp(-k * self.time) / v
+        else:
+            conc = k * self.time / v
+        unused = cl * v  # noqa: F841
+        return conc * (1 + self.eps_prop) + self.eps_add * exp(self.iiv_v)
+
+
+class ReassignedModel(Module):
+    def __init__(self):
+        super().__init__()
+        self.tv_cl = theta(1.0)
+        self.tv_v = theta(2.0)
+        self.iiv_cl = omega(0.1)
+        self.iiv_v = omega(0.1)
+        self.eps = sigma(0.1)
+        self.time = column("TIME")
+
+    def pred(self):
+        cl = self.tv_cl * exp(self.iiv_cl)
+        v = self.tv_v * exp(self.iiv_v)
+        k = cl / v
+        a = k * exp(-k * self.time)
+        k = k * k / v
+        if self.time > 1:
+            a = a * k
+        a = a * (1 + self.eps) + k
+        return a + self.eps * v
+
+
+class ElifModel(Module):
+    def __init__(self):
+        super().__init__()
+        self.tv_cl = theta(1.0)
+        self.tv_v = theta(2.0)
+        self.iiv_cl = omega(0.1)
+        self.iiv_v = omega(0.1)
+        self.eps = sigma(0.1)
+        self.time = column("TIME")
+
+    def pred(self):
+        cl = self.tv_cl * exp(self.iiv_cl)
+        v = self.tv_v * exp(self.iiv_v)
+        k = cl / v
+        if self.time > 1:
+            if self.time > 3:
+                k = k * v
+            elif self.time > 2:
+                v = v * k
+            else:
+                k = k * k + 1
+        else:
+            k = k * 2
+        return k * v * (1 + self.eps)
+
+
+class OneCmtModel(OdeModule):
+    def __init__(self):
+        super().__init__(solver=odeint.DVERK())
+        self.tv_k = theta(0.1)
+        self.iiv_k = omega(0.1)
+        self.eps = sigma(0.1)
+        self.central = compartment(default_dose=True, default_obs=True)
+
+    def pred(self):
+        k = self.tv_k * exp(self.iiv_k)
+        self.central.dAdt = -k * self.central.A
+        return self.central.A * (1 + self.eps)
+
+
+VALUES = dict(
+    tv_cl=1.3,
+    tv_v=2.1,
+    iiv_cl=0.11,
+    iiv_v=0.23,
+    eps=0.05,
+    eps_prop=0.07,
+    eps_add=0.03,
+)
+
+
+def test_reverse_matches_forward(run_pred):
+    forward = ModuleDescriptor.from_module(BranchModel())
+    reverse = ModuleDescriptor.from_module(BranchModel(), options=REVERSE)
+    assert (
+        reverse.derivative_sparsity.first_order["__Y__"]
+        == (forward.derivative_sparsity.first_order["__Y__"])
+    )
+    # Only the taken branch is swept back
+    assert "if __b0:" in reverse.postprocessed_pred.src
+    assert "__a_unused" not in reverse.postprocessed_pred.src
+
+    for time in [0.5, 2.0]:
+        values = {**VALUES, "time": time}
+        expected = run_pred(forward, values)["__Y__"]
+        actual = run_pred(reverse, values)["__Y__"]
+        assert expected.keys() == actual.keys()
+        for key, value in expected.items():
+            assert math.isclose(actual[key], value, rel_tol=1e-12), key
+
+    cc = CCTranslator(descriptor=reverse).translate()
+    assert len(cc) > 0
+
+
+def test_reverse_elif(run_pred):
+    descriptor = ModuleDescriptor.from_module(ElifModel(), options=REVERSE)
+    assert "elif __b" in descriptor.postprocessed_pred.src
+    # The forward mode differentiates the final else of the chain too
+    forward = ModuleDescriptor.from_module(ElifModel())
+    assert forward.postprocessed_pred.src.count("# mtran: k wrt iiv_cl") == 4
+    h = 1e-6
+
+    def y(time: float, **changes: float) -> float:
+        values = {**VALUES, **changes, "time": time}
+        return run_pred(descriptor, values)["__Y__"][repr(slice(None))]
+
+    # Every branch of the chain, the final else of the `elif` included
+    for time in [0.5, 1.5, 2.5, 3.5]:
+        out = run_pred(descriptor, {**VALUES, "time": time})["__Y__"]
+        for name in ["iiv_cl", "iiv_v", "eps"]:
+            x = VALUES[name]
+            expected = (y(time, **{name: x + h}) - y(time, **{name: x - h})) / (2 * h)
+            assert math.isclose(out[repr(x)], expected, rel_tol=1e-6, abs_tol=1e-8), (
+                time,
+                name,
+            )
+
+
+def test_reverse_reassigned_locals(run_pred):
+    descriptor = ModuleDescriptor.from_module(ReassignedModel(), options=REVERSE)
+    h = 1e-5
+
+    def y(time: float, **changes: float) -> float:
+        values = {**VALUES, **changes, "time": time}
+        return run_pred(descriptor, values)["__Y__"][repr(slice(None))]
+
+    for time in [0.5, 2.0]:
+        out = run_pred(descriptor, {**VALUES, "time": time})["__Y__"]
+        for name in ["iiv_cl", "iiv_v", "eps"]:
+            x = VALUES[name]
+            expected = (y(time, **{name: x + h}) - y(time, **{name: x - h})) / (2 * h)
+            assert math.isclose(out[repr(x)], expected, rel_tol=1e-6), name
+        for name in ["iiv_cl", "iiv_v"]:
+            x, e = VALUES[name], VALUES["eps"]
+            expected = (
+                y(time, **{name: x + h, "eps": e + h})
+                - y(time, **{name: x + h, "eps": e - h})
+                - y(time, **{name: x - h, "eps": e + h})
+                + y(time, **{name: x - h, "eps": e - h})
+            ) / (4 * h * h)
+            assert math.isclose(out[repr((x, e))], expected, rel_tol=1e-4), name
+
+
+def test_reverse_mode_is_kept():
+    descriptor = ModuleDescriptor.from_module(BranchModel(), options=REVERSE)
+    loaded = ModuleDescriptor.from_bytes(descriptor.to_bytes())
+    assert loaded.rediff().postprocessed_pred.src == descriptor.postprocessed_pred.src
+
+
+def test_reverse_mode_rejects_compartments():
+    with pytest.raises(ValueError, match="forward mode"):
+        ModuleDescriptor.from_module(OneCmtModel(), options=REVERSE)
+
+    with pytest.raises(ValueError, match="Unknown autodiff mode"):
+        AutoDiffOptions(mode="sideways")  # type: ignore[arg-type]
@@ -0,0 +1,51 @@
+import pytest
+from sympy import Symbol
+
+from mas.libs.masmod.modeling.api import (
+    OdeModule,
+    column,
+    compartment,
+    odeint,
+    omega,
+    sigma,
+    theta,
+)
+from mas.libs.masmod.modeling.symbols._ns import SymbolNamespace
+
+
+class NamespaceModel(OdeModule):
+    def __init__(self):
+        super().__init__(solver=odeint.DVERK())
+        self.tv_k = theta(0.1)
+        self.iiv_k = omega(0.1)
+        self.eps = sigma(0.1)
+        self.wt = column("WT")
+        self.central = compartment(default_dose=True, default_obs=True)
+
+    def pred(self):
+        self.central.dAdt = -self.tv_k * self.central.A
+        return self.central.A * (1 + self.eps)
+
+
+def test_symbol_namespace():
+    mod = NamespaceModel()
+    ns = SymbolNamespace([mod.central, mod.wt, mod.eps, mod.iiv_k, mod.tv_k])
+    assert list(ns.iter_theta()) == [mod.tv_k]
+    assert list(ns.iter_eta()) == [mod.iiv_k]
+    assert list(ns.iter_eps()) == [mod.eps]
+    assert list(ns.iter_cmt()) == [mod.central]
+    assert list(ns.iter_colvar()) == [mod.wt]
+
+    assert ns.has_symbol(mod.iiv_k)
+    assert ns.has_symbol(mod.wt)
+    # Compared as sympy symbols, the kind matters
+    assert not ns.has_symbol(Symbol("iiv_k"))
+    assert ns.get_symbol("central") is mod.central
+    assert ns.get_symbol("tv_k") is mod.tv_k
+    assert ns.get_symbol("ka") is None
+
+    with pytest.raises(TypeError, match="Unknown symbol type"):
+        list(ns.iter_symbols())
+    assert list(SymbolNamespace(ns[1:]).iter_symbols()) == list(ns[1:])
+
+    assert not SymbolNamespace()
@@ -0,0 +1,88 @@
+import importlib.util
+
+import pytest
+import sympy
+from sympy import Symbol, numbered_symbols
+
+from mas.libs.masmod.modeling.api import Module, exp, omega, sigma, theta
+from mas.libs.masmod.modeling.module.descriptor.descriptor import ModuleDescriptor
+from mas.libs.masmod.modeling.symbols._closed_form import ClosedFormSolutionSolvedFWrt
+from mas.libs.masmod.modeling.symbols._omega_eta import Eta
+from mas.libs.masmod.modeling.symbols._x import XWrt
+from mas.libs.masmod.modeling.symbols.backend import (
+    SymbolicBackend,
+    get_backend,
+)
+from mas.libs.masmod.modeling.syntax.transformers.autodiff import AutoDiffOptions
+
+HAS_SYMENGINE = importlib.util.find_spec("symengine") is not None
+
+
+class BackendModel(Module):
+    def __init__(self):
+        super().__init__()
+        self.tv_cl = theta(1.0)
+        self.tv_v = theta(2.0)
+        self.iiv_cl = omega(0.1)
+        self.iiv_v = omega(0.1)
+        self.eps = sigma(0.1)
+
+    def pred(self):
+        cl = self.tv_cl * exp(self.iiv_cl)
+        v = self.tv_v * exp(self.iiv_v)
+        return cl / v * (1 + self.eps)
+
+
+def _check_round_trip(backend: SymbolicBackend):
+    eta = Eta("iiv_cl")
+    x = Symbol("x")
+    x_wrt = XWrt("x", eta)
+    f_wrt = ClosedFormSolutionSolvedFWrt(wrt=eta)
+    expr = sympy.exp(eta) * x * x_wrt + f_wrt * sympy.exp(eta)
+
+    derivative = backend.diff(expr, eta)
+    assert (derivative - expr.diff(eta)).expand() == 0
+    assert {type(s) for s in derivative.free_symbols} == {
+        Eta,
+        Symbol,
+        XWrt,
+        ClosedFormSolutionSolvedFWrt,
+    }
+    assert backend.diff(expr, Symbol("y")) == 0
+
+    exprs = [expr, derivative]
+    replacements, reductions = backend.cse(exprs, numbered_symbols(prefix="__"))
+    assert all(term.name.startswith("__") for term, _ in replacements)
+    for reduced, original in zip(reductions, exprs):
+        for term, sub_expr in reversed(replacements):
+            reduced = reduced.xreplace({term: sub_expr})
+        assert (reduced - original).expand() == 0
+        assert reduced.free_symbols == original.free_symbols
+
+
+def test_sympy_backend():
+    _check_round_trip(get_backend("sympy"))
+
+
+@pytest.mark.skipif(not HAS_SYMENGINE, reason="symengine is not installed")
+def test_symengine_backend():
+    _check_round_trip(get_backend("symengine"))
+
+    sympy_ = ModuleDescriptor.from_module(BackendModel())
+    symengine = ModuleDescriptor.from_module(
+        BackendModel(), options=AutoDiffOptions(backend="symengine")
+    )
+    assert symengine.derivative_sparsity == sympy_.derivative_sparsity
+
+
+@pytest.mark.skipif(HAS_SYMENGINE, reason="symengine is installed")
+def test_symengine_backend_missing():
+    with pytest.raises(ImportError, match="pip install symengine"):
+        ModuleDescriptor.from_module(
+            BackendModel(), options=AutoDiffOptions(backend="symengine")
+        )
+
+
+def test_invalid_backend():
+    with pytest.raises(ValueError, match="Unknown symbolic backend"):
+        AutoDiffOptions(backend="maxima")  # type: ignore[arg-type]
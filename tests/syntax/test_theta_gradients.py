@@ -0,0 +1,134 @@
+import math
+
+import pytest
+
+from mas.libs.masmod.modeling.api import (
+    Module,
+    OdeModule,
+    column,
+    compartment,
+    exp,
+    odeint,
+    omega,
+    sigma,
+    theta,
+)
+from mas.libs.masmod.modeling.module.descriptor.cc import (
+    CCTransPredVisitor,
+    CCTranslator,
+)
+from mas.libs.masmod.modeling.module.descriptor.descriptor import ModuleDescriptor
+from mas.libs.masmod.modeling.syntax.transformers.autodiff import AutoDiffOptions
+
+THETA_GRADIENTS = AutoDiffOptions(theta_gradients=True)
+
+
+class CovariateModel(Module):
+    def __init__(self):
+        super().__init__()
+        self.tv_cl = theta(1.0)
+        self.tv_v = theta(2.0)
+        self.wt_cl = theta(0.75)
+        self.iiv_cl = omega(0.1)
+        self.iiv_v = omega(0.1)
+        self.eps = sigma(0.1)
+        self.time = column("TIME")
+        self.wt = column("WT")
+
+    def pred(self):
+        cl = self.tv_cl * (self.wt / 70) ** self.wt_cl * exp(self.iiv_cl)
+        v = self.tv_v * exp(self.iiv_v)
+        if self.time > 1:
+            k = cl / v
+        else:
+            k = cl / (v + self.time)
+        ipred = exp(-k * self.time) / v
+        return ipred * (1 + self.eps)
+
+
+class OneCmtThetaModel(OdeModule):
+    def __init__(self):
+        super().__init__(solver=odeint.DVERK())
+        self.tv_k = theta(0.1)
+        self.iiv_k = omega(0.1)
+        self.eps = sigma(0.1)
+        self.central = compartment(default_dose=True, default_obs=True)
+
+    def pred(self):
+        k = self.tv_k * exp(self.iiv_k)
+        self.central.dAdt = -k * self.central.A
+        return self.central.A * (1 + self.eps)
+
+
+VALUES = dict(
+    tv_cl=1.3, tv_v=2.1, wt_cl=0.8, iiv_cl=0.11, iiv_v=0.23, eps=0.05, wt=82.0
+)
+
+
+@pytest.mark.parametrize("mode", ["forward", "reverse"])
+def test_theta_gradients(mode, run_pred):
+    descriptor = ModuleDescriptor.from_module(
+        CovariateModel(), options=AutoDiffOptions(theta_gradients=True, mode=mode)
+    )
+    h = 1e-5
+
+    def gradient(time: float, name: str, **changes: float) -> float:
+        out = run_pred(descriptor, {**VALUES, **changes, "time": time})["__Y__"]
+        return out[repr(changes.get(name, VALUES[name]))]
+
+    def y(time: float, **changes: float) -> float:
+        values = {**VALUES, **changes, "time": time}
+        return run_pred(descriptor, values)["__Y__"][repr(slice(None))]
+
+    for time in [0.5, 2.0]:
+        out = run_pred(descriptor, {**VALUES, "time": time})["__Y__"]
+        for name in ["tv_cl", "tv_v", "wt_cl"]:
+            x = VALUES[name]
+            expected = (y(time, **{name: x + h}) - y(time, **{name: x - h})) / (2 * h)
+            assert math.isclose(out[repr(x)], expected, rel_tol=1e-6), name
+            for eta in ["iiv_cl", "iiv_v"]:
+                expected = (
+                    gradient(time, eta, **{name: x + h})
+                    - gradient(time, eta, **{name: x - h})
+                ) / (2 * h)
+                actual = out[repr((x, VALUES[eta]))]
+                assert math.isclose(actual, expected, rel_tol=1e-6, abs_tol=1e-9)
+
+
+def test_theta_gradients_off_by_default():
+    descriptor = ModuleDescriptor.from_module(CovariateModel())
+    assert "tv_cl" not in descriptor.derivative_sparsity.first_order["__Y__"]
+
+    descriptor = ModuleDescriptor.from_module(CovariateModel(), options=THETA_GRADIENTS)
+    sparsity = descriptor.derivative_sparsity
+    assert "tv_cl" in sparsity.first_order["__Y__"]
+    assert ("wt_cl", "iiv_v") in sparsity.second_order["__Y__"]
+    # v does not depend on the clearance thetas
+    assert not sparsity.is_nonzero("v", "tv_cl")
+    loaded = ModuleDescriptor.from_bytes(descriptor.to_bytes())
+    assert loaded.rediff().postprocessed_pred.src == descriptor.postprocessed_pred.src
+
+
+def test_theta_y_index():
+    descriptor = ModuleDescriptor.from_module(CovariateModel(), options=THETA_GRADIENTS)
+    visitor = CCTransPredVisitor(
+        source_code=descriptor.postprocessed_pred.src, descriptor=descriptor
+    )
+    tv_cl, tv_v, wt_cl = descriptor.thetas
+    iiv_cl, iiv_v = descriptor.etas
+    (eps,) = descriptor.epsilons
+    # Y, 2 etas, 1 eps, 2 eta-eps, 3 eta-eta
+    assert visitor._compute_y_index(iiv_v, iiv_v) == 8
+    assert visitor._compute_y_index(tv_cl) == 9
+    assert visitor._compute_y_index(wt_cl) == 11
+    assert visitor._compute_y_index(tv_cl, iiv_cl) == 12
+    assert visitor._compute_y_index(tv_v, iiv_v) == 15
+    assert visitor._compute_y_index(wt_cl, iiv_v) == 17
+
+    cc = "\n".join(CCTranslator(descriptor=descriptor).translate())
+    assert "Y[17]" in cc and "Y[18]" not in cc
+
+
+def test_theta_gradients_reject_compartments():
+    with pytest.raises(ValueError, match="Theta gradients"):
+        ModuleDescriptor.from_module(OneCmtThetaModel(), options=THETA_GRADIENTS)